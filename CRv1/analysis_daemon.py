@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Analysis Daemon
+--------------
+Resident analysis server for batch callers. The daemon loads, preprocesses
+and analyzes the course data once and then answers analysis, insight and
+student queries over local HTTP, so repeated per-course queries do not pay
+for Python startup, imports and a full pipeline run each time.
+
+Usage:
+    python analysis_daemon.py serve --data course_complexity_data.csv
+    python analysis_daemon.py analysis --course CS101
+    python analysis_daemon.py insights --course CS101 --student S1000
+    python analysis_daemon.py student --student S1000
+
+The client commands only use the standard library, so they start quickly.
+"""
+
+import os
+import sys
+import json
+import argparse
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+# Optional per-request Gemini key; never taken from the URL, which ends up in logs and process listings
+API_KEY_HEADER = 'X-Goog-Api-Key'
+
+
+class AnalysisState:
+    """Loaded data, metrics and cached insights shared by the request handlers."""
+
+    def __init__(self, data_source, api_key=None):
+        self.data_source = data_source
+        self.api_key = api_key
+        self.lock = threading.Lock()
+        self.processed_data = None
+        self.partitions = None
+        self.complexity_metrics = {}
+        self.insights_cache = {}
+
+    def load(self):
+        """Run the load/preprocess/analyze pipeline and swap in the results."""
+        from data_processor import load_course_data, preprocess_data
+        from data_validator import validate_course_data, print_validation_report
+        from analysis_engine import analyze_course_complexity
+        from course_partitions import build_course_partitions
+
+        raw_data = load_course_data(self.data_source)
+        if raw_data.empty:
+            raise ValueError(f"No data found or unable to parse {self.data_source}")
+
+        raw_data, validation_report = validate_course_data(raw_data)
+        print_validation_report(validation_report)
+        if raw_data.empty:
+            raise ValueError(f"No valid rows left in {self.data_source} after validation")
+
+        processed_data = preprocess_data(raw_data)
+        partitions = build_course_partitions(processed_data)
+        complexity_metrics = analyze_course_complexity(processed_data, partitions=partitions)
+
+        with self.lock:
+            self.processed_data = processed_data
+            self.partitions = partitions
+            self.complexity_metrics = complexity_metrics
+            self.insights_cache = {}
+        print(f"Loaded {len(processed_data)} rows, {len(complexity_metrics)} courses")
+
+    def analysis(self, course_id=None):
+        """Return complexity metrics for one course or all courses."""
+        if course_id:
+            if course_id not in self.complexity_metrics:
+                return {}
+            return {course_id: self.complexity_metrics[course_id]}
+        return self.complexity_metrics
+
+    def insights(self, course_id=None, student_id=None, teacher_name=None, api_key=None):
+        """Return Gemini insights, cached per (course, student, teacher) until the next reload."""
+        from llm_connector import get_gemini_insights
+
+        key = (course_id, student_id, teacher_name)
+        if key in self.insights_cache:
+            return self.insights_cache[key]
+
+        insights = get_gemini_insights(
+            self.processed_data,
+            self.analysis(course_id),
+            student_id=student_id,
+            api_key=api_key or self.api_key,
+            selected_course=course_id,
+            selected_teacher=teacher_name,
+            partitions=self.partitions
+        )
+        # Errors are not cached so a transient failure can be retried
+        if 'error' not in insights:
+            self.insights_cache[key] = insights
+        return insights
+
+    def student(self, student_id):
+        """Return the student's course history and relative performance."""
+        from llm_connector import prepare_prompt_data
+
+        prompt_data = prepare_prompt_data(self.processed_data, {}, student_id, partitions=self.partitions)
+        return prompt_data['student_info'] or {}
+
+
+class AnalysisRequestHandler(BaseHTTPRequestHandler):
+    """
+    Routes GET /analysis, /insights, /student, /health and POST /reload.
+
+    /insights uses the daemon's own key (--api-key or the environment) unless
+    the request carries one in the API_KEY_HEADER header.
+    """
+
+    state = None
+
+    def _send_json(self, payload, status=200):
+        from metrics_exporter import dumps_metrics
+        # NaN is written as null so non-Python clients can parse the body
+        body = dumps_metrics(payload)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        params = {key: values[0] for key, values in urllib.parse.parse_qs(url.query).items()}
+
+        try:
+            if url.path == '/health':
+                self._send_json({'status': 'ok', 'courses': len(self.state.complexity_metrics)})
+            elif url.path == '/analysis':
+                self._send_json(self.state.analysis(params.get('course')))
+            elif url.path == '/insights':
+                self._send_json(self.state.insights(
+                    params.get('course'), params.get('student'), params.get('teacher'),
+                    self.headers.get(API_KEY_HEADER)))
+            elif url.path == '/student':
+                if not params.get('student'):
+                    self._send_json({'error': 'student parameter is required'}, status=400)
+                else:
+                    self._send_json(self.state.student(params['student']))
+            else:
+                self._send_json({'error': f"Unknown path {url.path}"}, status=404)
+        except Exception as e:
+            self._send_json({'error': str(e)}, status=500)
+
+    def do_POST(self):
+        if self.path != '/reload':
+            self._send_json({'error': f"Unknown path {self.path}"}, status=404)
+            return
+        try:
+            self.state.load()
+            self._send_json({'status': 'reloaded', 'courses': len(self.state.complexity_metrics)})
+        except Exception as e:
+            self._send_json({'error': str(e)}, status=500)
+
+    def log_message(self, format, *args):
+        # Keep the daemon quiet; batch callers issue many requests
+        pass
+
+
+def serve(data_source, host=DEFAULT_HOST, port=DEFAULT_PORT, api_key=None):
+    """
+    Load the data once and serve queries until interrupted.
+
+    Args:
+        data_source (str or list): CSV file(s), directory or glob pattern
+        host (str): Interface to bind (local only by default)
+        port (int): Port to listen on
+        api_key (str, optional): Gemini API key used for insight queries
+    """
+    state = AnalysisState(data_source, api_key)
+    print(f"Loading course data from {data_source}...")
+    state.load()
+
+    handler = type('BoundAnalysisRequestHandler', (AnalysisRequestHandler,), {'state': state})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Analysis daemon listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down analysis daemon")
+    finally:
+        server.server_close()
+
+
+def query(command, params, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=300, api_key=None):
+    """
+    Send a query to a running daemon.
+
+    Args:
+        command (str): One of 'analysis', 'insights', 'student', 'health' or 'reload'
+        params (dict): Query parameters (None values are dropped)
+        host (str): Daemon host
+        port (int): Daemon port
+        timeout (float): Request timeout in seconds
+        api_key (str, optional): Gemini API key sent in the API_KEY_HEADER header
+
+    Returns:
+        dict: Decoded JSON response
+    """
+    query_string = urllib.parse.urlencode({k: v for k, v in params.items() if v is not None})
+    url = f"http://{host}:{port}/{command}" + (f"?{query_string}" if query_string else '')
+    request = urllib.request.Request(url, method='POST' if command == 'reload' else 'GET')
+    if api_key:
+        request.add_header(API_KEY_HEADER, api_key)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return json.loads(e.read())
+
+
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Course Complexity Analysis Daemon')
+    parser.add_argument('--host', type=str, default=DEFAULT_HOST, help='Daemon host')
+    parser.add_argument('--port', '-p', type=int, default=DEFAULT_PORT, help='Daemon port')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help='Start the daemon')
+    serve_parser.add_argument('--data', '-d', type=str, nargs='+', required=True,
+                              help='CSV file(s), directory or glob pattern with course data')
+    serve_parser.add_argument('--api-key', '-k', type=str, default=None,
+                              help='Gemini API key (if not set, will look for GEMINI_API_KEY env variable)')
+
+    analysis_parser = subparsers.add_parser('analysis', help='Get complexity metrics')
+    analysis_parser.add_argument('--course', '-c', type=str, default=None, help='Course number')
+    analysis_parser.add_argument('--text', action='store_true', help='Print as a report instead of JSON')
+
+    insights_parser = subparsers.add_parser('insights', help='Get Gemini insights')
+    insights_parser.add_argument('--course', '-c', type=str, default=None, help='Course number')
+    insights_parser.add_argument('--student', '-s', type=str, default=None, help='Student ID')
+    insights_parser.add_argument('--teacher', '-t', type=str, default=None, help='Teacher name')
+    insights_parser.add_argument('--api-key', '-k', type=str, default=os.environ.get('GEMINI_API_KEY'),
+                                 help='Gemini API key for this query (defaults to the GEMINI_API_KEY env '
+                                      'variable; the daemon\'s own key is used when neither is set)')
+
+    student_parser = subparsers.add_parser('student', help='Get a student\'s course history')
+    student_parser.add_argument('--student', '-s', type=str, required=True, help='Student ID')
+
+    subparsers.add_parser('health', help='Check that the daemon is up')
+    subparsers.add_parser('reload', help='Reload and reanalyze the data')
+
+    return parser.parse_args()
+
+
+def main():
+    """Run the daemon or a client command."""
+    args = parse_arguments()
+
+    if args.command == 'serve':
+        data_source = args.data[0] if len(args.data) == 1 else args.data
+        from gemini_client import key_pool_from_env
+        serve(data_source, args.host, args.port, key_pool_from_env(args.api_key))
+        return
+
+    params = {key: value for key, value in vars(args).items()
+              if key in ('course', 'student', 'teacher')}
+    try:
+        result = query(args.command, params, args.host, args.port, api_key=getattr(args, 'api_key', None))
+    except urllib.error.URLError as e:
+        print(f"Error: Could not reach analysis daemon at {args.host}:{args.port} ({e.reason})")
+        sys.exit(1)
+
+    if getattr(args, 'text', False) and 'error' not in result:
+        from utils.display import display_results
+        display_results(result, {'error': 'not requested (use the insights command)'})
+    else:
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -4,83 +4,127 @@ Analysis Engine Module
 Performs analysis on course data to determine complexity metrics.
 """
 
-import pandas as pd
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 
+from course_partitions import build_course_partitions
+from data_processor import stratified_sample
+
 
-def analyze_course_complexity(df, course_id=None):
+def analyze_course_complexity(df, course_id=None, partitions=None, bootstrap_resamples=0, bootstrap_seed=None,
+                              sample_size=None, sample_seed=None, stratum_sizes=None, trend_window=0):
     """
     Analyze course complexity based on completion time data.
     
+    Statistics are computed on slice views of a course-partitioned layout
+    (see course_partitions), built here unless one is passed in.
+    
+    In approximate mode (sample_size, or a pre-sampled df with its
+    stratum_sizes) metrics are estimated from a stratified sample of at most
+    sample_size rows per (course, teacher): means, medians and scores are
+    weighted back to the full strata, student counts are population counts,
+    and '_se' standard errors are added for mean times, difficulty scores and
+    efficiency scores (zero for strata that were kept whole).
+    
     Args:
         df (pd.DataFrame): Preprocessed course data
         course_id (str, optional): Specific course to analyze
+        partitions (CoursePartitions, optional): Prebuilt partitions of df
+            (ignored when sample_size is set)
+        bootstrap_resamples (int): If set, add bootstrap confidence intervals
+            with this many resamples (see add_bootstrap_intervals)
+        bootstrap_seed (int, optional): Random seed for the bootstrap
+        sample_size (int, optional): Sample at most this many rows per (course, teacher)
+        sample_seed (int, optional): Random seed for the sample
+        stratum_sizes (dict, optional): (course, teacher) -> population rows when
+            df already is a sample from data_processor.stratified_sample
+        trend_window (int): If set and df has a term or completion_date column, add
+            per-term and rolling-window metrics over this many terms, with trend
+            slopes (see trend_analysis.add_trend_metrics)
         
     Returns:
         dict: Dictionary of complexity metrics by course
     """
-    # Filter for specific course if provided
+    if sample_size:
+        df, stratum_sizes = stratified_sample(df, sample_size, seed=sample_seed)
+        partitions = None
+    
+    if partitions is None:
+        partitions = build_course_partitions(df)
+    
+    # Restrict to a specific course if provided
     if course_id:
-        df = df[df['course_number'] == course_id].copy()
-        if df.empty:
+        if course_id not in partitions:
             print(f"Warning: No data found for course {course_id}")
             return {}
-    
-    # Get all courses to analyze
-    courses = df['course_number'].unique()
+        courses = [course_id]
+    else:
+        courses = partitions.courses
     
     # Dictionary to store results for each course
     complexity_metrics = {}
     
     for course in courses:
-        course_df = df[df['course_number'] == course]
+        course_times = partitions.course_times(course)
+        course_total = partitions.course_total_time(course)
         
-        # Get unit time columns
-        unit_cols = [col for col in course_df.columns if col.startswith('unit') and col.endswith('_time')]
+        # Units that have at least one measurement in this course
+        unit_positions = np.flatnonzero(~np.isnan(course_times).all(axis=0))
+        unit_cols = [partitions.unit_columns[j] for j in unit_positions]
         
         # Course-level metrics
         course_metrics = {
-            'num_students': len(course_df),
+            'num_students': len(course_total),
             'num_units': len(unit_cols),
-            'avg_total_completion_time': course_df['total_time'].mean(),
-            'median_total_completion_time': course_df['total_time'].median(),
-            'std_total_completion_time': course_df['total_time'].std(),
-            'min_total_completion_time': course_df['total_time'].min(),
-            'max_total_completion_time': course_df['total_time'].max(),
+            'avg_total_completion_time': course_total.mean(),
+            'median_total_completion_time': np.median(course_total),
+            'std_total_completion_time': course_total.std(ddof=1) if len(course_total) > 1 else np.nan,
+            'min_total_completion_time': course_total.min(),
+            'max_total_completion_time': course_total.max(),
         }
         
         # Unit-level metrics
         unit_metrics = {}
-        for unit in unit_cols:
+        for j, unit in zip(unit_positions, unit_cols):
             unit_name = unit.replace('_time', '')
-            unit_data = course_df[unit].dropna()
+            unit_data = course_times[:, j]
+            unit_data = unit_data[~np.isnan(unit_data)].astype(np.float64)
             
             unit_metrics[unit_name] = {
                 'mean_time': unit_data.mean(),
-                'median_time': unit_data.median(),
+                'median_time': np.median(unit_data),
                 'min_time': unit_data.min(),
                 'max_time': unit_data.max(),
-                'std_time': unit_data.std(),
+                'std_time': unit_data.std(ddof=1) if len(unit_data) > 1 else np.nan,
                 # Estimate of difficulty based on time and consistency
                 'difficulty_score': calculate_difficulty_score(unit_data)
             }
         
         # Teacher-level metrics
         teacher_metrics = {}
-        for teacher in course_df['teacher_name'].unique():
-            teacher_df = course_df[course_df['teacher_name'] == teacher]
+        for teacher in partitions.teachers(course):
+            teacher_times = partitions.teacher_times(course, teacher)[:, unit_positions].astype(np.float64)
+            teacher_total = partitions.teacher_total_time(course, teacher)
+            
+            # A teacher may have no measurements for a unit; that mean is NaN
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', category=RuntimeWarning)
+                unit_means = np.nanmean(teacher_times, axis=0)
             
             teacher_metrics[teacher] = {
-                'num_students': len(teacher_df),
-                'avg_total_time': teacher_df['total_time'].mean(),
-                'avg_time_per_unit': {
-                    unit: teacher_df[unit].mean() 
-                    for unit in unit_cols
-                },
+                'num_students': len(teacher_total),
+                'avg_total_time': teacher_total.mean(),
+                'avg_time_per_unit': dict(zip(unit_cols, unit_means)),
                 # Calculate efficiency score (lower is better)
-                'efficiency_score': teacher_df['total_time'].mean() / course_metrics['avg_total_completion_time']
+                'efficiency_score': teacher_total.mean() / course_metrics['avg_total_completion_time']
             }
         
+        if stratum_sizes is not None:
+            apply_sample_weights(course_metrics, unit_metrics, teacher_metrics, partitions, course,
+                                 unit_positions, stratum_sizes)
+        
         # Store all metrics for this course
         complexity_metrics[course] = {
             'course_metrics': course_metrics,
@@ -90,6 +134,14 @@ def analyze_course_complexity(df, course_id=None):
             'overall_complexity': calculate_overall_complexity(course_metrics, unit_metrics)
         }
     
+    if bootstrap_resamples:
+        add_bootstrap_intervals(complexity_metrics, partitions, bootstrap_resamples, seed=bootstrap_seed)
+    
+    if trend_window:
+        # Imported here: trend_analysis builds on this module's scoring functions
+        from trend_analysis import add_trend_metrics
+        add_trend_metrics(complexity_metrics, df, trend_window)
+    
     return complexity_metrics
 
 
@@ -99,7 +151,7 @@ def calculate_difficulty_score(time_series):
     Higher score means more difficult.
     
     Args:
-        time_series (pd.Series): Series of unit completion times
+        time_series (pd.Series or np.ndarray): Unit completion times (no NaN)
         
     Returns:
         float: Difficulty score from 0-100
@@ -111,9 +163,12 @@ def calculate_difficulty_score(time_series):
     # 1. Average time (higher = more difficult)
     # 2. Variance (higher = more inconsistent, can indicate difficulty)
     
-    mean_time = time_series.mean()
-    std_dev = time_series.std()
-    
+    times = np.asarray(time_series, dtype=np.float64)
+    return difficulty_from_stats(times.mean(), times.std(ddof=1))
+
+
+def difficulty_from_stats(mean_time, std_dev):
+    """Difficulty score (0-100) from a unit's mean and standard deviation of times."""
     # Coefficient of variation (normalized standard deviation)
     cv = std_dev / mean_time if mean_time > 0 else 0
     
@@ -166,7 +221,250 @@ def calculate_overall_complexity(course_metrics, unit_metrics):
     return {
         'complexity_score': round(complexity_score, 1),
         'category': category,
-        'most_difficult_unit': max(unit_metrics.items(), key=lambda x: x[1]['difficulty_score'])[0],
-        'easiest_unit': min(unit_metrics.items(), key=lambda x: x[1]['difficulty_score'])[0],
+        # Courses without any unit measurements have no hardest/easiest unit
+        'most_difficult_unit': max(unit_metrics.items(), key=lambda x: x[1]['difficulty_score'], default=(None,))[0],
+        'easiest_unit': min(unit_metrics.items(), key=lambda x: x[1]['difficulty_score'], default=(None,))[0],
         'units_factor': units_factor
     }
+
+
+def _stratified_se(z, sections):
+    """
+    Standard error of a linearized estimator under stratified sampling.
+    
+    Args:
+        z (np.ndarray): Per-row linearized values (influence on the estimate)
+        sections (list): (start, stop, population) per stratum, as row ranges of z
+        
+    Returns:
+        float: sqrt(sum_h N_h^2 (1 - n_h/N_h) var(z_h) / n_h); strata kept whole add nothing
+    """
+    variance = 0.0
+    for start, stop, population in sections:
+        n = stop - start
+        if 1 < n < population:
+            variance += population ** 2 * (1 - n / population) * z[start:stop].var(ddof=1) / n
+    return float(np.sqrt(variance))
+
+
+def _weighted_median(values, weights):
+    """Median of the values (NaN skipped) under sampling weights."""
+    present = ~np.isnan(values)
+    order = np.argsort(values[present], kind='stable')
+    cumulative = np.cumsum(weights[present][order])
+    return values[present][order][np.searchsorted(cumulative, cumulative[-1] / 2)]
+
+
+def _weighted_estimates(values, weights, sections):
+    """
+    Weighted mean, its standard error, the weighted standard deviation and
+    the difficulty score with its standard error (delta method on the first
+    two weighted moments), for one column of sampled times.
+    
+    Returns:
+        tuple: (mean, mean_se, std, difficulty_score, difficulty_score_se)
+    """
+    present = ~np.isnan(values)
+    y = np.where(present, values, 0.0)
+    w = np.where(present, weights, 0.0)
+    total_weight = w.sum()
+    mean = (w * y).sum() / total_weight
+    second = (w * y * y).sum() / total_weight
+    n_present = int(present.sum())
+    std = np.sqrt(max(0.0, second - mean ** 2) * total_weight / (total_weight - 1)) if n_present > 1 else np.nan
+    mean_se = _stratified_se(np.where(present, y - mean, 0.0) / total_weight, sections)
+    
+    if n_present < 2:
+        return mean, mean_se, std, 50.0, 0.0
+    
+    # Gradient of the score with respect to the first and second moments (capped terms are flat)
+    grad_mean = 0.7 * 100 / 240 if mean < 240 else 0.0
+    grad_second = 0.0
+    if mean > 0 and std > 0 and std / mean < 1:
+        grad_mean += 30 * (-1 / std - std / mean ** 2)
+        grad_second = 30 / (2 * std * mean)
+    z = np.where(present, grad_mean * (y - mean) + grad_second * (y * y - second), 0.0) / total_weight
+    return mean, mean_se, std, difficulty_from_stats(mean, std), round(_stratified_se(z, sections), 2)
+
+
+def apply_sample_weights(course_metrics, unit_metrics, teacher_metrics, partitions, course, unit_positions,
+                         stratum_sizes):
+    """
+    Turn one course's sample statistics into population estimates, in place.
+    
+    Each (course, teacher) section of the sample is a stratum weighted by
+    population / sampled rows. Means, medians and standard deviations are
+    re-estimated with those weights, and standard errors are added for the
+    mean times, difficulty scores and efficiency scores. Minimum and maximum
+    times stay those of the sample.
+    
+    Args:
+        course_metrics (dict): Course-level metrics computed on the sample
+        unit_metrics (dict): Unit-level metrics computed on the sample
+        teacher_metrics (dict): Teacher-level metrics computed on the sample
+        partitions (CoursePartitions): Partitions of the sample
+        course (str): Course number
+        unit_positions (np.ndarray): Array columns of the course's units
+        stratum_sizes (dict): (course, teacher) -> population row count
+    """
+    course_start = partitions.course_offsets[course][0]
+    sections = []
+    for teacher, (start, stop) in partitions.teacher_offsets[course].items():
+        sections.append((start - course_start, stop - course_start,
+                         stratum_sizes.get((course, teacher), stop - start)))
+    weights = np.concatenate([np.full(stop - start, population / (stop - start))
+                              for start, stop, population in sections])
+    population = sum(population for _, _, population in sections)
+    
+    course_total = partitions.course_total_time(course).astype(np.float64)
+    mean, mean_se, std, _, _ = _weighted_estimates(course_total, weights, sections)
+    course_metrics.update({
+        'num_students': population,
+        'sampled_students': len(course_total),
+        'avg_total_completion_time': mean,
+        'avg_total_completion_time_se': mean_se,
+        'median_total_completion_time': _weighted_median(course_total, weights),
+        'std_total_completion_time': std,
+    })
+    
+    course_times = partitions.course_times(course)
+    for j, unit_data in zip(unit_positions, unit_metrics.values()):
+        values = course_times[:, j].astype(np.float64)
+        mean, mean_se, std, difficulty, difficulty_se = _weighted_estimates(values, weights, sections)
+        unit_data.update({
+            'mean_time': mean,
+            'mean_time_se': mean_se,
+            'median_time': _weighted_median(values, weights),
+            'std_time': std,
+            'difficulty_score': difficulty,
+            'difficulty_score_se': difficulty_se
+        })
+    
+    # Efficiency is a ratio of the teacher's stratum mean to the course mean;
+    # its influence values combine both (linearized in population totals)
+    course_mean = course_metrics['avg_total_completion_time']
+    course_z = (course_total - course_mean) / population
+    for (teacher, teacher_data), (start, stop, stratum_population) in zip(teacher_metrics.items(), sections):
+        teacher_mean = teacher_data['avg_total_time']
+        efficiency = teacher_mean / course_mean
+        teacher_z = np.zeros_like(course_total)
+        teacher_z[start:stop] = (course_total[start:stop] - teacher_mean) / stratum_population
+        teacher_data.update({
+            'num_students': stratum_population,
+            'sampled_students': stop - start,
+            'avg_total_time_se': _stratified_se(teacher_z, [(start, stop, stratum_population)]),
+            'efficiency_score': efficiency,
+            'efficiency_score_se': _stratified_se((teacher_z - efficiency * course_z) / course_mean, sections)
+        })
+
+
+def _bootstrap_difficulty_scores(unit_times, sample_idx):
+    """
+    Compute difficulty scores for a batch of bootstrap resamples at once.
+    
+    Args:
+        unit_times (np.ndarray): (students, units) times, NaN where missing
+        sample_idx (np.ndarray): (resamples, students) row indices
+        
+    Returns:
+        np.ndarray: (resamples, units) difficulty scores, same formula as
+            calculate_difficulty_score
+    """
+    samples = unit_times[sample_idx]  # (resamples, students, units)
+    present = ~np.isnan(samples)
+    counts = present.sum(axis=1)
+    filled = np.where(present, samples, 0.0)
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_time = filled.sum(axis=1) / counts
+        squared_dev = np.where(present, samples - mean_time[:, None, :], 0.0) ** 2
+        std_dev = np.sqrt(squared_dev.sum(axis=1) / (counts - 1))
+        cv = np.where(mean_time > 0, std_dev / mean_time, 0.0)
+    
+    normalized_time = np.minimum(100, (mean_time / 240) * 100)
+    scores = (0.7 * normalized_time) + (0.3 * np.minimum(100, cv * 100))
+    # Default middle value if not enough data, as in calculate_difficulty_score
+    return np.where(counts < 2, 50.0, scores)
+
+
+def bootstrap_course_intervals(unit_times, units_factor, n_resamples=1000, confidence=0.95,
+                               rng=None, max_elements=4_000_000):
+    """
+    Bootstrap confidence intervals for one course's unit difficulty and complexity scores.
+    
+    Students are resampled with replacement (keeping each student's unit
+    times together); all resamples are evaluated as one array axis, in
+    blocks sized to keep memory bounded.
+    
+    Args:
+        unit_times (np.ndarray): (students, units) times for the course's units
+        units_factor (float): The course's units factor from calculate_overall_complexity
+        n_resamples (int): Number of bootstrap resamples
+        confidence (float): Confidence level of the intervals
+        rng (np.random.Generator, optional): Random generator
+        max_elements (int): Upper bound on elements materialized per block
+        
+    Returns:
+        tuple: ((units, 2) array of difficulty intervals, (low, high) complexity interval)
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    unit_times = np.asarray(unit_times, dtype=np.float64)
+    n_students, n_units = unit_times.shape
+    block = max(1, max_elements // max(1, n_students * n_units))
+    
+    difficulty = np.empty((n_resamples, n_units))
+    for start in range(0, n_resamples, block):
+        stop = min(n_resamples, start + block)
+        sample_idx = rng.integers(0, n_students, size=(stop - start, n_students))
+        difficulty[start:stop] = _bootstrap_difficulty_scores(unit_times, sample_idx)
+    
+    complexity = difficulty.mean(axis=1) * units_factor
+    tail = (1 - confidence) / 2 * 100
+    unit_intervals = np.percentile(difficulty, [tail, 100 - tail], axis=0).T
+    complexity_interval = np.percentile(complexity, [tail, 100 - tail])
+    return unit_intervals, complexity_interval
+
+
+def add_bootstrap_intervals(complexity_metrics, partitions, n_resamples=1000, confidence=0.95,
+                            seed=None, max_workers=None):
+    """
+    Add bootstrap confidence intervals to complexity metrics in place.
+    
+    Each unit gets a 'difficulty_ci' and each course's overall complexity a
+    'complexity_ci' (low, high) pair. Courses run in parallel on a thread
+    pool; each course draws from its own generator spawned from the seed,
+    so results are reproducible regardless of scheduling.
+    
+    Args:
+        complexity_metrics (dict): Output of analyze_course_complexity
+        partitions (CoursePartitions): Partitions the metrics were computed from
+        n_resamples (int): Number of bootstrap resamples per course
+        confidence (float): Confidence level of the intervals
+        seed (int, optional): Random seed
+        max_workers (int, optional): Number of worker threads
+        
+    Returns:
+        dict: The updated complexity metrics
+    """
+    courses = list(complexity_metrics.keys())
+    generators = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(len(courses))]
+    
+    def run_course(course, rng):
+        metrics = complexity_metrics[course]
+        unit_positions = [partitions.unit_columns.index(f"{unit}_time") for unit in metrics['unit_metrics']]
+        unit_times = partitions.course_times(course)[:, unit_positions]
+        return bootstrap_course_intervals(
+            unit_times, metrics['overall_complexity']['units_factor'], n_resamples, confidence, rng)
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(run_course, courses, generators))
+    
+    for course, (unit_intervals, complexity_interval) in zip(courses, results):
+        metrics = complexity_metrics[course]
+        for unit, (low, high) in zip(metrics['unit_metrics'], unit_intervals):
+            metrics['unit_metrics'][unit]['difficulty_ci'] = (round(low, 1), round(high, 1))
+        metrics['overall_complexity']['complexity_ci'] = (
+            round(complexity_interval[0], 1), round(complexity_interval[1], 1))
+        metrics['overall_complexity']['ci_confidence'] = confidence
+    
+    return complexity_metrics
@@ -1,36 +1,122 @@
 from flask import Flask, render_template, request, jsonify
 import os
-import pandas as pd
-import json
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
 from data_processor import load_course_data, preprocess_data
+from data_validator import validate_course_data, print_validation_report, DEFAULT_QUARANTINE_FILE
 from analysis_engine import analyze_course_complexity
-from llm_connector import get_gemini_insights
+from course_partitions import build_course_partitions
+from llm_connector import get_gemini_insights, prepare_prompt_data
+from completion_forecast import CompletionForecaster
+from similarity_index import SimilarityIndex
+from metrics_exporter import dumps_metrics
+from job_queue import JobQueue
+from gemini_client import key_pool_from_env
+from course_shards import parse_shard
+from utils.http_caching import conditional_response, compress_response
+import sqlite_store
+import confidence_model
 
 app = Flask(__name__)
+app.after_request(compress_response)
 
 # Global variables to store data
-DATA_FILE = 'course_complexity_data.csv'
+DATA_FILE = os.environ.get('COURSE_DATA_FILE', 'course_complexity_data.csv')
+# Sharded serving: COURSE_SHARD=INDEX/COUNT loads only the courses owned by that shard
+# (see course_shards and shard_router)
+SHARD = parse_shard(os.environ.get('COURSE_SHARD'))
+PORT = int(os.environ.get('PORT', 5000))
+# 'pandas' keeps everything in memory, 'sqlite' serves scoped queries from DB_FILE
+DATA_BACKEND = os.environ.get('COURSE_DATA_BACKEND', 'pandas')
+DB_FILE = os.environ.get('COURSE_DB_FILE') or (
+    f"course_complexity_data.shard{SHARD[0]}of{SHARD[1]}.sqlite" if SHARD else 'course_complexity_data.sqlite')
+# Local confidence model artifact and the file LLM scores are recorded to for refitting
+CONFIDENCE_MODEL_FILE = os.environ.get('CONFIDENCE_MODEL_FILE', confidence_model.DEFAULT_MODEL_FILE)
+LLM_SCORES_FILE = os.environ.get('LLM_SCORES_FILE', confidence_model.DEFAULT_SCORES_FILE)
+# Rows failing data validation are written here instead of being analyzed
+QUARANTINE_FILE = os.environ.get('QUARANTINE_FILE', DEFAULT_QUARANTINE_FILE)
+# Background LLM insight jobs; set INSIGHT_JOBS_DB to persist queued jobs across restarts
+INSIGHT_WORKERS = int(os.environ.get('INSIGHT_WORKERS', 4))
+JOBS_DB_FILE = os.environ.get('INSIGHT_JOBS_DB') or None
+# Seconds /get_confidence waits for the LLM before answering with the fallback
+CONFIDENCE_DEADLINE = float(os.environ.get('CONFIDENCE_DEADLINE', 2.0))
+LLM_CACHE_SIZE = 1024
+insight_jobs = None
+# GEMINI_API_KEY (or GEMINI_API_KEYS) may hold several comma-separated keys, used as a quota-aware pool
+gemini_keys = None
+# Finished LLM insights per (course, teacher, student_id), served to later requests;
+# written by job queue workers and read by request threads, so guarded by llm_insights_lock
+llm_insights = OrderedDict()
+llm_insights_lock = threading.Lock()
 processed_data = None
 complexity_metrics = None
+partitions = None
+forecaster = None
+local_model = None
+model_score_cache = {}
+similarity_index = SimilarityIndex()
+# Identifies the loaded dataset; used for ETags and to scope cached responses
+data_version = None
+data_last_modified = None
+# Course catalog payload (courses and teachers) for the current data version
+catalog_cache = {}
+# (etag, payload) of final /get_confidence responses per (data_version, course, teacher, student_id);
+# shared by request threads, so guarded by confidence_responses_lock
+confidence_responses = OrderedDict()
+confidence_responses_lock = threading.Lock()
+# Serialized metrics per indexed course, used to find changed courses on reload
+similarity_versions = {}
 
 def load_data():
     """Load and process the course data"""
-    global processed_data, complexity_metrics
+    global processed_data, complexity_metrics, partitions, forecaster, local_model
     
     print("\n===== LOADING COURSE DATA =====")
     
+    local_model = confidence_model.load_confidence_model(CONFIDENCE_MODEL_FILE)
+    model_score_cache.clear()
+    with llm_insights_lock:
+        llm_insights.clear()
+    with confidence_responses_lock:
+        confidence_responses.clear()
+    catalog_cache.clear()
+    if local_model is not None:
+        print(f"Loaded local confidence model from {CONFIDENCE_MODEL_FILE}")
+    
     if not os.path.exists(DATA_FILE):
         print(f"Data file {DATA_FILE} not found, generating sample data...")
         from generate_sample_csv import save_course_data
         save_course_data(DATA_FILE)
     
-    print(f"Loading data from {DATA_FILE}...")
-    raw_data = load_course_data(DATA_FILE)
+    update_data_version()
+    
+    if DATA_BACKEND == 'sqlite' and sqlite_store.is_store_fresh(DB_FILE, [DATA_FILE]):
+        print(f"Using existing SQLite store {DB_FILE}")
+        conn = sqlite_store.connect_store(DB_FILE)
+        try:
+            refresh_similarity_index(sqlite_store.get_complexity_metrics(conn))
+        finally:
+            conn.close()
+        return
+    
+    if SHARD:
+        print(f"Loading data from {DATA_FILE} (shard {SHARD[0]} of {SHARD[1]})...")
+    else:
+        print(f"Loading data from {DATA_FILE}...")
+    raw_data = load_course_data(DATA_FILE, shard=SHARD)
     
     if raw_data.empty:
         print("ERROR: Failed to load data - empty DataFrame returned")
         return
     
+    raw_data, validation_report = validate_course_data(raw_data, quarantine_path=QUARANTINE_FILE)
+    print_validation_report(validation_report)
+    if raw_data.empty:
+        print("ERROR: No valid rows left after validation")
+        return
+    
     print(f"Data loaded successfully. Shape: {raw_data.shape}")
     print(f"Columns: {raw_data.columns.tolist()}")
     print(f"Course numbers: {raw_data['course_number'].unique().tolist()}")
@@ -40,42 +126,339 @@ def load_data():
     processed_data = preprocess_data(raw_data)
     
     print("Analyzing course complexity...")
-    complexity_metrics = analyze_course_complexity(processed_data)
+    partitions = build_course_partitions(processed_data)
+    complexity_metrics = analyze_course_complexity(processed_data, partitions=partitions)
+    forecaster = CompletionForecaster(partitions)
     
     print(f"Completed analysis for {len(complexity_metrics)} courses")
     for course, metrics in complexity_metrics.items():
         complexity = metrics['overall_complexity']['complexity_score']
         category = metrics['overall_complexity']['category']
         print(f"  - {course}: Complexity {complexity:.1f} ({category})")
+    
+    refresh_similarity_index(complexity_metrics)
+    
+    if DATA_BACKEND == 'sqlite':
+        print(f"Writing SQLite store {DB_FILE}...")
+        sqlite_store.build_store(processed_data, complexity_metrics, DB_FILE, source=DATA_FILE)
+        # Requests query the store, so the in-memory copies are no longer needed
+        processed_data = None
+        complexity_metrics = None
+        partitions = None
+        forecaster = None
         
     print("Data loading and analysis complete\n")
 
-@app.route('/')
-def index():
-    """Render the main page"""
+def update_data_version():
+    """Derive the data version (for ETags and response caching) from the data and model files."""
+    global data_version, data_last_modified
+    stats = [os.stat(path) for path in (DATA_FILE, CONFIDENCE_MODEL_FILE) if os.path.exists(path)]
+    fingerprint = ':'.join(f"{st.st_mtime_ns}-{st.st_size}" for st in stats)
+    data_version = hashlib.sha256(f"{DATA_FILE}:{SHARD}:{fingerprint}".encode('utf-8')).hexdigest()[:16]
+    data_last_modified = datetime.fromtimestamp(max(st.st_mtime for st in stats), tz=timezone.utc).replace(microsecond=0)
+
+def versioned_response(payload, etag=None):
+    """Wrap a payload in a response validated against the data version (304 when current)."""
+    return conditional_response(payload, etag or data_version, data_last_modified)
+
+def get_catalog():
+    """Return courses and teachers by course, built once per data version."""
+    if data_version in catalog_cache:
+        return catalog_cache[data_version]
+    
     courses = []
     teachers_by_course = {}
     
-    if processed_data is not None:
-        # Get unique courses
-        courses = processed_data['course_number'].unique().tolist()
+    if DATA_BACKEND == 'sqlite':
+        conn = sqlite_store.connect_store(DB_FILE)
+        try:
+            teachers_by_course = sqlite_store.get_teachers_by_course(conn)
+        finally:
+            conn.close()
+        courses = list(teachers_by_course.keys())
+    elif processed_data is not None:
+        # Unique teachers per course in order of appearance
+        pairs = processed_data[['course_number', 'teacher_name']].drop_duplicates()
+        for course, teacher in zip(pairs['course_number'], pairs['teacher_name']):
+            teachers_by_course.setdefault(course, []).append(teacher)
+        courses = list(teachers_by_course.keys())
+    
+    catalog_cache.clear()
+    catalog_cache[data_version] = {
+        'version': data_version,
+        'courses': courses,
+        'teachers_by_course': teachers_by_course
+    }
+    return catalog_cache[data_version]
+
+def refresh_similarity_index(new_metrics):
+    """
+    Bring the similarity index up to date with freshly computed metrics.
+    
+    Only courses whose metrics changed since the last refresh are
+    re-indexed; courses that disappeared are removed.
+    """
+    versions = {course: dumps_metrics(metrics) for course, metrics in new_metrics.items()}
+    changed = {course: new_metrics[course] for course, version in versions.items()
+               if similarity_versions.get(course) != version}
+    removed = set(similarity_versions) - set(versions)
+    
+    if removed:
+        similarity_index.remove(removed)
+    if changed:
+        similarity_index.update(changed)
+    
+    similarity_versions.clear()
+    similarity_versions.update(versions)
+    print(f"Similarity index: {len(changed)} courses updated, {len(removed)} removed")
+
+def get_scoped_data(course_id, student_id=None):
+    """
+    Get the processed rows and complexity metrics needed for one request.
+    
+    With the SQLite backend only the selected course's metrics and the
+    student's course history are loaded; otherwise the in-memory data is used.
+    
+    Args:
+        course_id (str): Selected course
+        student_id (str, optional): Student ID
         
-        # Get teachers by course
-        for course in courses:
-            course_data = processed_data[processed_data['course_number'] == course]
-            teachers = course_data['teacher_name'].unique().tolist()
-            teachers_by_course[course] = teachers
+    Returns:
+        tuple: (processed rows DataFrame, complexity metrics dict)
+    """
+    if DATA_BACKEND != 'sqlite':
+        return processed_data, complexity_metrics
     
-    return render_template('index.html', 
-                         courses=courses, 
-                         teachers_by_course=json.dumps(teachers_by_course))
+    conn = sqlite_store.connect_store(DB_FILE)
+    try:
+        metrics = sqlite_store.get_complexity_metrics(conn, course_id)
+        rows = sqlite_store.get_student_context(conn, student_id) if student_id else sqlite_store.query_rows(conn, course_id)
+    finally:
+        conn.close()
+    return rows, metrics
 
-@app.route('/get_confidence', methods=['POST'])
-def get_confidence():
-    """Calculate confidence score based on selection"""
-    student_name = request.form.get('student_name')
+@app.route('/')
+def index():
+    """Render the main page (teachers are loaded from /api/courses)"""
+    if request.if_none_match.contains_weak(data_version):
+        return versioned_response('')
+    return versioned_response(render_template('index.html', courses=get_catalog()['courses']))
+
+@app.route('/api/courses')
+def courses_catalog():
+    """Courses and teachers by course, cacheable until the data version changes"""
+    if request.if_none_match.contains_weak(data_version):
+        return versioned_response('')
+    return versioned_response(jsonify(get_catalog()))
+
+def get_model_confidence(course_id, teacher_name, metrics):
+    """
+    Score a course section with the local confidence model.
+    
+    Predictions are deterministic, so they are cached per (course, teacher)
+    until the data is reloaded.
+    
+    Returns:
+        float: Confidence score, or None if no model is loaded or the course is unknown
+    """
+    if local_model is None or course_id not in metrics:
+        return None
+    key = (course_id, teacher_name)
+    if key not in model_score_cache:
+        model_score_cache[key] = confidence_model.predict_confidence(local_model, metrics[course_id], teacher_name)
+    return model_score_cache[key]
+
+@app.route('/confidence_score', methods=['POST'])
+def confidence_score():
+    """Return the local model's confidence score instantly, without calling the LLM"""
+    course_id = request.form.get('course')
+    teacher_name = request.form.get('teacher')
+    
+    if not course_id:
+        return jsonify({
+            'success': False,
+            'message': 'Please select a course'
+        })
+    
+    _, metrics = get_scoped_data(course_id)
+    score = get_model_confidence(course_id, teacher_name, metrics)
+    if score is None:
+        return jsonify({
+            'success': False,
+            'message': 'No local confidence model loaded or unknown course'
+        })
+    
+    return jsonify({
+        'success': True,
+        'course': course_id,
+        'teacher': teacher_name,
+        'confidence_score': score,
+        'source': 'local_model'
+    })
+
+def get_completion_forecast(course_id, teacher_name, student_id=None, data=None, metrics=None):
+    """
+    Forecast completion time, conditioned on the student's history when known.
+    
+    Returns:
+        dict: Forecast from CompletionForecaster, or None when unavailable (e.g. SQLite backend)
+    """
+    if forecaster is None:
+        return None
+    student_info = None
+    if student_id and data is not None:
+        student_info = prepare_prompt_data(data, {}, student_id, partitions=partitions)['student_info']
+    return forecaster.forecast(course_id, teacher_name, student_info)
+
+@app.route('/forecast', methods=['POST'])
+def forecast():
+    """Return P10/P50/P90 completion-time forecasts for a course and teacher"""
     course_id = request.form.get('course')
     teacher_name = request.form.get('teacher')
+    student_id = request.form.get('student_id')
+    
+    result = get_completion_forecast(course_id, teacher_name, student_id, processed_data)
+    if result is None:
+        return jsonify({
+            'success': False,
+            'message': 'Forecast unavailable for this course'
+        })
+    
+    return jsonify({
+        'success': True,
+        'forecast': result
+    })
+
+@app.route('/similar')
+def similar():
+    """Return courses similar to a course, and sections similar to a teacher's section"""
+    course_id = request.args.get('course')
+    teacher_name = request.args.get('teacher')
+    k = request.args.get('k', default=5, type=int)
+    
+    if not course_id:
+        return jsonify({
+            'success': False,
+            'message': 'Please select a course'
+        })
+    
+    result = {
+        'success': True,
+        'course': course_id,
+        'similar_courses': [
+            {'course': course, 'similarity': score}
+            for course, score in similarity_index.similar_courses(course_id, k)
+        ]
+    }
+    if teacher_name:
+        result['teacher'] = teacher_name
+        result['similar_sections'] = [
+            {'course': course, 'teacher': teacher, 'similarity': score}
+            for (course, teacher), score in similarity_index.similar_sections(course_id, teacher_name, k)
+        ]
+    return jsonify(result)
+
+def fetch_llm_insights(course_id, teacher_name, student_id):
+    """
+    Get Gemini insights for a selection (runs on a job queue worker).
+    
+    The API key (or key pool) comes from get_gemini_keys at run time so it
+    is never stored with queued jobs.
+    
+    Successful insights are stored in llm_insights so later requests for the
+    same selection are answered without another LLM call.
+    
+    Returns:
+        dict: Insights from get_gemini_insights
+    """
+    api_key = get_gemini_keys()
+    data, metrics = get_scoped_data(course_id, student_id)
+    insights = get_gemini_insights(
+        data, 
+        metrics, 
+        student_id=student_id, 
+        api_key=api_key,
+        selected_course=course_id,
+        selected_teacher=teacher_name,
+        partitions=partitions
+    )
+    if 'error' in insights:
+        raise RuntimeError(insights['error'])
+    
+    # Keep LLM scores so the local model can be refitted against them
+    if 'confidence_score' in insights:
+        confidence_model.record_llm_score(LLM_SCORES_FILE, course_id, teacher_name, insights['confidence_score'])
+    
+    with llm_insights_lock:
+        llm_insights[(course_id, teacher_name, student_id)] = insights
+        while len(llm_insights) > LLM_CACHE_SIZE:
+            llm_insights.popitem(last=False)
+    return insights
+
+def build_fallback_insights(course_id, teacher_name, student_id):
+    """
+    Build insights from complexity metrics alone, without the LLM.
+    
+    The result is deterministic, so repeated requests (and the answer given
+    before an LLM upgrade arrives) are consistent.
+    
+    Returns:
+        dict: Insights in the same shape as get_gemini_insights
+    """
+    data, metrics = get_scoped_data(course_id, student_id)
+    course_data = metrics.get(course_id, {})
+    overall_complexity = course_data.get('overall_complexity', {})
+    complexity_score = overall_complexity.get('complexity_score', 50)
+    category = overall_complexity.get('category', 'Moderate')
+    
+    # Prefer the local model; otherwise use the inverse of complexity
+    confidence_score = get_model_confidence(course_id, teacher_name, metrics)
+    if confidence_score is None:
+        confidence_score = confidence_model.heuristic_confidence(complexity_score)
+    
+    completion_forecast = get_completion_forecast(course_id, teacher_name, student_id, data)
+    if completion_forecast:
+        total = completion_forecast['total']
+        estimated_completion = (f"Estimated completion time: {total['p50']/60:.1f} hours "
+                                f"(likely range {total['p10']/60:.1f} - {total['p90']/60:.1f} hours)")
+    else:
+        estimated_completion = f"Estimated completion time: {course_data.get('course_metrics', {}).get('avg_total_completion_time', 0)/60:.1f} hours"
+    
+    return {
+        'confidence_score': round(confidence_score, 1),
+        'course_insights': {
+            course_id: {
+                'complexity': category,
+                'confidence': 'Moderate',
+                'recommendation': f"Based on the course complexity ({category}), we estimate a moderate confidence level. Focus on steady progress through each unit.",
+                'estimated_completion': estimated_completion
+            }
+        },
+        'completion_forecast': completion_forecast,
+        'most_difficult_unit': overall_complexity.get('most_difficult_unit', 'Unknown'),
+        'raw_response': 'Note: For more detailed insights, please configure a Gemini API key.'
+    }
+
+def get_gemini_keys():
+    """Return the configured API key or key pool (built once, so pool quotas persist)."""
+    global gemini_keys
+    if gemini_keys is None:
+        gemini_keys = key_pool_from_env()
+    return gemini_keys
+
+def get_insight_jobs():
+    """Return the insight job queue, starting its workers on first use."""
+    global insight_jobs
+    if insight_jobs is None:
+        insight_jobs = JobQueue(fetch_llm_insights, num_workers=INSIGHT_WORKERS, db_path=JOBS_DB_FILE)
+    return insight_jobs
+
+@app.route('/get_confidence', methods=['GET', 'POST'])
+def get_confidence():
+    """Calculate confidence score based on selection"""
+    student_name = request.values.get('student_name')
+    course_id = request.values.get('course')
+    teacher_name = request.values.get('teacher')
     
     # Basic validation
     if not student_name or not course_id or not teacher_name:
@@ -87,8 +470,16 @@ def get_confidence():
     # Generate a student ID for new students
     student_id = f"NEW_{student_name.replace(' ', '_').upper()}"
     
+    # Repeat views within a data version are served from the response cache
+    cache_key = (data_version, course_id, teacher_name, student_id)
+    with confidence_responses_lock:
+        cached = confidence_responses.get(cache_key)
+    if cached is not None:
+        etag, cached_response = cached
+        return versioned_response(jsonify(cached_response), etag=etag)
+    
     # Get API key from environment or use a placeholder
-    api_key = os.environ.get('GEMINI_API_KEY')
+    api_key = get_gemini_keys()
     
     if not api_key:
         print("\n" + "="*80)
@@ -96,55 +487,121 @@ def get_confidence():
         print("To set the API key, use: export GEMINI_API_KEY=your_api_key_here")
         print("="*80 + "\n")
     
+    response = {
+        'success': True,
+        'student_name': student_name,
+        'course': course_id,
+        'teacher': teacher_name
+    }
+    
+    insights = None
+    llm_failed = False
     if api_key:
-        # Get insights from Gemini
-        insights = get_gemini_insights(
-            processed_data, 
-            complexity_metrics, 
-            student_id=student_id, 
-            api_key=api_key,
-            selected_course=course_id,
-            selected_teacher=teacher_name
-        )
+        key = (course_id, teacher_name, student_id)
+        with llm_insights_lock:
+            insights = llm_insights.get(key)
+        if insights is None:
+            # Run the LLM call as a job and wait only up to the deadline (not at all for async=1);
+            # if it is still running the client can poll /jobs/<id> for the upgraded answer
+            jobs = get_insight_jobs()
+            job_id = jobs.submit(
+                {'course_id': course_id, 'teacher_name': teacher_name, 'student_id': student_id},
+                key=key
+            )
+            deadline = 0 if request.values.get('async') else CONFIDENCE_DEADLINE
+            job = jobs.wait(job_id, deadline)
+            if job['status'] == 'done':
+                insights = job['result']
+            elif job['status'] == 'failed':
+                llm_failed = True
+            else:
+                response.update({'job_id': job_id, 'status': job['status']})
+    
+    if insights is None:
+        # Answer from complexity metrics when there is no API key or the LLM missed the deadline
+        insights = build_fallback_insights(course_id, teacher_name, student_id)
+        response['source'] = 'fallback'
     else:
-        # Create a fallback response if no API key is available
-        course_data = complexity_metrics.get(course_id, {})
-        overall_complexity = course_data.get('overall_complexity', {})
-        complexity_score = overall_complexity.get('complexity_score', 50)
-        category = overall_complexity.get('category', 'Moderate')
-        
-        # Calculate confidence score (inverse of complexity - higher complexity = lower confidence)
-        # Add some minor randomization to avoid all courses having the same score
-        import random
-        base_confidence = max(0, min(100, 100 - complexity_score * 0.7))
-        # Vary by +/- 5% for more natural-looking scores
-        confidence_score = max(0, min(100, base_confidence + random.uniform(-5, 5)))
-        
-        insights = {
-            'confidence_score': round(confidence_score, 1),
-            'course_insights': {
-                course_id: {
-                    'complexity': category,
-                    'confidence': 'Moderate',
-                    'recommendation': f"Based on the course complexity ({category}), we estimate a moderate confidence level. Focus on steady progress through each unit.",
-                    'estimated_completion': f"Estimated completion time: {course_data.get('course_metrics', {}).get('avg_total_completion_time', 0)/60:.1f} hours"
-                }
-            },
-            'most_difficult_unit': overall_complexity.get('most_difficult_unit', 'Unknown'),
-            'raw_response': 'Note: For more detailed insights, please configure a Gemini API key.'
-        }
+        response['source'] = 'llm'
+    
+    response['insights'] = insights
+    if 'job_id' in response or llm_failed:
+        # An upgrade is pending, or the LLM call failed (429, timeout, bad response) and the
+        # next request should try again, so this answer must not be cached
+        return jsonify(response)
+    
+    # The ETag is only sent as a header, never as part of the JSON body
+    etag = hashlib.sha256(
+        f"{data_version}:{course_id}:{teacher_name}:{student_id}:{response['source']}".encode('utf-8')
+    ).hexdigest()[:16]
+    with confidence_responses_lock:
+        confidence_responses[cache_key] = (etag, response)
+        while len(confidence_responses) > LLM_CACHE_SIZE:
+            confidence_responses.popitem(last=False)
+    return versioned_response(jsonify(response), etag=etag)
+
+@app.route('/llm/usage')
+def llm_usage():
+    """Report per-key request/token usage and quota headroom of the key pool"""
+    api_key = get_gemini_keys()
+    if not hasattr(api_key, 'usage'):
+        return jsonify({'keys': 1 if api_key else 0, 'usage': None})
+    return jsonify({'keys': len(api_key), 'usage': api_key.usage()})
+
+@app.route('/shard')
+def shard_info():
+    """Report this instance's shard, loaded courses and memory use (used by the router and benchmarks)"""
+    try:
+        import resource
+        # ru_maxrss is in kilobytes on Linux
+        max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        max_rss_mb = None
+    # Resident memory now (Linux only); the peak also covers transient load-time buffers
+    rss_mb = None
+    if os.path.exists('/proc/self/statm'):
+        with open('/proc/self/statm') as f:
+            rss_mb = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
     
     return jsonify({
-        'success': True,
-        'student_name': student_name,
-        'course': course_id,
-        'teacher': teacher_name,
-        'insights': insights
+        'shard': SHARD[0] if SHARD else 0,
+        'num_shards': SHARD[1] if SHARD else 1,
+        'version': data_version,
+        'courses': len(get_catalog()['courses']),
+        'rows': len(processed_data) if processed_data is not None else None,
+        'rss_mb': rss_mb,
+        'max_rss_mb': max_rss_mb
     })
 
+@app.route('/jobs/stats')
+def job_stats():
+    """Report insight queue depth, job counts and latency percentiles"""
+    return jsonify(get_insight_jobs().stats())
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Poll an insight job; 'insights' is set once the job is done"""
+    job = get_insight_jobs().get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'message': 'Unknown job'
+        }), 404
+    
+    response = {
+        'success': job['status'] != 'failed',
+        'job_id': job_id,
+        'status': job['status']
+    }
+    if job['status'] == 'done':
+        response['insights'] = job['result']
+    elif job['status'] == 'failed':
+        response['message'] = job['error']
+    return jsonify(response)
+
 if __name__ == '__main__':
     # Load data on startup
     load_data()
     
-    # Run the app
-    app.run(debug=True)
+    # Run the app (shards run without the reloader, which would load the data twice)
+    app.run(debug=SHARD is None, port=PORT)
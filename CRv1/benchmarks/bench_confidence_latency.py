@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Confidence Latency Benchmark
+---------------------------
+Measures /get_confidence latency percentiles against the Gemini stand-in
+(gemini_standin.py) with lognormal latency and optional injected 429s and
+5xx errors, with and without the response deadline, and how many requests
+were answered by the fallback and later upgraded.
+
+Usage: python benchmarks/bench_confidence_latency.py [--requests N] [--delay S] [--deadline S]
+                                                     [--rate-429 P] [--rate-5xx P] [--replay FILE]
+"""
+
+import os
+import io
+import argparse
+import logging
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from common import CRV1_DIR, Timer
+
+os.chdir(CRV1_DIR)
+os.environ.setdefault('GEMINI_API_KEY', 'stub-key')
+
+import llm_connector
+import gemini_standin
+import app
+
+
+def run_requests(client_factory, selections, concurrency):
+    """POST every selection, returning per-request latencies (s) and sources."""
+    def post(selection):
+        client = client_factory()
+        with Timer() as timer:
+            response = client.post('/get_confidence', data=selection)
+        return timer.elapsed, response.get_json().get('source'), response.get_json().get('job_id')
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(post, selections))
+
+
+def report(label, results):
+    latencies = np.array([latency for latency, _, _ in results]) * 1000
+    fallback = sum(source == 'fallback' for _, source, _ in results)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"{label:<22} p50 {p50:>8.1f} ms  p95 {p95:>8.1f} ms  p99 {p99:>8.1f} ms  "
+          f"fallback {fallback}/{len(results)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='/get_confidence latency benchmark')
+    parser.add_argument('--requests', type=int, default=40, help='Requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients')
+    parser.add_argument('--delay', type=float, default=1.0, help='Median stand-in LLM delay (s)')
+    parser.add_argument('--deadline', type=float, default=0.5, help='Response deadline (s)')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='Fraction of LLM calls answered 429')
+    parser.add_argument('--rate-5xx', type=float, default=0.0, help='Fraction of LLM calls answered 500/503')
+    parser.add_argument('--replay', type=str, default=None, help='Recordings to replay (default: synthetic answers)')
+    args = parser.parse_args()
+    # Keep the stand-in's per-request log lines out of the report
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    if args.replay:
+        gemini_standin.load_recordings(args.replay)
+    server, llm_connector.GEMINI_BASE_URL = gemini_standin.start_server()
+    app.LLM_SCORES_FILE = os.devnull
+    app.INSIGHT_WORKERS = args.concurrency
+    app.load_data()
+
+    course = next(iter(app.complexity_metrics))
+    teacher = next(iter(app.complexity_metrics[course]['teacher_metrics']))
+    print(f"\nStand-in median delay {args.delay:.2f} s, 429 rate {args.rate_429:.0%}, 5xx rate {args.rate_5xx:.0%}, "
+          f"{args.requests} requests, concurrency {args.concurrency}")
+
+    for label, deadline in (('no deadline', None), (f"deadline {args.deadline:.2f} s", args.deadline)):
+        # Same latency and fault draws in every scenario
+        gemini_standin.configure(latency=f"lognormal:{args.delay}:0.5", rate_429=args.rate_429,
+                                 rate_5xx=args.rate_5xx)
+        app.CONFIDENCE_DEADLINE = deadline
+        app.llm_insights.clear()
+        selections = [{'student_name': f"{label} {i}", 'course': course, 'teacher': teacher}
+                      for i in range(args.requests)]
+        jobs = app.get_insight_jobs()
+        # Silence the connector's per-call debug output
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = run_requests(app.app.test_client, selections, args.concurrency)
+            # Fallback answers are upgraded in the background; wait for those jobs to land
+            finished = [jobs.wait(job_id) for _, _, job_id in results if job_id]
+        report(label, results)
+
+        upgraded = sum(job['status'] == 'done' for job in finished)
+        if finished:
+            print(f"{'':<22} {upgraded} fallback answers upgraded in the background, "
+                  f"{len(app.llm_insights)} cached for the next request")
+        faults = {name: count for name, count in gemini_standin.stats.items() if name.startswith('injected_')}
+        print(f"{'':<22} {gemini_standin.stats['requests']} LLM calls, injected faults: {faults or 'none'}")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
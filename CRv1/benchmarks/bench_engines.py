@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Dataframe Engine Benchmark
+-------------------------
+Times the load / validate / preprocess / analyze pipeline with the pandas
+and Polars engines on a synthetic dataset, with and without a course
+filter, and checks that both produce the same complexity metrics.
+
+Usage: python benchmarks/bench_engines.py [--copies N] [--repeat R]
+"""
+
+import math
+import argparse
+import tempfile
+from pathlib import Path
+
+from common import Timer, make_large_dataset
+
+from dataframe_engines import get_engine
+
+
+def run_pipeline(engine, data_file, quarantine_file, course_id=None):
+    """Run the full pipeline; returns (complexity metrics, seconds per stage)."""
+    timings = {}
+    with Timer() as timer:
+        raw = engine.load_course_data(data_file, course_id=course_id)
+    timings['load'] = timer.elapsed
+    with Timer() as timer:
+        raw, _ = engine.validate_course_data(raw, quarantine_path=quarantine_file)
+    timings['validate'] = timer.elapsed
+    with Timer() as timer:
+        processed = engine.collect(engine.preprocess_data(raw))
+    timings['preprocess'] = timer.elapsed
+    with Timer() as timer:
+        metrics = engine.analyze_course_complexity(processed, course_id)
+    timings['analyze'] = timer.elapsed
+    return metrics, timings
+
+
+def max_difference(a, b):
+    """Largest absolute difference between numeric leaves of two metric trees (inf if the structure differs)."""
+    if isinstance(a, dict):
+        if list(a) != list(b):
+            return math.inf
+        return max((max_difference(a[key], b[key]) for key in a), default=0.0)
+    if isinstance(a, str) or a is None:
+        return 0.0 if a == b else math.inf
+    if math.isnan(a) and math.isnan(b):
+        return 0.0
+    return abs(a - b)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Dataframe engine benchmark')
+    parser.add_argument('--copies', type=int, default=2000, help='Copies of the sample catalog in the dataset')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per engine (best is reported)')
+    args = parser.parse_args()
+
+    engines = []
+    for name in ('pandas', 'polars'):
+        try:
+            engines.append(get_engine(name))
+        except ImportError as e:
+            print(f"Skipping {name}: {e}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_file = make_large_dataset(Path(tmp) / 'courses.csv', copies=args.copies)
+        quarantine_file = Path(tmp) / 'quarantined_rows.csv'
+        print(f"Dataset: {args.copies} copies of the sample catalog ({data_file.stat().st_size / 2**20:.1f} MB)")
+
+        for label, course_id in (('all courses', None), ('one course', 'CS101-0000')):
+            print(f"\n{label}:")
+            print(f"  {'engine':<8} {'load':>8} {'validate':>9} {'preprocess':>11} {'analyze':>8} {'total':>8}")
+            results = {}
+            for engine in engines:
+                best = None
+                for _ in range(args.repeat):
+                    metrics, timings = run_pipeline(engine, data_file, quarantine_file, course_id)
+                    if best is None or sum(timings.values()) < sum(best.values()):
+                        best = timings
+                results[engine.name] = metrics
+                print(f"  {engine.name:<8} {best['load']:>7.3f}s {best['validate']:>8.3f}s "
+                      f"{best['preprocess']:>10.3f}s {best['analyze']:>7.3f}s {sum(best.values()):>7.3f}s")
+            if len(results) == 2:
+                print(f"  largest metric difference: {max_difference(results['pandas'], results['polars']):.2e} "
+                      f"({len(results['pandas'])} courses)")
+
+
+if __name__ == '__main__':
+    main()
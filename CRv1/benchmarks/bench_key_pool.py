@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Gemini Key Pool Benchmark
+------------------------
+Runs a burst of generateContent calls against a local stub that enforces
+a per-key request quota (answering 429 with Retry-After), and compares
+throughput and 429 counts for a single key, a key pool with matching
+quotas, and a pool that overestimates its quota. The quota period is
+shortened (--period) so the benchmark finishes in seconds.
+
+Usage: python benchmarks/bench_key_pool.py [--requests N] [--keys K] [--quota Q] [--period S]
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from common import Timer
+
+from gemini_client import GeminiKeyPool
+
+
+class QuotaGeminiStub(BaseHTTPRequestHandler):
+    """generateContent stub enforcing a sliding-window request quota per API key."""
+
+    quota = 20
+    period = 60.0
+    lock = threading.Lock()
+    calls = defaultdict(deque)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        key = parse_qs(urlparse(self.path).query).get('key', [''])[0]
+
+        with self.lock:
+            now = time.monotonic()
+            window = self.calls[key]
+            while window and window[0] <= now - self.period:
+                window.popleft()
+            limited = len(window) >= self.quota
+            if limited:
+                retry_after = window[0] + self.period - now
+            else:
+                window.append(now)
+
+        if limited:
+            self.send_response(429)
+            self.send_header('Retry-After', f"{retry_after:.2f}")
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        time.sleep(0.02)
+        payload = json.dumps({
+            'candidates': [{'content': {'parts': [{'text': 'The confidence score is 72 out of 100.'}]}}],
+            'usageMetadata': {'totalTokenCount': len(body) // 4 + 50}
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def run_burst(pool, url, n_requests, concurrency):
+    """Send a burst through the pool; returns (elapsed seconds, status counts)."""
+    prompt = 'Analyze this course. ' * 50
+
+    def send(key):
+        return requests.post(url, params={'key': key}, json={'contents': [{'parts': [{'text': prompt}]}]})
+
+    def one(_):
+        return pool.call(send, prompt).status_code
+
+    with Timer() as timer, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        statuses = list(executor.map(one, range(n_requests)))
+    counts = defaultdict(int)
+    for status in statuses:
+        counts[status] += 1
+    return timer.elapsed, dict(counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gemini key pool benchmark')
+    parser.add_argument('--requests', type=int, default=120, help='Requests per scenario')
+    parser.add_argument('--keys', type=int, default=4, help='Keys in the pool')
+    parser.add_argument('--quota', type=int, default=20, help='Stub request quota per key and period')
+    parser.add_argument('--period', type=float, default=6.0, help='Quota period in seconds (60 for real quotas)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent callers')
+    args = parser.parse_args()
+
+    QuotaGeminiStub.quota = args.quota
+    QuotaGeminiStub.period = args.period
+    server = ThreadingHTTPServer(('127.0.0.1', 0), QuotaGeminiStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1beta/models/gemini-2.0-flash:generateContent"
+
+    scenarios = [
+        ('single key', 1, args.quota),
+        (f"{args.keys}-key pool", args.keys, args.quota),
+        (f"{args.keys}-key pool, 2x quota", args.keys, args.quota * 2),
+    ]
+    print(f"Stub quota {args.quota} requests per {args.period:.0f} s per key, "
+          f"{args.requests} requests per scenario")
+    for i, (label, n_keys, pool_quota) in enumerate(scenarios):
+        # Fresh keys per scenario so the stub's windows start empty
+        pool = GeminiKeyPool([f"key-{i}-{k:04d}" for k in range(n_keys)], requests_per_minute=pool_quota,
+                             period=args.period, cooldown=args.period, max_wait=args.period * 20)
+        elapsed, counts = run_burst(pool, url, args.requests, args.concurrency)
+        usage = pool.usage()
+        rate_limited = sum(u['rate_limited'] for u in usage.values())
+        print(f"\n{label:<24} {elapsed:>7.2f} s  {args.requests / elapsed:>7.1f} req/s  "
+              f"statuses {counts}  429s seen {rate_limited}")
+        for key_label, counters in usage.items():
+            print(f"  {key_label}  requests {counters['requests']:>4}  tokens {counters['tokens']:>7}  "
+                  f"429s {counters['rate_limited']:>3}")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
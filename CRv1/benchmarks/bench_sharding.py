@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Sharded Serving Benchmark
+------------------------
+Starts the web app as 1 and as N course shards (separate processes on
+local ports) behind the shard router, and reports per-shard course counts
+and memory (current and peak RSS) plus aggregate /get_confidence throughput and latency
+through the router. Backends run without a Gemini key, so every answer
+comes from the deterministic fallback path.
+
+Usage: python benchmarks/bench_sharding.py [--copies N] [--shards 1 4] [--requests N]
+"""
+
+import os
+import argparse
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import requests
+from werkzeug.serving import make_server
+
+from common import Timer, make_large_dataset
+
+import shard_router
+
+
+def run_requests(router_url, catalog, n_requests, concurrency, seed=0):
+    """POST random course/teacher selections through the router; returns (elapsed s, latencies s, errors)."""
+    rng = np.random.default_rng(seed)
+    courses = catalog['courses']
+    selections = []
+    for i in range(n_requests):
+        course = courses[rng.integers(len(courses))]
+        teachers = catalog['teachers_by_course'][course]
+        selections.append({'student_name': f"bench student {i}", 'course': course,
+                           'teacher': teachers[rng.integers(len(teachers))]})
+
+    session = requests.Session()
+    session.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=concurrency))
+
+    def post(selection):
+        with Timer() as timer:
+            response = session.post(router_url + '/get_confidence', data=selection)
+        return timer.elapsed, response.status_code == 200 and response.json().get('success')
+
+    with Timer() as total, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(post, selections))
+    latencies = np.array([latency for latency, _ in results])
+    errors = sum(not ok for _, ok in results)
+    return total.elapsed, latencies, errors
+
+
+def run_scenario(num_shards, data_file, args):
+    """Start num_shards backends and an in-process router, then measure memory and throughput."""
+    env = {
+        'COURSE_DATA_FILE': str(data_file),
+        'GEMINI_API_KEY': '',
+        'GEMINI_API_KEYS': '',
+        'LLM_SCORES_FILE': os.devnull,
+        'QUARANTINE_FILE': str(data_file.with_name('quarantined_rows.csv'))
+    }
+    processes, urls = shard_router.spawn_backends(num_shards, args.base_port, env=env)
+    server = None
+    try:
+        with Timer() as startup:
+            shard_router.wait_for_backends(urls, processes=processes)
+        shard_router.configure(urls)
+        server = make_server('127.0.0.1', 0, shard_router.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        router_url = f"http://127.0.0.1:{server.server_port}"
+
+        catalog = requests.get(router_url + '/api/courses').json()
+        shards = requests.get(router_url + '/shards').json()
+        elapsed, latencies, errors = run_requests(router_url, catalog, args.requests, args.concurrency)
+    finally:
+        if server is not None:
+            server.shutdown()
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+    print(f"\n{num_shards} shard(s): ready in {startup.elapsed:.1f} s, {len(catalog['courses'])} courses in the merged catalog")
+    for shard, info in sorted(shards.items(), key=lambda item: int(item[0])):
+        print(f"  shard {shard}: {info['courses']:>5} courses  {info['rows']:>8} rows  "
+              f"RSS {info['rss_mb']:>7.1f} MB  peak {info['max_rss_mb']:>7.1f} MB")
+    total_rss = sum(info['rss_mb'] for info in shards.values())
+    p50, p95 = np.percentile(latencies * 1000, [50, 95])
+    print(f"  largest shard {max(info['rss_mb'] for info in shards.values()):.1f} MB RSS, "
+          f"all shards {total_rss:.1f} MB")
+    print(f"  {args.requests / elapsed:.1f} req/s through the router  p50 {p50:.1f} ms  p95 {p95:.1f} ms  "
+          f"errors {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sharded serving benchmark')
+    parser.add_argument('--copies', type=int, default=300, help='Copies of the sample catalog in the dataset')
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 4], help='Shard counts to compare')
+    parser.add_argument('--requests', type=int, default=400, help='Requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients')
+    parser.add_argument('--base-port', type=int, default=5101, help='Port of shard 0')
+    args = parser.parse_args()
+    # Keep the router's per-request log lines out of the report
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_file = make_large_dataset(Path(tmp) / 'courses.csv', copies=args.copies)
+        print(f"Dataset: {args.copies} copies of the sample catalog, {os.cpu_count()} CPU(s)")
+        for num_shards in args.shards:
+            run_scenario(num_shards, data_file, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+SQLite Store Benchmark
+---------------------
+Compares startup time and peak memory of the in-memory pandas path with
+the SQLite store for a single-course request.
+
+Usage: python benchmarks/bench_sqlite_store.py [--copies N]
+"""
+
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from common import Timer, make_large_dataset
+
+from data_processor import load_course_data, preprocess_data
+from analysis_engine import analyze_course_complexity
+from llm_connector import prepare_prompt_data
+import sqlite_store
+
+
+def run_pandas(csv_path, course_id, student_id):
+    """Full load/preprocess/analyze, then one scoped prompt."""
+    processed = preprocess_data(load_course_data(csv_path))
+    metrics = analyze_course_complexity(processed)
+    return prepare_prompt_data(processed, metrics, student_id, course_id)
+
+
+def run_sqlite(db_path, course_id, student_id):
+    """Open the prebuilt store and query only what one request needs."""
+    conn = sqlite_store.connect_store(db_path)
+    try:
+        metrics = sqlite_store.get_complexity_metrics(conn, course_id)
+        rows = sqlite_store.get_student_context(conn, student_id)
+    finally:
+        conn.close()
+    return prepare_prompt_data(rows, metrics, student_id, course_id)
+
+
+def measure(label, func, *args):
+    """Print wall time and peak traced memory for one call."""
+    tracemalloc.start()
+    with Timer() as timer:
+        func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} {timer.elapsed * 1000:>10.1f} ms {peak / 1e6:>10.1f} MB peak")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite store benchmark')
+    parser.add_argument('--copies', type=int, default=100, help='Copies of the sample catalog')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = make_large_dataset(Path(tmp) / 'data.csv', args.copies)
+        db_path = Path(tmp) / 'data.sqlite'
+
+        with Timer() as build:
+            processed = preprocess_data(load_course_data(csv_path))
+            sqlite_store.build_store(processed, analyze_course_complexity(processed), db_path, source=csv_path)
+        print(f"Rows: {len(processed)}, one-off store build: {build.elapsed:.2f} s")
+        del processed
+
+        course_id = 'CS201-0000'
+        student_id = 'S1040-0000'
+        measure('pandas (load + analyze)', run_pandas, csv_path, course_id, student_id)
+        measure('sqlite (scoped query)', run_sqlite, db_path, course_id, student_id)
+
+
+if __name__ == '__main__':
+    main()
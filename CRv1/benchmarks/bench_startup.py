@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+CLI Startup Benchmark
+--------------------
+Measures cold-start cost of main.py with `python -X importtime` for the
+exits that should not load pandas/numpy/requests (--help, missing API
+key, missing data file), and reports the slowest imports of each.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--top N]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from common import CRV1_DIR
+
+SCENARIOS = {
+    'help': ['--help'],
+    'missing api key': ['--data', 'course_complexity_data.csv'],
+    'missing data file': ['--data', 'does_not_exist.csv', '--api-key', 'dummy'],
+}
+
+HEAVY_MODULES = ('pandas', 'numpy', 'requests')
+
+
+def parse_importtime(stderr):
+    """
+    Parse `-X importtime` output into top-level and per-module timings.
+
+    Returns:
+        tuple: (total top-level import microseconds, dict of module -> cumulative microseconds)
+    """
+    total_us = 0
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, raw_name = line[len('import time:'):].split('|')
+        name = raw_name.strip()
+        times[name] = int(cumulative_us)
+        # Nested imports are indented further; only count top-level ones
+        if len(raw_name) - len(raw_name.lstrip()) == 1:
+            total_us += int(cumulative_us)
+    return total_us, times
+
+
+def run_scenario(args):
+    """Run main.py once and return (wall seconds, parsed import times)."""
+    env = dict(os.environ)
+    env.pop('GEMINI_API_KEY', None)
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', 'main.py', *args],
+        cwd=CRV1_DIR, env=env, capture_output=True, text=True
+    )
+    return time.perf_counter() - start, parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CLI startup benchmark')
+    parser.add_argument('--runs', type=int, default=5, help='Runs per scenario')
+    parser.add_argument('--top', type=int, default=5, help='Slowest imports to list')
+    args = parser.parse_args()
+
+    for name, cli_args in SCENARIOS.items():
+        walls = []
+        for _ in range(args.runs):
+            wall, (total_us, imports) = run_scenario(cli_args)
+            walls.append(wall)
+
+        heavy = [mod for mod in HEAVY_MODULES if mod in imports]
+        print(f"\n{name}: median {statistics.median(walls) * 1000:.1f} ms wall, "
+              f"{total_us / 1000:.1f} ms in imports")
+        print(f"  heavy modules loaded: {', '.join(heavy) if heavy else 'none'}")
+        for mod, us in sorted(imports.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+            print(f"  {mod:<40} {us / 1000:>8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
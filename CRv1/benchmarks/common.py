@@ -0,0 +1,62 @@
+"""
+Benchmark Helpers
+----------------
+Shared helpers for the benchmark scripts: import path setup and a
+synthetic large dataset built by replicating the sample CSV.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CRV1_DIR = Path(__file__).resolve().parent.parent
+if str(CRV1_DIR) not in sys.path:
+    sys.path.insert(0, str(CRV1_DIR))
+
+SAMPLE_CSV = CRV1_DIR / 'course_complexity_data.csv'
+
+
+def make_large_dataset(output_path, copies=100, seed=0):
+    """
+    Write a larger dataset by replicating the sample CSV under new course IDs.
+
+    Each copy gets distinct course numbers and student IDs and a small
+    multiplicative jitter on unit times so courses are not identical.
+
+    Args:
+        output_path (str or Path): CSV file to write
+        copies (int): Number of copies of the sample catalog
+        seed (int): Random seed for the jitter
+
+    Returns:
+        Path: Path of the written CSV
+    """
+    rng = np.random.default_rng(seed)
+    base = pd.read_csv(SAMPLE_CSV)
+    unit_cols = [col for col in base.columns if col.startswith('unit') and col.endswith('_time')]
+
+    frames = []
+    for i in range(copies):
+        frame = base.copy()
+        frame['course_number'] = frame['course_number'] + f"-{i:04d}"
+        frame['student_id'] = frame['student_id'] + f"-{i:04d}"
+        frame[unit_cols] = (frame[unit_cols] * rng.uniform(0.8, 1.2, size=(len(frame), len(unit_cols)))).round(1)
+        frames.append(frame)
+
+    output_path = Path(output_path)
+    pd.concat(frames, ignore_index=True).to_csv(output_path, index=False)
+    return output_path
+
+
+class Timer:
+    """Context manager that records elapsed wall time in seconds."""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
@@ -0,0 +1,121 @@
+"""
+Completion Forecast Module
+-------------------------
+Monte Carlo forecast of a prospective student's completion time for a
+course and teacher. Whole student records are resampled from the
+teacher's section (or the course), so the correlation between a
+student's unit times carries into the simulated totals; all samples are
+drawn in one vectorized gather, and the resulting percentiles are cached
+per (course, teacher).
+"""
+
+import numpy as np
+
+
+# Teacher sections with fewer measurements for a unit fall back to the whole course
+MIN_SECTION_SAMPLES = 5
+PERCENTILES = (10, 50, 90)
+
+
+def student_pace_factor(student_info):
+    """
+    Summarize a student's history as a pace multiplier.
+
+    Args:
+        student_info (dict): 'student_info' from prepare_prompt_data, or None
+
+    Returns:
+        float: Geometric mean of the student's relative performance (1.0 = average)
+    """
+    if not student_info or not student_info.get('performance_metrics'):
+        return 1.0
+    ratios = np.array([m['relative_performance'] for m in student_info['performance_metrics'].values()],
+                      dtype=np.float64)
+    ratios = ratios[np.isfinite(ratios) & (ratios > 0)]
+    return float(np.exp(np.log(ratios).mean())) if len(ratios) else 1.0
+
+
+class CompletionForecaster:
+    """Simulates completion-time distributions from a CoursePartitions layout."""
+
+    def __init__(self, partitions, n_samples=10000, seed=0):
+        self.partitions = partitions
+        self.n_samples = n_samples
+        self.seed = seed
+        self._cache = {}
+
+    def _section_rows(self, course_id, teacher_name):
+        """Return (unit names, (students, units) times) of the rows to resample."""
+        section_times = self.partitions.course_times(course_id)
+        if teacher_name in self.partitions.teacher_offsets.get(course_id, {}):
+            teacher_times = self.partitions.teacher_times(course_id, teacher_name)
+            if len(teacher_times) >= MIN_SECTION_SAMPLES:
+                section_times = teacher_times
+
+        measured = ~np.isnan(section_times).all(axis=0)
+        units = [unit_col.replace('_time', '')
+                 for unit_col, keep in zip(self.partitions.unit_columns, measured) if keep]
+        return units, section_times[:, measured].astype(np.float64)
+
+    def _simulate(self, course_id, teacher_name):
+        """
+        Percentiles of simulated per-unit and total times for an average-paced student.
+
+        Returns:
+            dict: 'units' and 'total' percentiles, or None when the section has no unit times
+        """
+        units, rows = self._section_rows(course_id, teacher_name)
+        if not units:
+            return None
+        rng = np.random.default_rng(self.seed)
+
+        # One row index per sample; a sample's units all come from the same student
+        samples = rows[rng.integers(0, len(rows), self.n_samples)]
+        totals = np.nansum(samples, axis=1)
+
+        return {
+            'units': dict(zip(units, np.nanpercentile(samples, PERCENTILES, axis=0).T)),
+            'total': np.percentile(totals, PERCENTILES)
+        }
+
+    def forecast(self, course_id, teacher_name=None, student_info=None):
+        """
+        Forecast completion time for a course and teacher.
+
+        A student's history scales the simulated times by their pace factor;
+        since that is a positive constant it scales the cached percentiles
+        directly, so conditioning does not rerun the simulation.
+
+        Args:
+            course_id (str): Course number
+            teacher_name (str, optional): Teacher; falls back to the whole course
+            student_info (dict, optional): 'student_info' from prepare_prompt_data
+
+        Returns:
+            dict: P10/P50/P90 total and per-unit minutes, or None for an unknown
+                course or one without unit times
+        """
+        if course_id not in self.partitions:
+            return None
+
+        if teacher_name not in self.partitions.teacher_offsets[course_id]:
+            teacher_name = None
+        key = (course_id, teacher_name)
+        if key not in self._cache:
+            self._cache[key] = self._simulate(course_id, teacher_name)
+        simulated = self._cache[key]
+        if simulated is None:
+            return None
+        factor = student_pace_factor(student_info)
+
+        def as_percentiles(values):
+            return {f"p{p}": round(float(v) * factor, 1) for p, v in zip(PERCENTILES, values)}
+
+        return {
+            'course': course_id,
+            'teacher': teacher_name,
+            'n_samples': self.n_samples,
+            'student_pace_factor': round(factor, 3),
+            'total': as_percentiles(simulated['total']),
+            'units': {unit: as_percentiles(values) for unit, values in simulated['units'].items()}
+        }
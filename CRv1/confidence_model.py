@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Confidence Model Module
+----------------------
+Local linear model that predicts the confidence score from complexity
+metrics, as an instant, deterministic alternative to the Gemini score.
+The model is fitted offline (optionally against recorded LLM scores) and
+stored as a small JSON artifact; inference is a handful of vector ops.
+
+Usage:
+    python confidence_model.py --data course_complexity_data.csv \
+        --scores llm_scores.jsonl --output confidence_model.json
+"""
+
+import json
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+
+FEATURE_NAMES = ['complexity_score', 'unit_difficulty_std', 'teacher_efficiency']
+
+DEFAULT_MODEL_FILE = 'confidence_model.json'
+DEFAULT_SCORES_FILE = 'llm_scores.jsonl'
+
+
+def heuristic_confidence(complexity_score):
+    """Fallback confidence score used when no LLM score is available (inverse of complexity)."""
+    return max(0, min(100, 100 - complexity_score * 0.7))
+
+
+def extract_features(course_metrics, teacher_name=None):
+    """
+    Build the feature vector for a course, optionally for a teacher's section.
+
+    Args:
+        course_metrics (dict): One course's entry of complexity_metrics
+        teacher_name (str, optional): Teacher; the course average (1.0) is used if unknown
+
+    Returns:
+        np.ndarray: Features in FEATURE_NAMES order
+    """
+    difficulties = [unit['difficulty_score'] for unit in course_metrics['unit_metrics'].values()]
+    teacher = course_metrics['teacher_metrics'].get(teacher_name) if teacher_name else None
+    efficiency = teacher['efficiency_score'] if teacher else 1.0
+
+    return np.array([
+        course_metrics['overall_complexity']['complexity_score'],
+        np.std(difficulties) if len(difficulties) > 1 else 0.0,
+        efficiency if np.isfinite(efficiency) else 1.0
+    ], dtype=np.float64)
+
+
+def load_llm_scores(scores_path):
+    """
+    Load recorded LLM confidence scores.
+
+    Args:
+        scores_path (str or Path): JSON lines file written by record_llm_score
+
+    Returns:
+        dict: (course, teacher) -> latest score; teacher may be None
+    """
+    scores = {}
+    scores_path = Path(scores_path)
+    if not scores_path.exists():
+        return scores
+
+    for line in scores_path.read_text().splitlines():
+        if line.strip():
+            record = json.loads(line)
+            scores[(record['course'], record.get('teacher'))] = record['confidence_score']
+    return scores
+
+
+def record_llm_score(scores_path, course_id, teacher_name, confidence_score):
+    """Append an LLM confidence score to the scores file for later fitting."""
+    with open(scores_path, 'a') as f:
+        f.write(json.dumps({
+            'course': course_id,
+            'teacher': teacher_name,
+            'confidence_score': float(confidence_score)
+        }) + '\n')
+
+
+def fit_confidence_model(complexity_metrics, llm_scores=None, ridge=1.0):
+    """
+    Fit the confidence model with ridge-regularized least squares.
+
+    Each (course, teacher) section is a sample. Its target is the recorded
+    LLM score when available, otherwise the heuristic score, so a model
+    fitted without any LLM scores reproduces the heuristic.
+
+    Args:
+        complexity_metrics (dict): Output of analyze_course_complexity
+        llm_scores (dict, optional): (course, teacher) -> score, see load_llm_scores
+        ridge (float): L2 penalty on the standardized coefficients
+
+    Returns:
+        dict: JSON-serializable model
+    """
+    llm_scores = llm_scores or {}
+    features = []
+    targets = []
+    n_llm = 0
+
+    for course_id, metrics in complexity_metrics.items():
+        for teacher in [None, *metrics['teacher_metrics'].keys()]:
+            features.append(extract_features(metrics, teacher))
+            score = llm_scores.get((course_id, teacher))
+            if score is None:
+                score = heuristic_confidence(metrics['overall_complexity']['complexity_score'])
+            else:
+                n_llm += 1
+            targets.append(score)
+
+    X = np.vstack(features)
+    y = np.array(targets, dtype=np.float64)
+
+    mean = X.mean(axis=0)
+    scale = X.std(axis=0)
+    scale[scale == 0] = 1.0
+    Z = (X - mean) / scale
+
+    # Ridge solution on centered data; the intercept is the target mean
+    coef = np.linalg.solve(Z.T @ Z + ridge * np.eye(Z.shape[1]), Z.T @ (y - y.mean()))
+    residuals = y - (y.mean() + Z @ coef)
+
+    return {
+        'feature_names': FEATURE_NAMES,
+        'mean': mean.tolist(),
+        'scale': scale.tolist(),
+        'coef': coef.tolist(),
+        'intercept': float(y.mean()),
+        'n_samples': len(y),
+        'n_llm_scores': n_llm,
+        'rmse': float(np.sqrt(np.mean(residuals ** 2)))
+    }
+
+
+def save_confidence_model(model, model_path):
+    """Write a fitted model to a JSON file."""
+    Path(model_path).write_text(json.dumps(model, indent=2))
+
+
+def load_confidence_model(model_path):
+    """
+    Load a fitted model, converting its parameters to arrays.
+
+    Returns:
+        dict: Model, or None if the file does not exist
+    """
+    model_path = Path(model_path)
+    if not model_path.exists():
+        return None
+    model = json.loads(model_path.read_text())
+    for key in ('mean', 'scale', 'coef'):
+        model[key] = np.asarray(model[key], dtype=np.float64)
+    return model
+
+
+def predict_confidence(model, course_metrics, teacher_name=None):
+    """
+    Predict the confidence score for a course section.
+
+    Args:
+        model (dict): Model from fit_confidence_model or load_confidence_model
+        course_metrics (dict): One course's entry of complexity_metrics
+        teacher_name (str, optional): Selected teacher
+
+    Returns:
+        float: Confidence score from 0-100, rounded to one decimal
+    """
+    z = (extract_features(course_metrics, teacher_name) - np.asarray(model['mean'])) / np.asarray(model['scale'])
+    score = model['intercept'] + float(z @ np.asarray(model['coef']))
+    return round(max(0.0, min(100.0, score)), 1)
+
+
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Fit the local confidence model')
+    parser.add_argument('--data', '-d', type=str, nargs='+', required=True,
+                        help='CSV file(s), directory or glob pattern with course data')
+    parser.add_argument('--scores', type=str, default=DEFAULT_SCORES_FILE,
+                        help='Recorded LLM scores (JSON lines); heuristic targets are used where missing')
+    parser.add_argument('--output', '-o', type=str, default=DEFAULT_MODEL_FILE,
+                        help='Where to write the model')
+    parser.add_argument('--ridge', type=float, default=1.0, help='L2 penalty')
+    parser.add_argument('--quarantine', '-q', type=str, default='quarantined_rows.csv',
+                        help='CSV file for rows that fail data validation')
+    return parser.parse_args()
+
+
+def main():
+    """Fit the model from course data and recorded scores."""
+    from data_processor import load_course_data, preprocess_data
+    from data_validator import validate_course_data, print_validation_report
+    from analysis_engine import analyze_course_complexity
+
+    args = parse_arguments()
+    data_source = args.data[0] if len(args.data) == 1 else args.data
+    raw_data = load_course_data(data_source)
+    if raw_data.empty:
+        print("Error: No data found or unable to parse the CSV file.")
+        return
+
+    # Train on the same validated rows the app serves from
+    raw_data, validation_report = validate_course_data(raw_data, quarantine_path=args.quarantine)
+    print_validation_report(validation_report)
+    if validation_report['rows_checked'] == validation_report['rows_quarantined']:
+        print("Error: No valid rows left after validation.")
+        return
+
+    complexity_metrics = analyze_course_complexity(preprocess_data(raw_data))
+    model = fit_confidence_model(complexity_metrics, load_llm_scores(args.scores), args.ridge)
+    save_confidence_model(model, args.output)
+    print(f"Fitted on {model['n_samples']} sections ({model['n_llm_scores']} LLM scores), "
+          f"RMSE {model['rmse']:.2f}; saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
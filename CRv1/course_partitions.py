@@ -0,0 +1,151 @@
+"""
+Course Partitions Module
+-----------------------
+Course-partitioned, contiguous NumPy layout of the processed data. Rows are
+sorted by course and then teacher once, unit times are held in a single
+2-D array (float64 by default, float32 on request to halve its memory;
+optionally memory-mapped), and offset tables map each
+course and each (course, teacher) section to its row range. Per-course and
+per-teacher statistics are then computed on zero-copy slice views instead
+of boolean-masked copies of the full frame.
+"""
+
+import numpy as np
+import pandas as pd
+
+from data_processor import get_unit_columns
+
+
+class CoursePartitions:
+    """
+    Course/teacher partitioned view of processed course data.
+
+    Attributes:
+        unit_columns (list): 'unitX_time' column names, in array column order
+        times (np.ndarray): Array of shape (rows, units), NaN where missing
+        total_time (np.ndarray): Per-row total completion time
+        student_ids (np.ndarray): Per-row student IDs
+        order (np.ndarray): Positions of the sorted rows in the source frame
+        course_offsets (dict): Course -> (start, stop) row range
+        teacher_offsets (dict): Course -> {teacher: (start, stop)} row ranges
+    """
+
+    def __init__(self, unit_columns, times, total_time, student_ids, order, course_offsets, teacher_offsets):
+        self.unit_columns = unit_columns
+        self.times = times
+        self.total_time = total_time
+        self.student_ids = student_ids
+        self.order = order
+        self.course_offsets = course_offsets
+        self.teacher_offsets = teacher_offsets
+
+    def __contains__(self, course):
+        return course in self.course_offsets
+
+    @property
+    def courses(self):
+        """Course numbers in order of first appearance in the source data."""
+        return list(self.course_offsets.keys())
+
+    def teachers(self, course):
+        """Teacher names of a course in order of first appearance."""
+        return list(self.teacher_offsets.get(course, {}).keys())
+
+    def course_slice(self, course):
+        """Row slice of a course."""
+        start, stop = self.course_offsets[course]
+        return slice(start, stop)
+
+    def teacher_slice(self, course, teacher):
+        """Row slice of one teacher's section of a course."""
+        start, stop = self.teacher_offsets[course][teacher]
+        return slice(start, stop)
+
+    def course_times(self, course):
+        """Unit times of a course as a (students, units) view."""
+        return self.times[self.course_slice(course)]
+
+    def teacher_times(self, course, teacher):
+        """Unit times of a teacher's section as a (students, units) view."""
+        return self.times[self.teacher_slice(course, teacher)]
+
+    def course_total_time(self, course):
+        """Total completion times of a course as a view."""
+        return self.total_time[self.course_slice(course)]
+
+    def teacher_total_time(self, course, teacher):
+        """Total completion times of a teacher's section as a view."""
+        return self.total_time[self.teacher_slice(course, teacher)]
+
+    def course_student_ids(self, course):
+        """Student IDs of a course as a view."""
+        return self.student_ids[self.course_slice(course)]
+
+
+def _offsets(codes):
+    """Return (start, stop) pairs for each run of equal values in a sorted code array."""
+    if len(codes) == 0:
+        return []
+    boundaries = np.flatnonzero(np.diff(codes)) + 1
+    starts = np.concatenate(([0], boundaries))
+    stops = np.concatenate((boundaries, [len(codes)]))
+    return list(zip(starts.tolist(), stops.tolist()))
+
+
+def build_course_partitions(df, mmap_path=None, dtype=np.float64):
+    """
+    Build the partitioned layout from preprocessed course data.
+
+    Courses and teachers keep their order of first appearance, so results
+    iterate in the same order as the source frame.
+
+    Args:
+        df (pd.DataFrame): Output of preprocess_data
+        mmap_path (str or Path, optional): Write the unit time array to this
+            .npy file and memory-map it instead of holding it in memory
+        dtype (np.dtype): Unit time storage type; np.float32 halves the memory
+            but statistics then carry float32 rounding (e.g. 40.6 -> 40.599998)
+
+    Returns:
+        CoursePartitions: Partitioned data
+    """
+    unit_columns = get_unit_columns(df)
+    course_codes, course_names = pd.factorize(df['course_number'])
+    teacher_codes, teacher_names = pd.factorize(df['teacher_name'])
+
+    # Sections numbered by first appearance, so teachers keep their order within each course
+    section_codes = pd.MultiIndex.from_arrays([course_codes, teacher_codes]).factorize()[0]
+
+    # Stable sort by course, then teacher
+    order = np.lexsort((section_codes, course_codes))
+    sorted_courses = course_codes[order]
+    sorted_sections = section_codes[order]
+    sorted_teachers = teacher_codes[order]
+
+    source_times = df[unit_columns].to_numpy(dtype=dtype)
+    if mmap_path is not None:
+        times = np.lib.format.open_memmap(mmap_path, mode='w+', dtype=dtype, shape=source_times.shape)
+        np.take(source_times, order, axis=0, out=times)
+        times.flush()
+    else:
+        times = np.ascontiguousarray(source_times[order])
+
+    course_offsets = {}
+    teacher_offsets = {}
+    for start, stop in _offsets(sorted_courses):
+        course = course_names[sorted_courses[start]]
+        course_offsets[course] = (start, stop)
+        teacher_offsets[course] = {
+            teacher_names[sorted_teachers[start + t_start]]: (start + t_start, start + t_stop)
+            for t_start, t_stop in _offsets(sorted_sections[start:stop])
+        }
+
+    return CoursePartitions(
+        unit_columns=unit_columns,
+        times=times,
+        total_time=df['total_time'].to_numpy(dtype=np.float64)[order],
+        student_ids=df['student_id'].to_numpy()[order],
+        order=order,
+        course_offsets=course_offsets,
+        teacher_offsets=teacher_offsets
+    )
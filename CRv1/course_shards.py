@@ -0,0 +1,68 @@
+"""
+Course Shards Module
+-------------------
+Stable assignment of courses to shards for sharded serving. A course's
+shard is a hash of its course number modulo the shard count, so backend
+instances (which load only their own courses) and the router (which
+forwards requests to the owning backend) agree without sharing state.
+"""
+
+import hashlib
+
+
+def course_shard(course_id, num_shards):
+    """
+    Return the shard that owns a course.
+
+    Uses a fixed hash rather than hash(), which is randomized per process.
+
+    Args:
+        course_id (str): Course number
+        num_shards (int): Number of shards
+
+    Returns:
+        int: Shard index in [0, num_shards)
+    """
+    digest = hashlib.blake2b(str(course_id).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % num_shards
+
+
+def shard_mask(course_numbers, shard_index, num_shards):
+    """
+    Boolean mask of the rows whose course belongs to a shard.
+
+    Each distinct course is hashed once, so the cost is dominated by the
+    vectorized lookup rather than per-row hashing.
+
+    Args:
+        course_numbers (pd.Series): Course numbers of the rows
+        shard_index (int): Shard to keep
+        num_shards (int): Number of shards
+
+    Returns:
+        pd.Series: True for rows of courses owned by the shard
+    """
+    courses = course_numbers.astype(str)
+    owners = {course: course_shard(course, num_shards) for course in courses.unique()}
+    return courses.map(owners) == shard_index
+
+
+def parse_shard(value):
+    """
+    Parse a shard specification such as '2/4' (shard 2 of 4).
+
+    Returns:
+        tuple: (shard_index, num_shards), or None for an empty value
+
+    Raises:
+        ValueError: If the specification is malformed or out of range
+    """
+    if not value:
+        return None
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{value}', expected INDEX/COUNT such as 0/4")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard '{value}', index must be in [0, {count})")
+    return index, count
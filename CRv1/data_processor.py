@@ -4,24 +4,192 @@ Data Processor Module
 Handles loading and preprocessing of course data from CSV files.
 """
 
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
-from pathlib import Path
+
+from utils.data_paths import resolve_data_paths
+from course_shards import shard_mask
+
+try:
+    from pyarrow import csv as pa_csv
+except ImportError:
+    pa_csv = None
+
+
+UNIT_COL_PATTERN = re.compile(r'^unit(\d+)_time$')
+
+
+# Rows per chunk when reading with filters pushed down
+FILTER_CHUNK_SIZE = 100_000
+# pandas' default missing-value markers, passed to pyarrow so both readers agree on blank cells
+CSV_NULL_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+                   '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+
+
+def _read_csv(file_path, courses=None, teacher_name=None, shard=None, chunksize=FILTER_CHUNK_SIZE):
+    """
+    Read a single CSV, optionally keeping only rows that match the filters.
+    
+    Unfiltered reads use pyarrow's multithreaded reader when available.
+    Filtered reads stream the file in chunks and keep only matching rows,
+    so memory is proportional to the selected rows rather than the file.
+    
+    Args:
+        file_path (Path): CSV file
+        courses (set, optional): Course numbers to keep
+        teacher_name (str, optional): Teacher to keep (compared after normalization)
+        shard (tuple, optional): (shard_index, num_shards) whose courses to keep
+        chunksize (int): Rows per chunk for filtered reads
+        
+    Returns:
+        pd.DataFrame: File contents (matching rows only when filtered)
+    """
+    if courses is None and teacher_name is None and shard is None:
+        if pa_csv is not None:
+            try:
+                convert_options = pa_csv.ConvertOptions(strings_can_be_null=True, null_values=CSV_NULL_VALUES)
+                return pa_csv.read_csv(file_path, convert_options=convert_options).to_pandas()
+            except Exception:
+                # Fall back to pandas for files pyarrow cannot type (mixed columns etc.)
+                pass
+        return pd.read_csv(file_path)
+    
+    matches = []
+    for chunk in pd.read_csv(file_path, chunksize=chunksize):
+        mask = pd.Series(True, index=chunk.index)
+        if courses is not None and 'course_number' in chunk.columns:
+            mask &= chunk['course_number'].astype(str).isin(courses)
+        if teacher_name is not None and 'teacher_name' in chunk.columns:
+            mask &= chunk['teacher_name'].str.strip().str.lower() == teacher_name.strip().lower()
+        if shard is not None and 'course_number' in chunk.columns:
+            mask &= shard_mask(chunk['course_number'], *shard)
+        matches.append(chunk[mask])
+    return pd.concat(matches, ignore_index=True)
+
+
+def _find_student_courses(paths, student_id, chunksize=FILTER_CHUNK_SIZE):
+    """Scan only the id columns of each file to find the courses a student took."""
+    courses = set()
+    for path in paths:
+        for chunk in pd.read_csv(path, usecols=['course_number', 'student_id'], chunksize=chunksize):
+            student_rows = chunk[chunk['student_id'].astype(str) == str(student_id)]
+            courses.update(student_rows['course_number'].astype(str))
+    return courses
+
+
+def _unit_sort_key(col):
+    """Sort unit columns by unit number so unit10_time follows unit9_time."""
+    match = UNIT_COL_PATTERN.match(col)
+    return int(match.group(1)) if match else 0
+
+
+def get_unit_columns(df):
+    """
+    Get the unit completion time columns of a frame.
+    
+    Args:
+        df (pd.DataFrame): Raw or processed course data
+        
+    Returns:
+        list: 'unitX_time' column names ordered by unit number
+    """
+    return sorted((col for col in df.columns if UNIT_COL_PATTERN.match(col)), key=_unit_sort_key)
 
 
-def load_course_data(file_path):
+def to_long_unit_times(df):
     """
-    Load course data from a CSV file.
+    Convert the wide unit columns into a long table of existing measurements.
+    
+    The wide layout pads every course to the maximum unit count; the long
+    table holds one row per (student row, unit) that actually has a time,
+    so courses only carry the units they have.
+    
+    Args:
+        df (pd.DataFrame): Course data with numeric unit time columns
+        
+    Returns:
+        pd.DataFrame: Columns row (position in df), course_number,
+            teacher_name, unit_number and time
+    """
+    unit_cols = get_unit_columns(df)
+    times = df[unit_cols].to_numpy(dtype=float)
+    row_pos, unit_pos = np.nonzero(~np.isnan(times))
+    unit_numbers = np.array([_unit_sort_key(col) for col in unit_cols], dtype=int)
+    
+    return pd.DataFrame({
+        'row': row_pos,
+        'course_number': df['course_number'].to_numpy()[row_pos],
+        'teacher_name': df['teacher_name'].to_numpy()[row_pos],
+        'unit_number': unit_numbers[unit_pos],
+        'time': times[row_pos, unit_pos],
+    })
+
+
+def load_course_data(file_path, max_workers=None, course_id=None, teacher_name=None, student_id=None,
+                     shard=None):
+    """
+    Load course data from one or more CSV files.
+    
+    Multiple files are parsed in parallel and combined into a union schema:
+    courses with fewer units simply have NaN in the missing unit columns.
+    Each row is tagged with its originating file in a 'source_file' column.
+    
+    Filters are applied while reading, so unrelated rows are never held in
+    memory or preprocessed. A student filter keeps every row of the courses
+    that student has taken, since their relative performance is computed
+    against the rest of each course.
     
     Args:
-        file_path (str or Path): Path to the CSV file
+        file_path (str, Path or list): Path to a CSV file, a directory, a glob
+            pattern, or a list of these
+        max_workers (int, optional): Number of parser threads for multi-file loads
+        course_id (str, optional): Only load rows for this course
+        teacher_name (str, optional): Only load rows for this teacher
+        student_id (str, optional): Also load the courses this student has taken
+        shard (tuple, optional): (shard_index, num_shards); only load the courses
+            owned by that shard (see course_shards)
         
     Returns:
         pd.DataFrame: Loaded data or empty DataFrame if loading fails
     """
     try:
+        paths = resolve_data_paths(file_path)
+        if not paths:
+            print(f"Error: No CSV files found for {file_path}")
+            return pd.DataFrame()
+        
+        multi_source = len(paths) > 1 or Path(paths[0]) != Path(str(file_path))
+        
+        # Build the course predicate: the selected course plus the student's courses
+        courses = None
+        if course_id is not None or student_id is not None:
+            courses = {str(course_id)} if course_id is not None else set()
+            if student_id is not None:
+                courses |= _find_student_courses(paths, student_id)
+        read_csv = partial(_read_csv, courses=courses, teacher_name=teacher_name, shard=shard)
+        
         # Assume CSV has headers: course_number, teacher_name, student_id, unit1_time, unit2_time, etc.
-        df = pd.read_csv(file_path)
+        if len(paths) == 1:
+            frames = [read_csv(paths[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                frames = list(executor.map(read_csv, paths))
+        
+        if multi_source:
+            for path, frame in zip(paths, frames):
+                frame['source_file'] = str(path)
+            # Concatenation aligns on column names, producing the union of unit columns
+            df = pd.concat(frames, ignore_index=True, sort=False)
+            unit_cols = get_unit_columns(df)
+            other_cols = [col for col in df.columns if col not in unit_cols and col != 'source_file']
+            df = df[other_cols + unit_cols + ['source_file']]
+        else:
+            df = frames[0]
         
         # Basic validation
         required_cols = ['course_number', 'teacher_name', 'student_id']
@@ -30,7 +198,7 @@ def load_course_data(file_path):
             return pd.DataFrame()
         
         # Check if we have at least one unit completion time column
-        unit_cols = [col for col in df.columns if col.startswith('unit') and col.endswith('_time')]
+        unit_cols = get_unit_columns(df)
         if not unit_cols:
             print("Error: No unit completion time columns found (expected format: 'unitX_time')")
             return pd.DataFrame()
@@ -56,7 +224,7 @@ def preprocess_data(df):
     processed_df = df.copy()
     
     # Identify unit time columns
-    unit_cols = [col for col in processed_df.columns if col.startswith('unit') and col.endswith('_time')]
+    unit_cols = get_unit_columns(processed_df)
     
     # Convert time columns to numeric, coercing errors to NaN
     for col in unit_cols:
@@ -74,17 +242,56 @@ def preprocess_data(df):
     # Convert course numbers to string to handle alphanumeric course IDs
     processed_df['course_number'] = processed_df['course_number'].astype(str)
     
-    # Flag potential outliers (students taking significantly longer or shorter than average)
-    for course in processed_df['course_number'].unique():
-        course_mask = processed_df['course_number'] == course
-        
-        for col in unit_cols:
-            col_mean = processed_df.loc[course_mask, col].mean()
-            col_std = processed_df.loc[course_mask, col].std()
-            
-            # Mark as outlier if more than 2 standard deviations from mean
-            outlier_col = f"{col}_outlier"
-            processed_df.loc[course_mask, outlier_col] = np.abs(
-                processed_df.loc[course_mask, col] - col_mean) > 2 * col_std
+    # Flag potential outliers (students taking significantly longer or shorter than average),
+    # using only the measurements that exist for each course's units
+    unit_times = to_long_unit_times(processed_df)
+    grouped = unit_times.groupby(['course_number', 'unit_number'], sort=False)['time']
+    deviation = (unit_times['time'] - grouped.transform('mean')).abs()
+    # Mark as outlier if more than 2 standard deviations from mean
+    is_outlier = (deviation > 2 * grouped.transform('std')).to_numpy()
+    
+    unit_index = {_unit_sort_key(col): i for i, col in enumerate(unit_cols)}
+    outliers = np.zeros((len(processed_df), len(unit_cols)), dtype=bool)
+    outliers[unit_times['row'].to_numpy(), unit_times['unit_number'].map(unit_index).to_numpy()] = is_outlier
+    for i, col in enumerate(unit_cols):
+        processed_df[f"{col}_outlier"] = outliers[:, i]
     
     return processed_df
+
+
+def stratified_sample(df, max_rows_per_stratum, seed=None, student_id=None):
+    """
+    Draw a stratified sample with at most max_rows_per_stratum rows per (course, teacher).
+    
+    Rows are picked uniformly at random without replacement within each
+    stratum; strata at or below the cap are kept whole (exact). Strata are
+    keyed by the same normalized course and teacher values preprocess_data
+    produces, so the sizes line up with the processed sample.
+    
+    Args:
+        df (pd.DataFrame): Raw or processed course data
+        max_rows_per_stratum (int): Row cap per (course, teacher) stratum
+        seed (int, optional): Random seed
+        student_id (str, optional): Student whose rows are always kept
+            (they count toward their strata's caps)
+        
+    Returns:
+        tuple: (sampled DataFrame in source row order,
+            dict of (course, teacher) -> population row count)
+    """
+    courses = df['course_number'].astype(str)
+    teachers = df['teacher_name'].str.strip().str.lower()
+    codes, strata = pd.MultiIndex.from_arrays([courses, teachers]).factorize(use_na_sentinel=False)
+    sizes = np.bincount(codes, minlength=len(strata))
+    
+    # Random priority per row; the first max_rows_per_stratum rows of each stratum are kept
+    priority = np.random.default_rng(seed).random(len(df))
+    if student_id is not None:
+        priority[(df['student_id'].astype(str) == str(student_id)).to_numpy()] = -1.0
+    order = np.lexsort((priority, codes))
+    starts = np.cumsum(sizes) - sizes
+    rank = np.arange(len(df)) - starts[codes[order]]
+    keep = np.sort(order[rank < max_rows_per_stratum])
+    
+    stratum_sizes = {(course, teacher): int(size) for (course, teacher), size in zip(strata, sizes)}
+    return df.iloc[keep].reset_index(drop=True), stratum_sizes
@@ -0,0 +1,68 @@
+"""
+Dataframe Engines Module
+-----------------------
+Selectable implementations of the load / validate / preprocess / analyze
+pipeline. 'pandas' is the eager implementation in data_processor,
+data_validator and analysis_engine; 'polars' (polars_engine) builds lazy
+query plans that Polars optimizes and runs multithreaded. Both produce
+the same complexity_metrics structure, and to_pandas hands the processed
+data to the pandas-based consumers (LLM prompts, similarity, display).
+"""
+
+import data_processor
+import data_validator
+import analysis_engine
+from utils.options import DATAFRAME_ENGINES as ENGINES
+
+
+class PandasEngine:
+    """Eager pandas pipeline."""
+
+    name = 'pandas'
+
+    @staticmethod
+    def load_course_data(file_path, course_id=None, teacher_name=None, student_id=None, shard=None):
+        return data_processor.load_course_data(file_path, course_id=course_id, teacher_name=teacher_name,
+                                               student_id=student_id, shard=shard)
+
+    @staticmethod
+    def validate_course_data(df, max_unit_time=data_validator.MAX_UNIT_TIME,
+                             quarantine_path=data_validator.DEFAULT_QUARANTINE_FILE):
+        return data_validator.validate_course_data(df, max_unit_time, quarantine_path)
+
+    preprocess_data = staticmethod(data_processor.preprocess_data)
+    analyze_course_complexity = staticmethod(analysis_engine.analyze_course_complexity)
+
+    @staticmethod
+    def is_empty(df):
+        return df is None or df.empty
+
+    @staticmethod
+    def collect(df):
+        return df
+
+    @staticmethod
+    def to_pandas(df):
+        return df
+
+
+def get_engine(name='pandas'):
+    """
+    Return the pipeline implementation for an engine name.
+
+    Args:
+        name (str): One of ENGINES
+
+    Returns:
+        PandasEngine or polars_engine.PolarsEngine
+
+    Raises:
+        ImportError: If the engine's library is not installed
+        ValueError: If the name is unknown
+    """
+    if name == 'pandas':
+        return PandasEngine()
+    if name == 'polars':
+        from polars_engine import PolarsEngine
+        return PolarsEngine()
+    raise ValueError(f"Unknown dataframe engine '{name}', expected one of {', '.join(ENGINES)}")
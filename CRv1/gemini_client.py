@@ -0,0 +1,237 @@
+"""
+Gemini Client Module
+-------------------
+Spreads Gemini API calls over a pool of API keys. Each key has token
+buckets for its request and token quotas; every call goes to the key
+with the most headroom, keys that answer 429 are cooled down, and
+per-key usage counters are kept for monitoring.
+"""
+
+import os
+import threading
+import time
+
+
+# Free-tier style defaults; override per deployment
+DEFAULT_REQUESTS_PER_MINUTE = 15
+DEFAULT_TOKENS_PER_MINUTE = 1_000_000
+DEFAULT_COOLDOWN = 60.0
+# Rough prompt size estimate (characters per token) and reserved output tokens
+CHARS_PER_TOKEN = 4
+EXPECTED_OUTPUT_TOKENS = 1024
+
+
+class RateLimitError(Exception):
+    """Raised when no key has quota within the allowed wait time."""
+
+
+def estimate_tokens(prompt):
+    """Estimate the tokens a request will use before it is sent."""
+    return len(prompt) // CHARS_PER_TOKEN + EXPECTED_OUTPUT_TOKENS
+
+
+class TokenBucket:
+    """
+    Continuously refilling budget of `capacity` units per period.
+
+    Args:
+        capacity (float): Units per period, also the burst size
+        period (float): Quota period in seconds
+    """
+
+    def __init__(self, capacity, period=60.0):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def headroom(self):
+        """Fraction of the bucket currently available."""
+        return self.level / self.capacity
+
+    def wait_time(self, amount):
+        """Seconds until `amount` units are available (0 if they already are)."""
+        return max(0.0, (min(amount, self.capacity) - self.level) / self.rate)
+
+    def consume(self, amount):
+        self.level -= amount
+
+
+class KeyState:
+    """Quota buckets, cooldown and usage counters of one API key."""
+
+    def __init__(self, api_key, requests_per_minute, tokens_per_minute, period=60.0, index=0):
+        self.api_key = api_key
+        self.index = index
+        self.requests = TokenBucket(requests_per_minute, period)
+        self.tokens = TokenBucket(tokens_per_minute, period)
+        self.cooldown_until = 0.0
+        self.usage = {'requests': 0, 'tokens': 0, 'rate_limited': 0, 'errors': 0}
+
+    @property
+    def label(self):
+        """Key identifier that is safe to log; the pool index keeps keys with the same suffix apart."""
+        return f"key{self.index}...{self.api_key[-4:]}"
+
+
+class GeminiKeyPool:
+    """
+    Pool of Gemini API keys with token-bucket quota tracking.
+
+    Args:
+        api_keys (list): API keys
+        requests_per_minute (int): Request quota per key
+        tokens_per_minute (int): Token quota per key
+        cooldown (float): Seconds a key is skipped after a 429 without Retry-After
+        max_wait (float): Longest time to wait for quota before raising RateLimitError
+        period (float): Quota period in seconds (a minute for the Gemini quotas)
+    """
+
+    def __init__(self, api_keys, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE, cooldown=DEFAULT_COOLDOWN, max_wait=30.0,
+                 period=60.0):
+        self.keys = [KeyState(key, requests_per_minute, tokens_per_minute, period, index=i)
+                     for i, key in enumerate(api_keys)]
+        self.cooldown = cooldown
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _acquire(self, tokens, deadline):
+        """Reserve quota on the key with the most headroom, waiting until the deadline if every key is exhausted."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                best, best_headroom, next_ready = None, -1.0, None
+                for state in self.keys:
+                    state.requests.refill(now)
+                    state.tokens.refill(now)
+                    ready_at = max(state.cooldown_until,
+                                   now + max(state.requests.wait_time(1), state.tokens.wait_time(tokens)))
+                    if ready_at > now:
+                        next_ready = ready_at if next_ready is None else min(next_ready, ready_at)
+                        continue
+                    headroom = min(state.requests.headroom(), state.tokens.headroom())
+                    if headroom > best_headroom:
+                        best, best_headroom = state, headroom
+                if best is not None:
+                    best.requests.consume(1)
+                    best.tokens.consume(tokens)
+                    best.usage['requests'] += 1
+                    return best
+
+            if next_ready is None or next_ready > deadline:
+                raise RateLimitError(f"No API key has quota within {self.max_wait:.0f} s")
+            time.sleep(max(0.0, next_ready - time.monotonic()))
+
+    def _release(self, state, estimated_tokens, response):
+        """Settle quota with the actual usage and apply 429 cooldowns."""
+        with self._lock:
+            if response is None or response.status_code >= 500:
+                state.usage['errors'] += 1
+                return
+            if response.status_code == 429:
+                state.usage['rate_limited'] += 1
+                retry_after = response.headers.get('Retry-After')
+                try:
+                    cooldown = float(retry_after) if retry_after is not None else self.cooldown
+                except ValueError:
+                    cooldown = self.cooldown
+                state.cooldown_until = time.monotonic() + cooldown
+                return
+
+            used = estimated_tokens
+            if response.status_code == 200:
+                try:
+                    used = response.json().get('usageMetadata', {}).get('totalTokenCount', estimated_tokens)
+                except ValueError:
+                    pass
+            # Refund (or charge) the difference between the estimate and the reported usage
+            state.tokens.consume(used - estimated_tokens)
+            state.usage['tokens'] += used
+
+    def call(self, send, prompt):
+        """
+        Send a request with the best available key, retrying 429s.
+
+        A 429 cools its key down and the request is retried on the next key
+        with headroom, waiting for quota for at most max_wait seconds overall.
+
+        Args:
+            send (callable): send(api_key) -> requests.Response
+            prompt (str): Prompt text, used to estimate the token cost
+
+        Returns:
+            requests.Response: The first non-429 response, or the last 429 if quota never freed up
+
+        Raises:
+            RateLimitError: If no key had quota before any attempt was made
+        """
+        tokens = estimate_tokens(prompt)
+        deadline = time.monotonic() + self.max_wait
+        response = None
+        while True:
+            try:
+                state = self._acquire(tokens, deadline)
+            except RateLimitError:
+                if response is None:
+                    raise
+                return response
+            try:
+                response = send(state.api_key)
+            except Exception:
+                self._release(state, tokens, None)
+                raise
+            self._release(state, tokens, response)
+            if response.status_code != 429:
+                return response
+
+    def usage(self):
+        """
+        Per-key usage counters and current headroom.
+
+        Returns:
+            dict: Key label -> counters
+        """
+        with self._lock:
+            now = time.monotonic()
+            stats = {}
+            for state in self.keys:
+                state.requests.refill(now)
+                state.tokens.refill(now)
+                stats[state.label] = {
+                    **state.usage,
+                    'request_headroom': round(state.requests.headroom(), 3),
+                    'token_headroom': round(state.tokens.headroom(), 3),
+                    'cooling_down': state.cooldown_until > now
+                }
+            return stats
+
+
+def key_pool_from_env(api_key=None):
+    """
+    Build a key pool from a comma-separated key list.
+
+    Keys come from the argument, else GEMINI_API_KEYS, else GEMINI_API_KEY.
+    Quotas can be set with GEMINI_RPM and GEMINI_TPM.
+
+    Returns:
+        GeminiKeyPool or str: A pool for several keys, the single key itself, or None
+    """
+    value = api_key or os.environ.get('GEMINI_API_KEYS') or os.environ.get('GEMINI_API_KEY')
+    if not value:
+        return None
+    keys = [key.strip() for key in value.split(',') if key.strip()]
+    if len(keys) == 1:
+        return keys[0]
+    return GeminiKeyPool(
+        keys,
+        requests_per_minute=int(os.environ.get('GEMINI_RPM', DEFAULT_REQUESTS_PER_MINUTE)),
+        tokens_per_minute=int(os.environ.get('GEMINI_TPM', DEFAULT_TOKENS_PER_MINUTE))
+    )
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Gemini Stand-in Server
+---------------------
+Local stand-in for the Gemini generateContent and streamGenerateContent
+endpoints, so the client, caching and fallback paths can be benchmarked
+deterministically without the network. Point the app at it with
+GEMINI_BASE_URL (or main.py --gemini-url).
+
+In replay mode, responses come from a recordings file (JSONL, one
+request/response per line). Requests are matched on a hash of the model
+and request body; unmatched requests get the recordings of the same model
+in turn, or a synthetic answer when nothing is recorded (--strict answers
+404 instead). Latency, 429s, 5xx errors and slow streaming can be injected
+from a seeded random generator.
+
+In record mode, requests are forwarded to the real API and every response
+is appended to the recordings file (API keys are not recorded).
+
+Usage:
+    python gemini_standin.py --record gemini_recordings.jsonl
+    python gemini_standin.py --replay gemini_recordings.jsonl --latency lognormal:0.8:0.5 --rate-429 0.1
+    GEMINI_BASE_URL=http://127.0.0.1:8089 python app.py
+"""
+
+import re
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from collections import Counter, defaultdict
+
+import requests
+from flask import Flask, Response, jsonify, request
+from werkzeug.serving import make_server
+
+
+DEFAULT_PORT = 8089
+UPSTREAM_URL = 'https://generativelanguage.googleapis.com'
+UPSTREAM_TIMEOUT = 120.0
+# Injected 5xx responses pick one of these
+SERVER_ERROR_CODES = (500, 503)
+DEFAULT_RETRY_AFTER = 1.0
+# Non-streamed recordings are replayed on the streaming endpoint in chunks of this many characters
+STREAM_CHUNK_CHARS = 200
+# Request fields that decide which recording answers it
+REQUEST_KEY_FIELDS = ('contents', 'generationConfig', 'systemInstruction', 'tools')
+SYNTHETIC_CONFIDENCE = 72
+ERROR_STATUSES = {404: 'NOT_FOUND', 429: 'RESOURCE_EXHAUSTED', 500: 'INTERNAL', 503: 'UNAVAILABLE'}
+
+app = Flask(__name__)
+
+settings = {
+    'mode': 'replay',
+    'upstream': UPSTREAM_URL,
+    'latency': None,
+    'rate_429': 0.0,
+    'rate_5xx': 0.0,
+    'retry_after': DEFAULT_RETRY_AFTER,
+    'chunk_delay': 0.0,
+    'chunk_chars': STREAM_CHUNK_CHARS,
+    'strict': False,
+    'record_file': None
+}
+# Request key -> recorded entries, and model -> entries for unmatched requests
+recordings = defaultdict(list)
+recordings_by_model = defaultdict(list)
+# Next entry to replay per key (or per model for unmatched requests)
+replay_positions = Counter()
+stats = Counter()
+state_lock = threading.Lock()
+rng = random.Random(0)
+
+
+def parse_latency(spec):
+    """
+    Parse a latency distribution into a sampler.
+
+    Args:
+        spec (str): 'none', 'fixed:S', 'uniform:LOW:HIGH', 'lognormal:MEDIAN:SIGMA'
+            or 'recorded[:SCALE]' (the upstream time of the replayed recording)
+
+    Returns:
+        callable: (rng, entry) -> seconds, or None for no added latency
+
+    Raises:
+        ValueError: If the spec cannot be parsed
+    """
+    name, _, params = spec.partition(':')
+    try:
+        values = [float(value) for value in params.split(':')] if params else []
+    except ValueError:
+        raise ValueError(f"Invalid latency parameters: {spec}")
+
+    if name == 'none' and not values:
+        return None
+    if name == 'fixed' and len(values) == 1:
+        return lambda generator, entry: values[0]
+    if name == 'uniform' and len(values) == 2:
+        return lambda generator, entry: generator.uniform(values[0], values[1])
+    if name == 'lognormal' and len(values) == 2:
+        return lambda generator, entry: values[0] * generator.lognormvariate(0.0, values[1])
+    if name == 'recorded' and len(values) <= 1:
+        scale = values[0] if values else 1.0
+        return lambda generator, entry: scale * (entry or {}).get('elapsed', 0.0)
+    raise ValueError(f"Invalid latency distribution: {spec} "
+                     f"(use none, fixed:S, uniform:LOW:HIGH, lognormal:MEDIAN:SIGMA or recorded[:SCALE])")
+
+
+def configure(latency=None, rate_429=0.0, rate_5xx=0.0, retry_after=DEFAULT_RETRY_AFTER, chunk_delay=0.0,
+              chunk_chars=STREAM_CHUNK_CHARS, strict=False, seed=0, mode='replay', upstream=UPSTREAM_URL,
+              record_file=None):
+    """
+    Set the stand-in behaviour and reset its statistics and random generator.
+
+    Args:
+        latency (str or callable, optional): Added latency before a response (see parse_latency)
+        rate_429 (float): Fraction of requests answered 429 with Retry-After
+        rate_5xx (float): Fraction of requests answered with a 500 or 503
+        retry_after (float): Retry-After seconds on injected 429s
+        chunk_delay (float): Seconds between streamed chunks
+        chunk_chars (int): Characters per chunk when streaming a non-streamed recording
+        strict (bool): Answer unmatched requests with 404 instead of another recording
+        seed (int): Seed for latency and fault draws
+        mode (str): 'replay' or 'record'
+        upstream (str): API base URL used in record mode
+        record_file (str, optional): JSONL file new recordings are appended to
+    """
+    if isinstance(latency, str):
+        latency = parse_latency(latency)
+    with state_lock:
+        settings.update(latency=latency, rate_429=rate_429, rate_5xx=rate_5xx, retry_after=retry_after,
+                        chunk_delay=chunk_delay, chunk_chars=chunk_chars, strict=strict, mode=mode,
+                        upstream=upstream.rstrip('/'), record_file=record_file)
+        rng.seed(seed)
+        replay_positions.clear()
+        stats.clear()
+
+
+def request_key(model, body):
+    """Hash of the model and the request fields that determine the answer."""
+    fields = {name: body.get(name) for name in REQUEST_KEY_FIELDS if name in body}
+    payload = json.dumps({'model': model, **fields}, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def add_recording(entry):
+    """Make a recorded entry available for replay."""
+    with state_lock:
+        recordings[entry['key']].append(entry)
+        recordings_by_model[entry['model']].append(entry)
+
+
+def load_recordings(path):
+    """
+    Load recordings from a JSONL file.
+
+    Returns:
+        int: Number of recordings loaded (0 if the file does not exist)
+    """
+    count = 0
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    add_recording(json.loads(line))
+                    count += 1
+    except FileNotFoundError:
+        print(f"Warning: Recordings file {path} not found, starting with no recordings")
+    return count
+
+
+def _response_text(response):
+    """Text of the first candidate of a generateContent response ('' if there is none)."""
+    try:
+        return ''.join(part.get('text', '') for part in response['candidates'][0]['content']['parts'])
+    except (KeyError, IndexError, TypeError):
+        return ''
+
+
+def _with_text(response, text):
+    """Copy of a response with its first candidate's text replaced."""
+    response = json.loads(json.dumps(response))
+    response['candidates'][0]['content']['parts'] = [{'text': text}]
+    return response
+
+
+def merge_chunks(chunks):
+    """Combine streamed chunks into one generateContent response."""
+    if len(chunks) == 1:
+        return chunks[0]
+    # The last chunk carries the finish reason and usage metadata
+    return _with_text(chunks[-1], ''.join(_response_text(chunk) for chunk in chunks))
+
+
+def split_response(response, chunk_chars):
+    """Split a generateContent response into streamed chunks of chunk_chars characters."""
+    text = _response_text(response)
+    if len(text) <= chunk_chars:
+        return [response]
+    pieces = [text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)]
+    chunks = []
+    for piece in pieces[:-1]:
+        chunk = _with_text(response, piece)
+        chunk.pop('usageMetadata', None)
+        chunk['candidates'][0].pop('finishReason', None)
+        chunks.append(chunk)
+    chunks.append(_with_text(response, pieces[-1]))
+    return chunks
+
+
+def synthetic_response(body):
+    """
+    A generateContent response for requests with no recording.
+
+    JSON-mode requests (batched insights) get one record per course_id found
+    in the prompt; others get a text answer starting with a confidence score.
+    """
+    prompt = ' '.join(part.get('text', '') for content in body.get('contents', [])
+                      for part in content.get('parts', []))
+    if body.get('generationConfig', {}).get('responseMimeType') == 'application/json':
+        text = json.dumps([{
+            'course_id': course_id,
+            'confidence_score': SYNTHETIC_CONFIDENCE,
+            'complexity': 'Moderate',
+            'recommendation': 'Keep a steady weekly pace and start the most difficult units early.',
+            'estimated_completion': 'about 2 hours'
+        } for course_id in dict.fromkeys(re.findall(r'"course_id":\s*"([^"]+)"', prompt))])
+    else:
+        text = (f"Confidence Score: {SYNTHETIC_CONFIDENCE}\n\n"
+                f"The course complexity is moderate. Plan extra time for the most difficult units "
+                f"and expect the course to take about 2 hours to complete.")
+    return {
+        'candidates': [{'content': {'parts': [{'text': text}], 'role': 'model'}, 'finishReason': 'STOP'}],
+        'usageMetadata': {'promptTokenCount': len(prompt) // 4, 'candidatesTokenCount': len(text) // 4}
+    }
+
+
+def find_recording(model, key):
+    """The next recording for a request key, else for the model (unless strict); None if there is none."""
+    with state_lock:
+        entries = recordings.get(key)
+        if entries:
+            stats['replayed'] += 1
+        elif not settings['strict'] and recordings_by_model.get(model):
+            entries = recordings_by_model[model]
+            key = ('model', model)
+            stats['replayed_unmatched'] += 1
+        else:
+            return None
+        position = replay_positions[key]
+        replay_positions[key] += 1
+        return entries[position % len(entries)]
+
+
+def error_response(status, message):
+    """Gemini-style error body."""
+    return jsonify({'error': {'code': status, 'message': message,
+                              'status': ERROR_STATUSES.get(status, 'UNKNOWN')}}), status
+
+
+def stream_response(chunks, sse):
+    """Stream chunks as server-sent events (alt=sse) or as a JSON array, chunk_delay apart."""
+    chunk_delay = settings['chunk_delay']
+
+    def generate():
+        for i, chunk in enumerate(chunks):
+            if i and chunk_delay:
+                time.sleep(chunk_delay)
+            data = json.dumps(chunk)
+            if sse:
+                yield f"data: {data}\r\n\r\n"
+            else:
+                yield ('[' if i == 0 else ',\r\n') + data + (']' if i == len(chunks) - 1 else '')
+
+    return Response(generate(), mimetype='text/event-stream' if sse else 'application/json')
+
+
+def record(model, method, body):
+    """Forward a request to the real API, save the response and return it."""
+    url = f"{settings['upstream']}/v1beta/models/{model}:{method}"
+    params = {name: value for name, value in request.args.items()}
+    headers = {name: request.headers[name] for name in ('x-goog-api-key',) if name in request.headers}
+    start = time.perf_counter()
+    try:
+        upstream = requests.post(url, params=params, headers=headers, json=body, timeout=UPSTREAM_TIMEOUT)
+    except requests.RequestException as e:
+        print(f"Error forwarding to {url}: {e}")
+        return error_response(503, f"Upstream unavailable: {e}")
+    elapsed = time.perf_counter() - start
+
+    if upstream.status_code != 200:
+        chunks = [upstream.json()] if upstream.headers.get('Content-Type', '').startswith('application/json') \
+            else [{'error': {'code': upstream.status_code, 'message': upstream.text}}]
+    elif method == 'streamGenerateContent' and params.get('alt') == 'sse':
+        chunks = [json.loads(line[len('data:'):]) for line in upstream.text.splitlines() if line.startswith('data:')]
+    elif method == 'streamGenerateContent':
+        chunks = upstream.json()
+    else:
+        chunks = [upstream.json()]
+
+    entry = {'key': request_key(model, body), 'model': model, 'method': method,
+             'status': upstream.status_code, 'elapsed': round(elapsed, 4), 'chunks': chunks}
+    add_recording(entry)
+    if settings['record_file']:
+        with state_lock, open(settings['record_file'], 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+    with state_lock:
+        stats['recorded'] += 1
+
+    if upstream.status_code != 200:
+        return Response(upstream.content, status=upstream.status_code,
+                        content_type=upstream.headers.get('Content-Type', 'application/json'))
+    return Response(upstream.content, content_type=upstream.headers.get('Content-Type', 'application/json'))
+
+
+@app.route('/<version>/models/<path:target>', methods=['POST'])
+def generate(version, target):
+    """generateContent / streamGenerateContent for any model"""
+    model, _, method = target.partition(':')
+    if method not in ('generateContent', 'streamGenerateContent'):
+        return error_response(404, f"Unknown method: {target}")
+    body = request.get_json(silent=True) or {}
+    with state_lock:
+        stats['requests'] += 1
+
+    if settings['mode'] == 'record':
+        return record(model, method, body)
+
+    with state_lock:
+        draw = rng.random()
+    if draw < settings['rate_429']:
+        with state_lock:
+            stats['injected_429'] += 1
+        response, status = error_response(429, 'Resource has been exhausted (e.g. check quota).')
+        response.headers['Retry-After'] = f"{settings['retry_after']:g}"
+        return response, status
+
+    entry = find_recording(model, request_key(model, body))
+    if settings['latency'] is not None:
+        with state_lock:
+            delay = max(0.0, settings['latency'](rng, entry))
+        time.sleep(delay)
+
+    if draw < settings['rate_429'] + settings['rate_5xx']:
+        with state_lock:
+            status = rng.choice(SERVER_ERROR_CODES)
+            stats[f"injected_{status}"] += 1
+        return error_response(status, 'The service is currently unavailable.' if status == 503
+                              else 'An internal error has occurred.')
+
+    if entry is None:
+        if settings['strict']:
+            with state_lock:
+                stats['missed'] += 1
+            return error_response(404, 'No recording for this request')
+        with state_lock:
+            stats['synthetic'] += 1
+        chunks = [synthetic_response(body)]
+        status = 200
+    else:
+        chunks, status = entry['chunks'], entry['status']
+
+    if status != 200:
+        return jsonify(chunks[0]), status
+    if method == 'generateContent':
+        return jsonify(merge_chunks(chunks))
+    if len(chunks) == 1:
+        chunks = split_response(chunks[0], settings['chunk_chars'])
+    return stream_response(chunks, sse=request.args.get('alt') == 'sse')
+
+
+@app.route('/standin/stats')
+def standin_stats():
+    """Request, replay and injected fault counts since the last configure()"""
+    with state_lock:
+        return jsonify(dict(stats, recordings=sum(len(entries) for entries in recordings.values())))
+
+
+def start_server(host='127.0.0.1', port=0):
+    """
+    Serve the stand-in from a background thread (for benchmarks).
+
+    Returns:
+        tuple: (server with a shutdown() method, base URL for GEMINI_BASE_URL)
+    """
+    server = make_server(host, port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Gemini API stand-in with record/replay and fault injection')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--replay', type=str, default=None, metavar='FILE',
+                      help='Replay recordings from this JSONL file (default mode; synthetic answers without one)')
+    mode.add_argument('--record', type=str, default=None, metavar='FILE',
+                      help='Forward requests to the real API and append the responses to this JSONL file')
+    parser.add_argument('--upstream', type=str, default=UPSTREAM_URL,
+                        help='API base URL in record mode')
+    parser.add_argument('--latency', type=parse_latency, default=None,
+                        help='Added latency: fixed:S, uniform:LOW:HIGH, lognormal:MEDIAN:SIGMA or recorded[:SCALE]')
+    parser.add_argument('--rate-429', type=float, default=0.0, metavar='P',
+                        help='Fraction of requests answered 429')
+    parser.add_argument('--retry-after', type=float, default=DEFAULT_RETRY_AFTER, metavar='S',
+                        help='Retry-After seconds on injected 429s')
+    parser.add_argument('--rate-5xx', type=float, default=0.0, metavar='P',
+                        help='Fraction of requests answered 500 or 503 (after the latency)')
+    parser.add_argument('--chunk-delay', type=float, default=0.0, metavar='S',
+                        help='Seconds between streamed chunks')
+    parser.add_argument('--chunk-chars', type=int, default=STREAM_CHUNK_CHARS, metavar='N',
+                        help='Characters per chunk when streaming a non-streamed recording')
+    parser.add_argument('--strict', action='store_true',
+                        help='Answer requests without an exact recording with 404')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed for latency and fault draws')
+    parser.add_argument('--host', type=str, default='127.0.0.1',
+                        help='Listen address')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help='Listen port')
+    return parser.parse_args()
+
+
+def main():
+    """Load recordings and run the stand-in."""
+    args = parse_arguments()
+
+    recordings_file = args.record or args.replay
+    if recordings_file:
+        print(f"Loaded {load_recordings(recordings_file)} recordings from {recordings_file}")
+    configure(latency=args.latency, rate_429=args.rate_429, rate_5xx=args.rate_5xx, retry_after=args.retry_after,
+              chunk_delay=args.chunk_delay, chunk_chars=args.chunk_chars, strict=args.strict, seed=args.seed,
+              mode='record' if args.record else 'replay', upstream=args.upstream, record_file=args.record)
+    print(f"Gemini stand-in ({settings['mode']}) on http://{args.host}:{args.port} - "
+          f"set GEMINI_BASE_URL to this address")
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+"""
+Job Queue Module
+---------------
+Local background job queue for slow work such as LLM insight requests.
+Jobs are accepted immediately and run on in-process worker threads;
+callers poll for the result by job ID. Identical pending or running jobs
+are deduplicated, and jobs can optionally be persisted to SQLite so
+queued work survives a restart.
+"""
+
+import json
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def _percentile(values, pct):
+    """Nearest-rank percentile of a list (None if empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class JobQueue:
+    """
+    Thread-pool job queue with deduplication, optional persistence and latency stats.
+
+    Args:
+        handler (callable): Called as handler(**params) on a worker thread; its
+            return value (JSON-serializable if persisted) is the job result
+        num_workers (int): Number of worker threads
+        db_path (str or Path, optional): SQLite file to persist jobs to
+        result_ttl (float): Seconds finished jobs are kept in memory
+    """
+
+    def __init__(self, handler, num_workers=4, db_path=None, result_ttl=3600):
+        self.handler = handler
+        self.result_ttl = result_ttl
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._finished = threading.Condition(self._lock)
+        self._jobs = {}
+        self._active_by_key = {}
+        self._wait_times = deque(maxlen=1000)
+        self._run_times = deque(maxlen=1000)
+        self._completed = {DONE: 0, FAILED: 0}
+        self._deduplicated = 0
+
+        self._db = None
+        if db_path is not None:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, key TEXT, params TEXT, status TEXT, "
+                "result TEXT, error TEXT, created_at REAL, started_at REAL, finished_at REAL)")
+            self._db.commit()
+            self._recover()
+
+        self._workers = [threading.Thread(target=self._work, daemon=True) for _ in range(num_workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def _persist(self, job):
+        if self._db is None:
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (job['id'], json.dumps(job['key']), json.dumps(job['params']), job['status'],
+             json.dumps(job['result']) if job['result'] is not None else None, job['error'],
+             job['created_at'], job['started_at'], job['finished_at']))
+        self._db.commit()
+
+    def _recover(self):
+        """Re-queue jobs that were pending or running when the process stopped."""
+        rows = self._db.execute(
+            "SELECT id, key, params, created_at FROM jobs WHERE status IN (?, ?)", (PENDING, RUNNING)).fetchall()
+        for job_id, key, params, created_at in rows:
+            key = tuple(json.loads(key))
+            job = self._new_job(key, json.loads(params), job_id, created_at)
+            self._jobs[job_id] = job
+            self._active_by_key[key] = job_id
+            self._queue.put(job_id)
+        if rows:
+            print(f"Recovered {len(rows)} queued jobs")
+
+    @staticmethod
+    def _new_job(key, params, job_id=None, created_at=None):
+        return {
+            'id': job_id or uuid.uuid4().hex,
+            'key': key,
+            'params': params,
+            'status': PENDING,
+            'result': None,
+            'error': None,
+            'created_at': created_at or time.time(),
+            'started_at': None,
+            'finished_at': None
+        }
+
+    def submit(self, params, key=None):
+        """
+        Submit a job, or join an identical pending/running one.
+
+        Args:
+            params (dict): Keyword arguments for the handler
+            key (tuple, optional): Deduplication key; defaults to the sorted params
+
+        Returns:
+            str: Job ID
+        """
+        key = tuple(key) if key is not None else tuple(sorted(params.items()))
+        with self._lock:
+            self._prune()
+            job_id = self._active_by_key.get(key)
+            if job_id is not None:
+                self._deduplicated += 1
+                return job_id
+
+            job = self._new_job(key, params)
+            self._jobs[job['id']] = job
+            self._active_by_key[key] = job['id']
+            self._persist(job)
+        self._queue.put(job['id'])
+        return job['id']
+
+    def get(self, job_id):
+        """
+        Get a job's public state.
+
+        Returns:
+            dict: id, status, result, error and timings, or None if unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT status, result, error, created_at, started_at, finished_at FROM jobs WHERE id = ?",
+                    (job_id,)).fetchone()
+                if row is None:
+                    return None
+                status, result, error, created_at, started_at, finished_at = row
+                job = {'id': job_id, 'status': status, 'result': json.loads(result) if result else None,
+                       'error': error, 'created_at': created_at, 'started_at': started_at,
+                       'finished_at': finished_at}
+            if job is None:
+                return None
+            return {field: job[field] for field in
+                    ('id', 'status', 'result', 'error', 'created_at', 'started_at', 'finished_at')}
+
+    def wait(self, job_id, timeout=None):
+        """
+        Wait up to timeout seconds for a job to finish.
+
+        Returns:
+            dict: The job's public state (possibly still pending/running), or None if unknown
+        """
+        with self._finished:
+            self._finished.wait_for(
+                lambda: job_id not in self._jobs or self._jobs[job_id]['finished_at'] is not None,
+                timeout)
+        return self.get(job_id)
+
+    def stats(self):
+        """
+        Queue depth, job counts and latency percentiles (seconds).
+
+        Returns:
+            dict: Queue statistics
+        """
+        with self._lock:
+            statuses = [job['status'] for job in self._jobs.values()]
+            wait_times = list(self._wait_times)
+            run_times = list(self._run_times)
+            return {
+                'queue_depth': statuses.count(PENDING),
+                'running': statuses.count(RUNNING),
+                'workers': len(self._workers),
+                'completed': self._completed[DONE],
+                'failed': self._completed[FAILED],
+                'deduplicated': self._deduplicated,
+                'wait_time': {'p50': _percentile(wait_times, 50), 'p95': _percentile(wait_times, 95)},
+                'run_time': {'p50': _percentile(run_times, 50), 'p95': _percentile(run_times, 95)}
+            }
+
+    def _prune(self):
+        """Drop finished jobs older than the TTL from memory (they stay in SQLite)."""
+        cutoff = time.time() - self.result_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job['finished_at'] is not None and job['finished_at'] < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _work(self):
+        while True:
+            job_id = self._queue.get()
+            with self._lock:
+                job = self._jobs[job_id]
+                job['status'] = RUNNING
+                job['started_at'] = time.time()
+                self._persist(job)
+
+            try:
+                result, error, status = self.handler(**job['params']), None, DONE
+            except Exception as e:
+                result, error, status = None, str(e), FAILED
+
+            with self._lock:
+                job['result'] = result
+                job['error'] = error
+                job['status'] = status
+                job['finished_at'] = time.time()
+                self._active_by_key.pop(job['key'], None)
+                self._completed[status] += 1
+                self._wait_times.append(job['started_at'] - job['created_at'])
+                self._run_times.append(job['finished_at'] - job['started_at'])
+                self._persist(job)
+                self._finished.notify_all()
+            self._queue.task_done()
@@ -4,12 +4,47 @@ LLM Connector Module
 Handles integration with the Gemini LLM API for generating insights.
 """
 
+import os
 import json
+import math
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
-import pandas as pd
+
+from gemini_client import GeminiKeyPool, CHARS_PER_TOKEN
+from confidence_model import heuristic_confidence
+
+
+# Point at a local stub or proxy with GEMINI_BASE_URL, e.g. gemini_standin.py to measure latency without the real API
+GEMINI_BASE_URL = os.environ.get('GEMINI_BASE_URL', 'https://generativelanguage.googleapis.com')
+GEMINI_MODEL = 'gemini-2.0-flash'
+# Seconds before a Gemini request is abandoned (its caller falls back)
+GEMINI_TIMEOUT = float(os.environ.get('GEMINI_TIMEOUT', '60'))
+
+# Batched insights: several courses per request with a JSON response schema
+BATCH_PROMPT_TOKEN_BUDGET = 8000
+BATCH_OUTPUT_TOKEN_BUDGET = 8000
+# Output tokens reserved per course record in a batched response
+BATCH_OUTPUT_TOKENS_PER_COURSE = 250
+
+BATCH_RESPONSE_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "course_id": {"type": "STRING"},
+            "confidence_score": {"type": "NUMBER"},
+            "complexity": {"type": "STRING"},
+            "most_difficult_unit": {"type": "STRING"},
+            "recommendation": {"type": "STRING"},
+            "estimated_completion": {"type": "STRING"}
+        },
+        "required": ["course_id", "confidence_score", "complexity", "recommendation"]
+    }
+}
 
 
-def get_gemini_insights(processed_data, complexity_metrics, student_id=None, api_key=None, selected_course=None, selected_teacher=None):
+def get_gemini_insights(processed_data, complexity_metrics, student_id=None, api_key=None, selected_course=None, selected_teacher=None, partitions=None):
     """
     Get insights from Gemini LLM based on course data and complexity metrics.
     
@@ -17,9 +52,10 @@ def get_gemini_insights(processed_data, complexity_metrics, student_id=None, api
         processed_data (pd.DataFrame): Processed course data
         complexity_metrics (dict): Dictionary of course complexity metrics
         student_id (str, optional): Student ID for personalized insights
-        api_key (str): Gemini API key
+        api_key (str or GeminiKeyPool): Gemini API key or key pool
         selected_course (str, optional): Specific course selected by the student
         selected_teacher (str, optional): Specific teacher selected by the student
+        partitions (CoursePartitions, optional): Prebuilt partitions of processed_data
         
     Returns:
         dict: Dictionary of insights from Gemini LLM
@@ -29,7 +65,7 @@ def get_gemini_insights(processed_data, complexity_metrics, student_id=None, api
         return {"error": "No API key provided"}
     
     # Prepare data for the prompt
-    prompt_data = prepare_prompt_data(processed_data, complexity_metrics, student_id, selected_course, selected_teacher)
+    prompt_data = prepare_prompt_data(processed_data, complexity_metrics, student_id, selected_course, selected_teacher, partitions)
     
     # Generate the prompt
     prompt = generate_prompt(prompt_data)
@@ -43,7 +79,7 @@ def get_gemini_insights(processed_data, complexity_metrics, student_id=None, api
         return {"error": str(e)}
 
 
-def prepare_prompt_data(processed_data, complexity_metrics, student_id=None, selected_course=None, selected_teacher=None):
+def prepare_prompt_data(processed_data, complexity_metrics, student_id=None, selected_course=None, selected_teacher=None, partitions=None):
     """
     Prepare data to be included in the Gemini prompt.
     
@@ -53,6 +89,8 @@ def prepare_prompt_data(processed_data, complexity_metrics, student_id=None, sel
         student_id (str, optional): Student ID for personalized insights
         selected_course (str, optional): Specific course selected by the student
         selected_teacher (str, optional): Specific teacher selected by the student
+        partitions (CoursePartitions, optional): Prebuilt partitions of processed_data;
+            when given, course comparisons use slice views instead of masks
         
     Returns:
         dict: Data to be included in the prompt
@@ -97,6 +135,22 @@ def prepare_prompt_data(processed_data, complexity_metrics, student_id=None, sel
                 "avg_total_time": teacher_data["avg_total_time"]
             }
         
+        # Trend slopes (change per term) when the metrics include a time dimension
+        trends = metrics.get("trends")
+        if trends:
+            slopes = trends["slopes"]
+            course_info["trend"] = {
+                "terms": trends["terms"],
+                "avg_completion_time_change_per_term": slopes["avg_total_completion_time"],
+                "complexity_change_per_term": slopes["complexity_score"],
+                "unit_difficulty_change_per_term": {
+                    unit: slope for unit, slope in slopes["unit_difficulty"].items() if slope is not None
+                }
+            }
+            if "selected_teacher" in course_info:
+                course_info["selected_teacher"]["efficiency_change_per_term"] = \
+                    slopes["teacher_efficiency"].get(selected_teacher)
+        
         prompt_data["courses"].append(course_info)
     
     # Add student-specific data if provided
@@ -114,12 +168,16 @@ def prepare_prompt_data(processed_data, complexity_metrics, student_id=None, sel
         
         # Calculate how the student compares to average in completed courses
         for course in student_courses:
-            course_df = processed_data[processed_data["course_number"] == course]
-            student_course_df = student_df[student_df["course_number"] == course]
+            if partitions is not None and course in partitions:
+                course_times = partitions.course_total_time(course)
+                student_times = course_times[partitions.course_student_ids(course) == student_id]
+            else:
+                course_times = processed_data.loc[processed_data["course_number"] == course, "total_time"].to_numpy()
+                student_times = student_df.loc[student_df["course_number"] == course, "total_time"].to_numpy()
             
-            if not student_course_df.empty:
-                avg_course_time = course_df["total_time"].mean()
-                student_time = student_course_df["total_time"].iloc[0]
+            if len(student_times) > 0:
+                avg_course_time = course_times.mean()
+                student_time = student_times[0]
                 
                 # Calculate relative performance (1.0 means average, < 1.0 means faster than average)
                 relative_performance = student_time / avg_course_time if avg_course_time > 0 else 1.0
@@ -127,7 +185,7 @@ def prepare_prompt_data(processed_data, complexity_metrics, student_id=None, sel
                 student_info["performance_metrics"][course] = {
                     "total_time": student_time,
                     "relative_performance": relative_performance,
-                    "percentile": (course_df["total_time"] > student_time).mean() * 100
+                    "percentile": (course_times > student_time).mean() * 100
                 }
         
         prompt_data["student_info"] = student_info
@@ -179,6 +237,13 @@ def generate_prompt(prompt_data):
     The student has specifically selected professor {selected_teacher} for course {selected_course}.
         """
     
+    if any("trend" in course for course in filtered_courses):
+        prompt += """
+    "trend" values are least-squares changes per term over the listed terms: positive completion time,
+    complexity or difficulty changes mean the course has been getting harder; a falling efficiency score
+    means the teacher's students have been getting faster relative to the course.
+        """
+    
     # Request specific insights
     prompt += f"""
     Based on this data, please provide:
@@ -218,27 +283,37 @@ def generate_prompt(prompt_data):
     return prompt
 
 
+def _post_gemini(data, api_key, prompt):
+    """POST a generateContent request with a single key or through a key pool."""
+    api_url = f"{GEMINI_BASE_URL}/v1beta/models/{GEMINI_MODEL}:generateContent"
+    
+    def send(key):
+        return requests.post(api_url, params={'key': key}, headers={"Content-Type": "application/json"}, json=data,
+                             timeout=GEMINI_TIMEOUT)
+    
+    if isinstance(api_key, GeminiKeyPool):
+        # Route to the key with the most quota headroom, retrying 429s on other keys
+        return api_key.call(send, prompt)
+    return send(api_key)
+
+
 def call_gemini_api(prompt, api_key, prompt_data=None):
     """
     Call the Gemini API with the generated prompt.
     
     Args:
         prompt (str): Prompt for Gemini
-        api_key (str): Gemini API key
+        api_key (str or GeminiKeyPool): Gemini API key, or a pool of keys to spread calls over
         prompt_data (dict, optional): Original prompt data for reference
         
     Returns:
         dict: Parsed response from Gemini
     """
     print("\n===== GEMINI API DEBUG =====")
-    print(f"API Key (first 5 chars): {api_key[:5]}...")
-    
-    # Updated to use the Gemini 2.0 Flash API endpoint
-    api_url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={api_key}"
-    
-    headers = {
-        "Content-Type": "application/json"
-    }
+    if isinstance(api_key, GeminiKeyPool):
+        print(f"API key pool: {len(api_key)} keys")
+    else:
+        print(f"API Key (first 5 chars): {api_key[:5]}...")
     
     # Format the request based on the provided example
     data = {
@@ -253,13 +328,13 @@ def call_gemini_api(prompt, api_key, prompt_data=None):
         ]
     }
     
-    print(f"API URL: {api_url.replace(api_key, 'API_KEY_HIDDEN')}")
+    print(f"API URL: {GEMINI_BASE_URL}/v1beta/models/{GEMINI_MODEL}:generateContent?key=API_KEY_HIDDEN")
     print(f"Prompt length: {len(prompt)} characters")
     print(f"First 100 chars of prompt: {prompt[:100]}...")
     
     try:
         print("Sending request to Gemini API...")
-        response = requests.post(api_url, headers=headers, json=data)
+        response = _post_gemini(data, api_key, prompt)
         
         print(f"Response status code: {response.status_code}")
         
@@ -383,3 +458,204 @@ def call_gemini_api(prompt, api_key, prompt_data=None):
         
     except (KeyError, IndexError) as e:
         raise Exception(f"Unexpected API response format: {str(e)}")
+
+
+def generate_batch_prompt(courses, student_info=None):
+    """
+    Generate a prompt asking for one insights record per course.
+    
+    Args:
+        courses (list): Course entries from prepare_prompt_data
+        student_info (dict, optional): Student entry from prepare_prompt_data
+        
+    Returns:
+        str: Prompt for Gemini
+    """
+    prompt = f"""
+    You are an educational advisor AI that helps students understand course complexity and provides confidence estimates.
+    
+    Here is data about {len(courses)} courses, their complexity, and completion times:
+    ```json
+    {json.dumps(courses, separators=(',', ':'))}
+    ```
+    """
+    
+    if student_info:
+        prompt += f"""
+    The estimates are for this student:
+    ```json
+    {json.dumps(student_info, separators=(',', ':'))}
+    ```
+    """
+    
+    prompt += """
+    Return a JSON array with exactly one object per course above, using its course_id. For each course give:
+    a confidence score from 0-100 for a new student (higher means more confidence), the complexity level
+    (Easy, Moderate, Challenging or Very Difficult), the most difficult unit, a brief recommendation with
+    tips focusing on the most difficult units, and a realistic estimated completion time.
+    """
+    return prompt
+
+
+def _estimate_prompt_tokens(text):
+    return len(text) // CHARS_PER_TOKEN
+
+
+def plan_batches(courses, student_info=None, prompt_token_budget=BATCH_PROMPT_TOKEN_BUDGET,
+                 output_token_budget=BATCH_OUTPUT_TOKEN_BUDGET):
+    """
+    Pack courses into batches that fit the prompt and output token budgets.
+    
+    The batch size adapts to the data: courses with many teachers take more
+    prompt tokens, so fewer of them fit in one request.
+    
+    Args:
+        courses (list): Course entries from prepare_prompt_data
+        student_info (dict, optional): Student entry, repeated in every batch
+        prompt_token_budget (int): Estimated prompt tokens per request
+        output_token_budget (int): Estimated response tokens per request
+        
+    Returns:
+        list: Lists of course entries
+    """
+    overhead = _estimate_prompt_tokens(generate_batch_prompt([], student_info))
+    max_courses = max(1, output_token_budget // BATCH_OUTPUT_TOKENS_PER_COURSE)
+    
+    batches = []
+    batch, batch_tokens = [], overhead
+    for course in courses:
+        course_tokens = _estimate_prompt_tokens(json.dumps(course, separators=(',', ':'))) + 1
+        if batch and (batch_tokens + course_tokens > prompt_token_budget or len(batch) >= max_courses):
+            batches.append(batch)
+            batch, batch_tokens = [], overhead
+        batch.append(course)
+        batch_tokens += course_tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _call_batch(courses, student_info, api_key):
+    """Send one batch and parse its records, keyed by course ID."""
+    prompt = generate_batch_prompt(courses, student_info)
+    data = {
+        "contents": [{"parts": [{"text": prompt}]}],
+        "generationConfig": {
+            "responseMimeType": "application/json",
+            "responseSchema": BATCH_RESPONSE_SCHEMA
+        }
+    }
+    response = _post_gemini(data, api_key, prompt)
+    if response.status_code != 200:
+        raise Exception(f"API request failed with status code {response.status_code}: {response.text}")
+    
+    text_response = response.json()["candidates"][0]["content"]["parts"][0]["text"]
+    records = json.loads(text_response)
+    courses_by_id = {course["course_id"]: course for course in courses}
+    
+    insights = {}
+    for record in records:
+        course_id = str(record.get("course_id")) if isinstance(record, dict) else None
+        if course_id not in courses_by_id:
+            continue
+        # A malformed record only costs its own course, which gets the metrics-based fallback
+        try:
+            insights[course_id] = _parse_batch_record(record)
+        except (TypeError, ValueError) as e:
+            print(f"Warning: Invalid batched record for {course_id} ({str(e)}), using fallback insights")
+            insights[course_id] = _fallback_batch_insight(courses_by_id[course_id])
+    return insights
+
+
+def _parse_batch_record(record):
+    """
+    Convert one batched response record into course insights.
+    
+    Raises:
+        TypeError, ValueError: If the confidence score is missing, null or not a finite number
+    """
+    confidence_score = float(record.get("confidence_score"))
+    if not math.isfinite(confidence_score):
+        raise ValueError(f"confidence_score is {confidence_score}")
+    return {
+        "confidence_score": round(min(100, max(0, confidence_score)), 1),
+        "complexity": record.get("complexity", "Unknown"),
+        "confidence": "Moderate",
+        "most_difficult_unit": record.get("most_difficult_unit"),
+        "recommendation": record.get("recommendation", ""),
+        "estimated_completion": record.get("estimated_completion", "")
+    }
+
+
+def _fallback_batch_insight(course):
+    """Course insights from a batch course entry's metrics alone, for records the LLM got wrong."""
+    complexity = course["complexity"]
+    return {
+        "confidence_score": round(heuristic_confidence(complexity["score"]), 1),
+        "complexity": complexity["category"],
+        "confidence": "Moderate",
+        "most_difficult_unit": complexity["most_difficult_unit"],
+        "recommendation": f"Based on the course complexity ({complexity['category']}), we estimate a moderate "
+                          f"confidence level. Focus on steady progress through each unit.",
+        "estimated_completion": f"Estimated completion time: {course['avg_completion_time'] / 60:.1f} hours",
+        "source": "fallback"
+    }
+
+
+def get_batched_insights(processed_data, complexity_metrics, student_id=None, api_key=None, partitions=None,
+                         prompt_token_budget=BATCH_PROMPT_TOKEN_BUDGET, max_workers=4):
+    """
+    Get per-course insights for every course, several courses per request.
+    
+    Courses are packed into batches that fit the token budget, each batch
+    asks for JSON records matching BATCH_RESPONSE_SCHEMA, and batches are
+    sent concurrently, so N courses cost about N/K round trips.
+    
+    Args:
+        processed_data (pd.DataFrame): Processed course data
+        complexity_metrics (dict): Dictionary of course complexity metrics
+        student_id (str, optional): Student ID for personalized insights
+        api_key (str or GeminiKeyPool): Gemini API key or key pool
+        partitions (CoursePartitions, optional): Prebuilt partitions of processed_data
+        prompt_token_budget (int): Estimated prompt tokens per request
+        max_workers (int): Concurrent requests
+        
+    Returns:
+        dict: Insights with 'course_insights' for every course that was answered
+    """
+    if not api_key:
+        print("Warning: No API key provided for Gemini LLM")
+        return {"error": "No API key provided"}
+    
+    prompt_data = prepare_prompt_data(processed_data, complexity_metrics, student_id, partitions=partitions)
+    batches = plan_batches(prompt_data["courses"], prompt_data["student_info"], prompt_token_budget)
+    print(f"Requesting insights for {len(prompt_data['courses'])} courses in {len(batches)} batches...")
+    
+    def run(batch):
+        try:
+            return _call_batch(batch, prompt_data["student_info"], api_key)
+        except Exception as e:
+            print(f"Error in insights batch ({batch[0]['course_id']}...): {str(e)}")
+            return {}
+    
+    course_insights = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for result in executor.map(run, batches):
+            course_insights.update(result)
+    
+    if not course_insights:
+        return {"error": "No batch returned insights"}
+    
+    missing = len(prompt_data["courses"]) - len(course_insights)
+    if missing:
+        print(f"Warning: {missing} courses are missing from the batched responses")
+    
+    scores = [insight["confidence_score"] for insight in course_insights.values()]
+    return {
+        "course_insights": course_insights,
+        "student_insights": None,
+        "confidence_score": round(sum(scores) / len(scores), 1),
+        "batches": len(batches),
+        "raw_response": f"Batched insights for {len(course_insights)} of {len(prompt_data['courses'])} courses "
+                        f"({len(batches)} requests)."
+    }
@@ -7,29 +7,77 @@ based on historical student completion times and leverages Gemini LLM
 for generating insights.
 """
 
-import os
+import sys
 import argparse
-from pathlib import Path
 
-from data_processor import load_course_data, preprocess_data
-from analysis_engine import analyze_course_complexity
-from llm_connector import get_gemini_insights
-from utils.display import display_results
+# Heavy modules (pandas, numpy, requests) are imported inside main() only
+# once a stage needs them, so --help and argument errors return instantly.
+from utils.data_paths import resolve_data_paths
+from utils.options import EXPORT_FORMATS, DATAFRAME_ENGINES, parquet_available
+
+
+def non_negative_int(value):
+    """Argparse type for counts where 0 is allowed (e.g. --top 0 for no limit)."""
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"expected a non-negative integer, got {value}")
+    return number
 
 
 def parse_arguments():
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(description='Course Complexity Analyzer')
-    parser.add_argument('--data', '-d', type=str, required=True,
-                        help='Path to the CSV file with course data')
+    parser.add_argument('--data', '-d', type=str, nargs='+', required=True,
+                        help='CSV file(s), directory or glob pattern with course data')
     parser.add_argument('--student', '-s', type=str, default=None,
                         help='Student ID for personalized confidence estimation')
     parser.add_argument('--course', '-c', type=str, default=None,
                         help='Course number to analyze (if not set, analyzes all courses)')
     parser.add_argument('--visualize', '-v', action='store_true',
                         help='Generate visualizations of the analysis')
+    parser.add_argument('--chart-dir', type=str, default='course_charts',
+                        help='Report directory for --visualize charts')
+    parser.add_argument('--sort', type=str, default=None, choices=['complexity', 'course'],
+                        help='Sort the report by complexity score (hardest first) or course number')
+    parser.add_argument('--top', type=non_negative_int, default=None, metavar='N',
+                        help='Only report the first N courses (e.g. --sort complexity --top 20; 0 means no limit)')
+    parser.add_argument('--category', type=str, nargs='+', default=None,
+                        choices=['Easy', 'Moderate', 'Challenging', 'Very Difficult'],
+                        help='Only report courses in these complexity categories')
+    parser.add_argument('--output', '-o', type=str, default=None,
+                        help='Write the report to this file instead of the terminal')
+    parser.add_argument('--pager', action='store_true',
+                        help='Show the report in a pager')
     parser.add_argument('--api-key', '-k', type=str, default=None,
-                        help='Gemini API key (if not set, will look for GEMINI_API_KEY env variable)')
+                        help='Gemini API key, or comma-separated keys (if not set, will look for GEMINI_API_KEYS/GEMINI_API_KEY)')
+    parser.add_argument('--gemini-url', type=str, default=None,
+                        help='Gemini API base URL, e.g. a local gemini_standin.py (default: GEMINI_BASE_URL or the real API)')
+    parser.add_argument('--batch', action='store_true',
+                        help='Get structured insights for every course, several courses per LLM request')
+    parser.add_argument('--batch-tokens', type=int, default=8000, metavar='TOKENS',
+                        help='Prompt token budget per batched request (default: 8000)')
+    parser.add_argument('--bootstrap', '-b', type=int, default=0, metavar='RESAMPLES',
+                        help='Add bootstrap confidence intervals using this many resamples')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Random seed for the bootstrap and --sample')
+    parser.add_argument('--sample', type=int, default=None, metavar='M',
+                        help='Approximate mode: analyze a stratified sample of at most M rows per course '
+                             'and teacher, with standard errors')
+    parser.add_argument('--trends', type=int, default=0, metavar='TERMS',
+                        help='Add per-term metrics, rolling windows of TERMS terms and trend slopes '
+                             '(needs a term or completion_date column)')
+    parser.add_argument('--similar', type=int, default=0, metavar='K',
+                        help='Show the K most similar courses (and teacher sections with --course)')
+    parser.add_argument('--engine', type=str, default='pandas', choices=DATAFRAME_ENGINES,
+                        help='Dataframe engine for loading, preprocessing and analysis (polars runs lazy, '
+                             'multithreaded query plans)')
+    parser.add_argument('--quarantine', '-q', type=str, default='quarantined_rows.csv',
+                        help='CSV file for rows that fail data validation')
+    parser.add_argument('--export', '-e', type=str, default=None,
+                        help='Directory to export the complexity metrics to (JSON and flat tables)')
+    parser.add_argument('--export-format', type=str, nargs='+', default=['json', 'csv'],
+                        choices=EXPORT_FORMATS,
+                        help='Export formats to write (default: json csv)')
     
     return parser.parse_args()
 
@@ -38,40 +86,129 @@ def main():
     """Main function to run the course complexity analyzer."""
     args = parse_arguments()
     
-    # Set up API key
-    api_key = args.api_key or os.environ.get('GEMINI_API_KEY')
+    # Set up API key; several comma-separated keys are used as a quota-aware pool
+    from gemini_client import key_pool_from_env
+    api_key = key_pool_from_env(args.api_key)
     if not api_key:
         print("Error: Gemini API key not provided. Set it with --api-key or GEMINI_API_KEY environment variable.")
         return
     
-    # Check if data file exists
-    data_path = Path(args.data)
-    if not data_path.exists():
-        print(f"Error: Data file {args.data} not found.")
+    # Check if data files exist
+    data_source = args.data[0] if len(args.data) == 1 else args.data
+    data_paths = resolve_data_paths(data_source)
+    if not data_paths:
+        print(f"Error: Data file {' '.join(args.data)} not found.")
+        return
+    
+    if args.engine != 'pandas' and (args.sample or args.bootstrap or args.trends):
+        print("Error: --sample, --bootstrap and --trends are only supported with the pandas engine.")
+        return
+    
+    # Fail before the analysis runs rather than after it, when the export is written
+    if args.export and 'parquet' in args.export_format and not parquet_available():
+        print("Error: Parquet export requires pyarrow. Install with 'pip install pyarrow'")
+        sys.exit(1)
+    
+    from dataframe_engines import get_engine
+    from data_validator import print_validation_report
+    
+    try:
+        engine = get_engine(args.engine)
+    except ImportError as e:
+        print(f"Error: {e}")
         return
     
-    print(f"Loading course data from {args.data}...")
-    raw_data = load_course_data(data_path)
+    print(f"Loading course data from {len(data_paths)} file(s)...")
+    # With --course, only that course (plus the student's history) is read and preprocessed.
+    # Similarity search compares against every course, so --similar reads everything.
+    pushdown_course = None if args.similar else args.course
+    raw_data = engine.load_course_data(
+        data_source,
+        course_id=pushdown_course,
+        student_id=args.student if pushdown_course else None
+    )
     
-    if raw_data.empty:
+    if engine.is_empty(raw_data):
         print("Error: No data found or unable to parse the CSV file.")
         return
     
+    print("Validating data...")
+    raw_data, validation_report = engine.validate_course_data(raw_data, quarantine_path=args.quarantine)
+    print_validation_report(validation_report)
+    if validation_report['rows_checked'] == validation_report['rows_quarantined']:
+        print("Error: No valid rows left after validation.")
+        return
+    
+    stratum_sizes = None
+    if args.sample:
+        from data_processor import stratified_sample
+        
+        # Sample before preprocessing so the remaining stages scale with the sample
+        total_rows = len(raw_data)
+        raw_data, stratum_sizes = stratified_sample(raw_data, args.sample, seed=args.seed, student_id=args.student)
+        print(f"Sampled {len(raw_data)} of {total_rows} rows (at most {args.sample} per course and teacher)")
+    
     print("Preprocessing data...")
-    processed_data = preprocess_data(raw_data)
+    # Lazy engines run the whole load/filter/preprocess plan here, once
+    processed_data = engine.collect(engine.preprocess_data(raw_data))
     
     print("Analyzing course complexity...")
     course_id = args.course
-    complexity_metrics = analyze_course_complexity(processed_data, course_id)
+    if args.engine == 'pandas':
+        complexity_metrics = engine.analyze_course_complexity(
+            processed_data, None if args.similar else course_id,
+            bootstrap_resamples=args.bootstrap,
+            bootstrap_seed=args.seed,
+            stratum_sizes=stratum_sizes,
+            trend_window=args.trends
+        )
+    else:
+        complexity_metrics = engine.analyze_course_complexity(processed_data, None if args.similar else course_id)
+    # LLM prompts, similarity and display work on pandas
+    processed_data = engine.to_pandas(processed_data)
+    
+    if args.similar:
+        from similarity_index import SimilarityIndex
+        from utils.display import display_similar
+        
+        print("Building similarity index...")
+        similarity_index = SimilarityIndex().build(complexity_metrics)
+        display_similar(similarity_index, args.similar, course_id)
+        if course_id:
+            complexity_metrics = {course_id: complexity_metrics[course_id]} if course_id in complexity_metrics else {}
+    
+    if args.export:
+        from metrics_exporter import export_complexity_metrics
+        
+        print(f"Exporting complexity metrics to {args.export}...")
+        written = export_complexity_metrics(complexity_metrics, args.export, args.export_format)
+        for path in written:
+            print(f"  - {path}")
     
     # Get insights from Gemini LLM
     print("Generating insights using Gemini LLM...")
+    import llm_connector
+    from llm_connector import get_gemini_insights, get_batched_insights
+    from utils.display import display_results
+    
+    if args.gemini_url:
+        llm_connector.GEMINI_BASE_URL = args.gemini_url.rstrip('/')
+    
     student_id = args.student
-    insights = get_gemini_insights(processed_data, complexity_metrics, student_id, api_key)
+    if args.batch and len(complexity_metrics) > 1:
+        # One structured record per course, several courses per request
+        insights = get_batched_insights(processed_data, complexity_metrics, student_id, api_key,
+                                        prompt_token_budget=args.batch_tokens)
+    else:
+        insights = get_gemini_insights(processed_data, complexity_metrics, student_id, api_key)
     
     # Display results
     print("\n--- Analysis Results ---")
-    display_results(complexity_metrics, insights, args.visualize)
+    display_results(complexity_metrics, insights, args.visualize, args.chart_dir,
+                    sort_by=args.sort, top=args.top, categories=args.category,
+                    output='pager' if args.pager else args.output,
+                    # Without --course every dataset course was analyzed, so charts of others are stale
+                    known_courses=None if course_id else list(complexity_metrics))
     
     print("\nAnalysis complete!")
 
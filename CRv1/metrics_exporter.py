@@ -0,0 +1,171 @@
+"""
+Metrics Exporter Module
+----------------------
+Exports complexity metrics as flat course, unit and teacher tables
+(CSV/Parquet) and as JSON, so dashboards can load precomputed results.
+"""
+
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.options import EXPORT_FORMATS, parquet_available
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _split_intervals(metrics):
+    """Expand (low, high) interval values such as 'complexity_ci' into '_low'/'_high' columns."""
+    flat = {}
+    for key, value in metrics.items():
+        if isinstance(value, tuple) and len(value) == 2:
+            flat[f"{key}_low"], flat[f"{key}_high"] = value
+        else:
+            flat[key] = value
+    return flat
+
+
+def flatten_complexity_metrics(complexity_metrics):
+    """
+    Flatten the nested complexity metrics into course, unit and teacher tables.
+
+    Args:
+        complexity_metrics (dict): Course complexity metrics from analyze_course_complexity
+
+    Returns:
+        dict: DataFrames keyed by 'courses', 'units' and 'teachers'
+    """
+    course_rows = []
+    unit_rows = []
+    teacher_rows = []
+
+    for course_id, metrics in complexity_metrics.items():
+        course_rows.append({
+            'course_number': course_id,
+            **metrics['course_metrics'],
+            **_split_intervals(metrics['overall_complexity'])
+        })
+
+        for unit, unit_data in metrics['unit_metrics'].items():
+            unit_rows.append({
+                'course_number': course_id,
+                'unit': unit,
+                **_split_intervals(unit_data)
+            })
+
+        for teacher, teacher_data in metrics['teacher_metrics'].items():
+            row = {
+                'course_number': course_id,
+                'teacher_name': teacher,
+                'num_students': teacher_data['num_students'],
+                'avg_total_time': teacher_data['avg_total_time'],
+                'efficiency_score': teacher_data['efficiency_score']
+            }
+            # Sample size and standard errors in approximate (--sample) mode
+            for key in ('sampled_students', 'avg_total_time_se', 'efficiency_score_se'):
+                if key in teacher_data:
+                    row[key] = teacher_data[key]
+            # One column per unit, e.g. unit1_avg_time
+            for unit_col, avg_time in teacher_data['avg_time_per_unit'].items():
+                row[f"{unit_col.replace('_time', '')}_avg_time"] = avg_time
+            teacher_rows.append(row)
+
+    return {
+        'courses': pd.DataFrame(course_rows),
+        'units': pd.DataFrame(unit_rows),
+        'teachers': pd.DataFrame(teacher_rows)
+    }
+
+
+def _to_builtin(value):
+    """Convert numpy scalars/arrays to JSON-safe builtins (NaN becomes null)."""
+    if isinstance(value, dict):
+        return {str(k): _to_builtin(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_builtin(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return _to_builtin(value.tolist())
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def dumps_metrics(complexity_metrics):
+    """
+    Serialize complexity metrics to JSON bytes.
+
+    Uses orjson (with native numpy support) when installed and falls back
+    to the standard library encoder otherwise.
+
+    Args:
+        complexity_metrics (dict): Course complexity metrics
+
+    Returns:
+        bytes: UTF-8 encoded JSON document
+    """
+    if orjson is not None:
+        # orjson writes NaN/inf as null, which keeps the document valid JSON
+        return orjson.dumps(
+            complexity_metrics,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+
+    return json.dumps(_to_builtin(complexity_metrics), allow_nan=False).encode('utf-8')
+
+
+def export_complexity_metrics(complexity_metrics, output_dir, formats=('json', 'csv')):
+    """
+    Write complexity metrics to an output directory.
+
+    Args:
+        complexity_metrics (dict): Course complexity metrics
+        output_dir (str or Path): Directory to write the export files to
+        formats (iterable): Any of 'json', 'csv' and 'parquet'
+
+    Returns:
+        list: Paths of the files that were written
+
+    Raises:
+        ImportError: If 'parquet' is requested and no Parquet engine (pyarrow) is installed
+    """
+    if 'parquet' in formats and not parquet_available():
+        raise ImportError("Parquet export requires pyarrow. Install with 'pip install pyarrow'")
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+
+    unknown = [fmt for fmt in formats if fmt not in EXPORT_FORMATS]
+    if unknown:
+        print(f"Warning: Ignoring unknown export formats {unknown}")
+
+    if 'json' in formats:
+        json_path = output_dir / 'complexity_metrics.json'
+        json_path.write_bytes(dumps_metrics(complexity_metrics))
+        written.append(json_path)
+
+    tables = None
+    if 'csv' in formats or 'parquet' in formats:
+        tables = flatten_complexity_metrics(complexity_metrics)
+
+    if 'csv' in formats:
+        for name, table in tables.items():
+            csv_path = output_dir / f"{name}.csv"
+            table.to_csv(csv_path, index=False)
+            written.append(csv_path)
+
+    if 'parquet' in formats:
+        for name, table in tables.items():
+            parquet_path = output_dir / f"{name}.parquet"
+            table.to_parquet(parquet_path, index=False)
+            written.append(parquet_path)
+
+    return written
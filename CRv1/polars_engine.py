@@ -0,0 +1,355 @@
+"""
+Polars Engine Module
+-------------------
+Lazy Polars implementation of the load / validate / preprocess / analyze
+pipeline. Loading only builds a scan with the course, teacher, student
+and shard filters pushed into it; validation rules, preprocessing
+(including the per-course outlier windows) and the course, unit and
+teacher aggregations are all expressions in query plans that Polars
+optimizes and runs multithreaded. Results use the same complexity_metrics
+structure as analysis_engine.
+"""
+
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analysis_engine import calculate_overall_complexity, difficulty_from_stats
+from course_shards import course_shard
+from data_processor import UNIT_COL_PATTERN
+from data_validator import MAX_UNIT_TIME, DEFAULT_QUARANTINE_FILE
+from utils.data_paths import resolve_data_paths
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+
+ID_COLUMNS = ('course_number', 'teacher_name', 'student_id')
+
+
+def _unit_columns(names):
+    """'unitX_time' columns among names, ordered by unit number."""
+    return sorted((name for name in names if UNIT_COL_PATTERN.match(name)),
+                  key=lambda name: int(UNIT_COL_PATTERN.match(name).group(1)))
+
+
+def _scan_csv(path):
+    # Ids are always strings, as course numbers are after pandas preprocessing
+    return pl.scan_csv(path, schema_overrides={column: pl.String for column in ID_COLUMNS},
+                       infer_schema_length=10_000)
+
+
+def _shard_filter(shard):
+    """Predicate keeping the rows of courses owned by a shard (hashing each distinct course once per batch)."""
+    shard_index, num_shards = shard
+
+    def owned(courses):
+        owners = {course: course_shard(course, num_shards) for course in courses.unique().to_list()}
+        return courses.replace_strict(owners, return_dtype=pl.Int64) == shard_index
+
+    return pl.col('course_number').map_batches(owned, return_dtype=pl.Boolean)
+
+
+def load_course_data(file_path, course_id=None, teacher_name=None, student_id=None, shard=None):
+    """
+    Build a lazy scan of course data from one or more CSV files.
+
+    Same sources and filters as data_processor.load_course_data; nothing is
+    read until the plan is collected, and the filters run inside the scan.
+
+    Returns:
+        pl.LazyFrame: Lazy course data, or None if the files are missing or malformed
+    """
+    paths = resolve_data_paths(file_path)
+    if not paths:
+        print(f"Error: No CSV files found for {file_path}")
+        return None
+
+    try:
+        if len(paths) == 1 and Path(paths[0]) == Path(str(file_path)):
+            lf = _scan_csv(paths[0])
+        else:
+            # Union schema: courses with fewer units get nulls in the missing unit columns
+            lf = pl.concat([_scan_csv(path).with_columns(pl.lit(str(path)).alias('source_file'))
+                            for path in paths], how='diagonal_relaxed')
+        names = lf.collect_schema().names()
+    except Exception as e:
+        print(f"Error loading data: {str(e)}")
+        return None
+
+    if not all(column in names for column in ID_COLUMNS):
+        print(f"Error: CSV must contain columns {list(ID_COLUMNS)}")
+        return None
+    unit_cols = _unit_columns(names)
+    if not unit_cols:
+        print("Error: No unit completion time columns found (expected format: 'unitX_time')")
+        return None
+    other_cols = [name for name in names if name not in unit_cols and name != 'source_file']
+    lf = lf.select(other_cols + unit_cols + (['source_file'] if 'source_file' in names else []))
+
+    if course_id is not None or student_id is not None:
+        # The selected course plus every course the student has taken
+        courses = [pl.LazyFrame({'course_number': [str(course_id)]})] if course_id is not None else []
+        if student_id is not None:
+            courses.append(lf.filter(pl.col('student_id') == str(student_id)).select('course_number'))
+        lf = lf.join(pl.concat(courses).unique(), on='course_number', how='semi', maintain_order='left')
+    if teacher_name is not None:
+        lf = lf.filter(pl.col('teacher_name').str.strip_chars().str.to_lowercase() == teacher_name.strip().lower())
+    if shard is not None:
+        lf = lf.filter(_shard_filter(shard))
+    return lf
+
+
+def validate_course_data(lf, max_unit_time=MAX_UNIT_TIME, quarantine_path=DEFAULT_QUARANTINE_FILE):
+    """
+    Apply the data_validator rules as expressions.
+
+    Rule counts and the quarantined rows are computed in one pass over the
+    scan; the clean data stays lazy.
+
+    Returns:
+        tuple: (clean pl.LazyFrame, report dict as from data_validator.validate_course_data,
+            with 'rule_seconds' None since the rules run fused)
+    """
+    start = time.perf_counter()
+    schema = lf.collect_schema()
+    unit_cols = _unit_columns(schema.names())
+
+    def present(column):
+        if schema[column] == pl.String:
+            return pl.col(column).str.strip_chars().fill_null('') != ''
+        return pl.col(column).is_not_null()
+
+    present_cols = [present(column) for column in unit_cols]
+    times = [pl.col(column).cast(pl.Float64, strict=False) for column in unit_cols]
+
+    def any_unit(conditions):
+        return pl.any_horizontal([condition.fill_null(False) for condition in conditions]) \
+            if conditions else pl.lit(False)
+
+    # As in data_validator: a gap when fewer units are present than the highest present unit number
+    unit_numbers = [int(UNIT_COL_PATTERN.match(column).group(1)) for column in unit_cols]
+    unit_gap = (pl.sum_horizontal([p.fill_null(False).cast(pl.Int64) for p, n in zip(present_cols, unit_numbers)
+                                   if n >= 1])
+                < pl.max_horizontal([pl.when(p.fill_null(False)).then(n).otherwise(0)
+                                     for p, n in zip(present_cols, unit_numbers)])) if unit_cols else pl.lit(False)
+
+    rules = {
+        'non_numeric_time': any_unit([p & t.is_null() for p, t in zip(present_cols, times)]),
+        'negative_time': any_unit([t < 0 for t in times]),
+        'absurd_time': any_unit([t > max_unit_time for t in times]),
+        'duplicate_row': ~pl.struct('course_number', 'student_id').is_first_distinct(),
+        'missing_teacher': pl.col('teacher_name').str.strip_chars().fill_null('') == '',
+        'unit_gap': unit_gap
+    }
+    flag_cols = [f"__{rule}" for rule in rules]
+    flagged = lf.with_columns([expr.alias(name) for name, expr in zip(flag_cols, rules.values())]) \
+        .with_columns(pl.any_horizontal(flag_cols).alias('__flagged'))
+
+    counts, quarantined = pl.collect_all([
+        flagged.select([pl.len().alias('rows')] + [pl.col(name).sum() for name in flag_cols]),
+        flagged.filter(pl.col('__flagged')).with_columns(
+            pl.concat_str([pl.when(pl.col(name)).then(pl.lit(rule)) for name, rule in zip(flag_cols, rules)],
+                          separator=';', ignore_nulls=True).alias('quarantine_reasons')
+        ).drop(flag_cols + ['__flagged'])
+    ])
+
+    report = {
+        'rows_checked': counts['rows'][0],
+        'rows_quarantined': quarantined.height,
+        'rule_counts': {rule: int(counts[name][0]) for rule, name in zip(rules, flag_cols)},
+        'rule_seconds': None,
+        'elapsed_seconds': None,
+        'quarantine_file': None
+    }
+    if quarantined.height and quarantine_path is not None:
+        quarantined.write_csv(quarantine_path)
+        report['quarantine_file'] = str(quarantine_path)
+    report['elapsed_seconds'] = time.perf_counter() - start
+
+    return flagged.filter(~pl.col('__flagged')).drop(flag_cols + ['__flagged']), report
+
+
+def preprocess_data(lf):
+    """
+    Lazy equivalent of data_processor.preprocess_data.
+
+    Unit times become numeric, total and average times are added, teacher
+    names are normalized and each unit time is flagged as an outlier when it
+    is more than two standard deviations from its course's mean (a window
+    over course_number).
+
+    Returns:
+        pl.LazyFrame: Preprocessed lazy frame
+    """
+    unit_cols = _unit_columns(lf.collect_schema().names())
+    return (
+        lf.with_columns([pl.col(column).cast(pl.Float64, strict=False) for column in unit_cols])
+        .with_columns(
+            pl.sum_horizontal(unit_cols).alias('total_time'),
+            pl.mean_horizontal(unit_cols).alias('avg_time_per_unit'),
+            pl.col('teacher_name').str.strip_chars().str.to_lowercase(),
+            pl.col('course_number').cast(pl.String)
+        )
+        .with_columns([
+            ((pl.col(column) - pl.col(column).mean().over('course_number')).abs()
+             > 2 * pl.col(column).std().over('course_number')).fill_null(False).alias(f"{column}_outlier")
+            for column in unit_cols
+        ])
+    )
+
+
+def _nan(value):
+    """Null aggregates (e.g. the std of one value) become NaN, as in the pandas engine."""
+    return np.nan if value is None else value
+
+
+def analyze_course_complexity(frame, course_id=None):
+    """
+    Analyze course complexity with grouped aggregations.
+
+    The course, unit and teacher aggregations are collected together, so
+    their shared input (scan, filters, preprocessing) is computed once and
+    the groups are aggregated in parallel.
+
+    Args:
+        frame (pl.LazyFrame or pl.DataFrame): Preprocessed course data
+        course_id (str, optional): Specific course to analyze
+
+    Returns:
+        dict: Complexity metrics by course, structured as in analysis_engine
+    """
+    lf = frame.lazy().with_row_index('__row')
+    unit_cols = _unit_columns(lf.collect_schema().names())
+    if course_id:
+        lf = lf.filter(pl.col('course_number') == str(course_id))
+
+    unit_times = (
+        lf.select(['course_number', 'teacher_name'] + unit_cols)
+        .unpivot(index=['course_number', 'teacher_name'], on=unit_cols, variable_name='unit', value_name='time')
+        .drop_nulls('time')
+    )
+    course_stats, unit_stats, teacher_stats, teacher_unit_stats = pl.collect_all([
+        # Courses and teachers keep their order of first appearance
+        lf.group_by('course_number').agg(
+            pl.col('__row').min().alias('first_row'),
+            pl.len().alias('num_students'),
+            pl.col('total_time').mean().alias('mean'),
+            pl.col('total_time').median().alias('median'),
+            pl.col('total_time').std().alias('std'),
+            pl.col('total_time').min().alias('min'),
+            pl.col('total_time').max().alias('max')
+        ).sort('first_row'),
+        unit_times.group_by('course_number', 'unit').agg(
+            pl.len().alias('count'),
+            pl.col('time').mean().alias('mean'),
+            pl.col('time').median().alias('median'),
+            pl.col('time').std().alias('std'),
+            pl.col('time').min().alias('min'),
+            pl.col('time').max().alias('max')
+        ),
+        lf.group_by('course_number', 'teacher_name').agg(
+            pl.col('__row').min().alias('first_row'),
+            pl.len().alias('num_students'),
+            pl.col('total_time').mean().alias('avg_total_time')
+        ).sort('first_row'),
+        unit_times.group_by('course_number', 'teacher_name', 'unit').agg(pl.col('time').mean().alias('mean'))
+    ])
+
+    if course_id and course_stats.height == 0:
+        print(f"Warning: No data found for course {course_id}")
+        return {}
+
+    units_by_course = {}
+    for row in unit_stats.iter_rows(named=True):
+        units_by_course.setdefault(row['course_number'], {})[row['unit']] = row
+    teachers_by_course = {}
+    for row in teacher_stats.iter_rows(named=True):
+        teachers_by_course.setdefault(row['course_number'], []).append(row)
+    teacher_unit_means = {(row['course_number'], row['teacher_name'], row['unit']): row['mean']
+                          for row in teacher_unit_stats.iter_rows(named=True)}
+
+    complexity_metrics = {}
+    for row in course_stats.iter_rows(named=True):
+        course = row['course_number']
+        units = units_by_course.get(course, {})
+        course_unit_cols = [column for column in unit_cols if column in units]
+
+        course_metrics = {
+            'num_students': row['num_students'],
+            'num_units': len(course_unit_cols),
+            'avg_total_completion_time': row['mean'],
+            'median_total_completion_time': row['median'],
+            'std_total_completion_time': _nan(row['std']),
+            'min_total_completion_time': row['min'],
+            'max_total_completion_time': row['max'],
+        }
+
+        unit_metrics = {}
+        for column in course_unit_cols:
+            stats = units[column]
+            unit_metrics[column.replace('_time', '')] = {
+                'mean_time': stats['mean'],
+                'median_time': stats['median'],
+                'min_time': stats['min'],
+                'max_time': stats['max'],
+                'std_time': _nan(stats['std']),
+                'difficulty_score': difficulty_from_stats(stats['mean'], stats['std'])
+                if stats['count'] >= 2 else 50.0
+            }
+
+        teacher_metrics = {}
+        for teacher_row in teachers_by_course.get(course, []):
+            teacher = teacher_row['teacher_name']
+            teacher_metrics[teacher] = {
+                'num_students': teacher_row['num_students'],
+                'avg_total_time': teacher_row['avg_total_time'],
+                'avg_time_per_unit': {column: _nan(teacher_unit_means.get((course, teacher, column)))
+                                      for column in course_unit_cols},
+                'efficiency_score': teacher_row['avg_total_time'] / course_metrics['avg_total_completion_time']
+            }
+
+        complexity_metrics[course] = {
+            'course_metrics': course_metrics,
+            'unit_metrics': unit_metrics,
+            'teacher_metrics': teacher_metrics,
+            'overall_complexity': calculate_overall_complexity(course_metrics, unit_metrics)
+        }
+
+    return complexity_metrics
+
+
+def to_pandas(frame):
+    """Collect a Polars frame into pandas (column by column, so pyarrow is not required)."""
+    if isinstance(frame, pl.LazyFrame):
+        frame = frame.collect()
+    return pd.DataFrame({column: frame[column].to_numpy() for column in frame.columns})
+
+
+class PolarsEngine:
+    """Lazy Polars pipeline (see dataframe_engines)."""
+
+    name = 'polars'
+
+    def __init__(self):
+        if pl is None:
+            raise ImportError("Polars is not installed. Install with 'pip install polars'")
+
+    load_course_data = staticmethod(load_course_data)
+    validate_course_data = staticmethod(validate_course_data)
+    preprocess_data = staticmethod(preprocess_data)
+    analyze_course_complexity = staticmethod(analyze_course_complexity)
+    to_pandas = staticmethod(to_pandas)
+
+    @staticmethod
+    def is_empty(frame):
+        return frame is None or frame.lazy().head(1).collect().height == 0
+
+    @staticmethod
+    def collect(frame):
+        """Run a lazy plan once and keep the result in memory."""
+        return frame.collect() if isinstance(frame, pl.LazyFrame) else frame
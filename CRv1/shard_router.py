@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Shard Router
+-----------
+Thin front end for sharded serving. Each backend is an app.py instance
+started with COURSE_SHARD=INDEX/COUNT, which loads only the courses that
+hash to its shard. The router forwards course-scoped requests
+(/get_confidence, /confidence_score, /forecast, /similar, /jobs/<id>) to
+the owning backend and serves the index page from the merged course
+catalogs of all backends. It holds no course data itself.
+
+Similarity search runs on the owning backend, so /similar only compares
+against courses in the same shard.
+
+Usage:
+    python shard_router.py --shards 4 --spawn        # start 4 local backends on ports 5001-5004
+    python shard_router.py --backends http://10.0.0.1:5000 http://10.0.0.2:5000
+"""
+
+import os
+import sys
+import time
+import hashlib
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from flask import Flask, Response, jsonify, render_template, request
+
+from course_shards import course_shard
+from utils.http_caching import conditional_response, compress_response
+
+
+# Seconds the merged catalog is served before the backends are revalidated
+CATALOG_REFRESH = 5.0
+FORWARD_TIMEOUT = 60.0
+# Request headers passed to backends, and response headers passed back
+FORWARDED_REQUEST_HEADERS = ('Content-Type', 'Accept-Encoding', 'If-None-Match', 'If-Modified-Since')
+FORWARDED_RESPONSE_HEADERS = ('Content-Type', 'Content-Encoding', 'ETag', 'Last-Modified', 'Cache-Control', 'Vary')
+
+app = Flask(__name__)
+app.after_request(compress_response)
+
+# Backend base URLs, indexed by shard
+backends = []
+session = requests.Session()
+session.mount('http://', requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=64))
+# Shard -> (etag, catalog) of the last fetch, and the merged catalog built from them
+shard_catalogs = {}
+merged_catalog = {'catalog': None, 'fetched_at': 0.0}
+catalog_lock = threading.Lock()
+
+
+def configure(backend_urls):
+    """Set the backend URLs (shard i is served by backend_urls[i]) and drop cached catalogs."""
+    backends[:] = [url.rstrip('/') for url in backend_urls]
+    with catalog_lock:
+        shard_catalogs.clear()
+        merged_catalog.update(catalog=None, fetched_at=0.0)
+
+
+def forward(shard):
+    """
+    Forward the current request to a shard's backend.
+
+    The body is passed through undecoded, so responses the backend
+    compressed stay compressed and its ETags and 304s reach the client.
+    """
+    url = backends[shard] + request.path
+    if request.query_string:
+        url += '?' + request.query_string.decode('utf-8')
+    headers = {name: request.headers[name] for name in FORWARDED_REQUEST_HEADERS if name in request.headers}
+
+    try:
+        upstream = session.request(request.method, url, data=request.get_data(), headers=headers,
+                                   stream=True, timeout=FORWARD_TIMEOUT)
+        body = upstream.raw.read(decode_content=False)
+    except requests.RequestException as e:
+        print(f"Error forwarding to shard {shard}: {e}")
+        return jsonify({
+            'success': False,
+            'message': f"Shard {shard} is unavailable"
+        }), 502
+
+    response = Response(body, status=upstream.status_code)
+    for name in FORWARDED_RESPONSE_HEADERS:
+        if name in upstream.headers:
+            response.headers[name] = upstream.headers[name]
+    return response
+
+
+def gather(path):
+    """GET a path from every backend in parallel; returns shard -> JSON (or an error dict)."""
+    def fetch(shard):
+        try:
+            response = session.get(backends[shard] + path, timeout=FORWARD_TIMEOUT)
+            return response.json()
+        except (requests.RequestException, ValueError) as e:
+            return {'success': False, 'message': str(e)}
+
+    with ThreadPoolExecutor(max_workers=len(backends)) as executor:
+        return dict(enumerate(executor.map(fetch, range(len(backends)))))
+
+
+def fetch_shard_catalog(shard):
+    """Revalidate one backend's catalog by ETag; a failing backend keeps its last catalog."""
+    cached = shard_catalogs.get(shard)
+    headers = {'If-None-Match': cached[0]} if cached else {}
+    try:
+        response = session.get(backends[shard] + '/api/courses', headers=headers, timeout=FORWARD_TIMEOUT)
+        if response.status_code == 304 and cached:
+            return cached
+        response.raise_for_status()
+        return response.headers.get('ETag'), response.json()
+    except requests.RequestException as e:
+        if cached is None:
+            raise
+        print(f"Warning: shard {shard} catalog unavailable, using last known ({e})")
+        return cached
+
+
+def get_merged_catalog():
+    """
+    Courses and teachers of all shards, merged.
+
+    Backends are revalidated (conditional GETs) at most every
+    CATALOG_REFRESH seconds; the merged version changes whenever any
+    shard's data version does.
+    """
+    with catalog_lock:
+        if merged_catalog['catalog'] is not None and time.monotonic() - merged_catalog['fetched_at'] < CATALOG_REFRESH:
+            return merged_catalog['catalog']
+
+        with ThreadPoolExecutor(max_workers=len(backends)) as executor:
+            results = list(executor.map(fetch_shard_catalog, range(len(backends))))
+        shard_catalogs.update(enumerate(results))
+
+        teachers_by_course = {}
+        for _, catalog in results:
+            teachers_by_course.update(catalog['teachers_by_course'])
+        versions = ':'.join(catalog['version'] or '' for _, catalog in results)
+        merged_catalog.update(fetched_at=time.monotonic(), catalog={
+            'version': hashlib.sha256(versions.encode('utf-8')).hexdigest()[:16],
+            'courses': sorted(teachers_by_course),
+            'teachers_by_course': teachers_by_course,
+            'shards': len(backends)
+        })
+        return merged_catalog['catalog']
+
+
+@app.route('/')
+def index():
+    """Render the main page with the merged course list"""
+    catalog = get_merged_catalog()
+    if request.if_none_match.contains_weak(catalog['version']):
+        return conditional_response('', catalog['version'])
+    return conditional_response(render_template('index.html', courses=catalog['courses']), catalog['version'])
+
+
+@app.route('/api/courses')
+def courses_catalog():
+    """Merged courses and teachers by course, cacheable until any shard's data changes"""
+    catalog = get_merged_catalog()
+    if request.if_none_match.contains_weak(catalog['version']):
+        return conditional_response('', catalog['version'])
+    return conditional_response(jsonify(catalog), catalog['version'])
+
+
+@app.route('/get_confidence', methods=['GET', 'POST'])
+@app.route('/confidence_score', methods=['POST'])
+@app.route('/forecast', methods=['POST'])
+@app.route('/similar')
+@app.route('/jobs/<job_id>')
+def route_by_course(job_id=None):
+    """Forward a course-scoped request to the shard that owns the course"""
+    # Buffer the raw body before the form is parsed, so it can be forwarded unchanged
+    request.get_data()
+    course_id = request.values.get('course')
+    if not course_id:
+        return jsonify({
+            'success': False,
+            'message': 'Please select a course'
+        }), 400
+    return forward(course_shard(course_id, len(backends)))
+
+
+@app.route('/shards')
+def shards():
+    """Shard, course count and peak memory of every backend"""
+    return jsonify(gather('/shard'))
+
+
+@app.route('/jobs/stats')
+def job_stats():
+    """Insight queue statistics per shard"""
+    return jsonify(gather('/jobs/stats'))
+
+
+@app.route('/llm/usage')
+def llm_usage():
+    """Gemini key usage per shard"""
+    return jsonify(gather('/llm/usage'))
+
+
+def spawn_backends(num_shards, base_port, env=None):
+    """
+    Start one app.py backend per shard on consecutive local ports.
+
+    Args:
+        num_shards (int): Number of shards
+        base_port (int): Port of shard 0
+        env (dict, optional): Extra environment variables for the backends
+
+    Returns:
+        tuple: (list of Popen processes, list of backend URLs)
+    """
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    processes = []
+    urls = []
+    for shard in range(num_shards):
+        backend_env = dict(os.environ, **(env or {}), COURSE_SHARD=f"{shard}/{num_shards}",
+                           PORT=str(base_port + shard))
+        processes.append(subprocess.Popen([sys.executable, 'app.py'], cwd=app_dir, env=backend_env,
+                                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+        urls.append(f"http://127.0.0.1:{base_port + shard}")
+    return processes, urls
+
+
+def wait_for_backends(urls, timeout=300.0, processes=None):
+    """
+    Block until every backend answers /shard.
+
+    Raises:
+        RuntimeError: If a backend exits or the timeout passes first
+    """
+    deadline = time.monotonic() + timeout
+    pending = list(urls)
+    while pending:
+        if processes and any(process.poll() is not None for process in processes):
+            raise RuntimeError("A shard backend exited during startup")
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Shard backends not ready after {timeout:.0f} s: {', '.join(pending)}")
+        try:
+            session.get(pending[0] + '/shard', timeout=2).raise_for_status()
+            pending.pop(0)
+        except requests.RequestException:
+            time.sleep(0.5)
+
+
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Course-sharded serving router')
+    parser.add_argument('--backends', type=str, nargs='+',
+                        default=[url for url in os.environ.get('SHARD_BACKENDS', '').split(',') if url],
+                        help='Backend URLs in shard order (default: SHARD_BACKENDS, comma-separated)')
+    parser.add_argument('--spawn', action='store_true',
+                        help='Start the backends locally, one process per shard')
+    parser.add_argument('--shards', type=int, default=4,
+                        help='Number of shards to start with --spawn')
+    parser.add_argument('--base-port', type=int, default=5001,
+                        help='Port of the first spawned backend')
+    parser.add_argument('--host', type=str, default='127.0.0.1',
+                        help='Router listen address')
+    parser.add_argument('--port', type=int, default=5000,
+                        help='Router port')
+    return parser.parse_args()
+
+
+def main():
+    """Start (or connect to) the shard backends and run the router."""
+    args = parse_arguments()
+
+    processes = []
+    if args.spawn:
+        print(f"Starting {args.shards} shard backends on ports {args.base_port}-{args.base_port + args.shards - 1}...")
+        processes, urls = spawn_backends(args.shards, args.base_port)
+    else:
+        urls = args.backends
+    if not urls:
+        print("Error: No backends given. Use --spawn or --backends (or SHARD_BACKENDS).")
+        return
+
+    try:
+        wait_for_backends(urls, processes=processes)
+        configure(urls)
+        for shard, info in gather('/shard').items():
+            print(f"  shard {shard}: {backends[shard]} ({info.get('courses')} courses)")
+        app.run(host=args.host, port=args.port, threaded=True)
+    finally:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""
+Similarity Index Module
+----------------------
+Nearest-neighbor search over course and teacher unit-time profiles.
+Courses are described by their per-unit mean times and difficulty
+scores, teacher sections by their average time per unit. Profiles are
+kept in a feature matrix, standardized and L2-normalized, and queried
+with a blocked matrix product plus argpartition (cosine similarity).
+"""
+
+import re
+
+import numpy as np
+
+
+UNIT_NAME_PATTERN = re.compile(r'^unit(\d+)')
+
+# Query rows per block in top-k search, bounding the similarity matrix size
+QUERY_BLOCK_SIZE = 1024
+
+
+def _unit_number(unit):
+    match = UNIT_NAME_PATTERN.match(unit)
+    return int(match.group(1)) if match else 0
+
+
+def _normalize(features):
+    """Standardize columns and L2-normalize rows so dot products are cosine similarities."""
+    if len(features) == 0:
+        return features
+    scale = features.std(axis=0)
+    scale[scale == 0] = 1.0
+    normalized = (features - features.mean(axis=0)) / scale
+    norms = np.linalg.norm(normalized, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return normalized / norms
+
+
+def top_k_similar(matrix, queries, k, exclude=None, block_size=QUERY_BLOCK_SIZE):
+    """
+    Find the k most similar rows of a normalized matrix for each query.
+
+    Args:
+        matrix (np.ndarray): (items, features) normalized rows
+        queries (np.ndarray): (queries, features) normalized rows
+        k (int): Number of neighbors
+        exclude (np.ndarray, optional): Row index to exclude per query (e.g. the query itself), -1 for none
+        block_size (int): Queries per matrix-product block
+
+    Returns:
+        tuple: ((queries, k) indices, (queries, k) similarities), best first
+    """
+    k = min(k, len(matrix) - (1 if exclude is not None else 0))
+    if k <= 0:
+        return np.empty((len(queries), 0), dtype=np.int64), np.empty((len(queries), 0))
+
+    indices = np.empty((len(queries), k), dtype=np.int64)
+    scores = np.empty((len(queries), k))
+    for start in range(0, len(queries), block_size):
+        stop = min(len(queries), start + block_size)
+        sims = queries[start:stop] @ matrix.T
+        if exclude is not None:
+            rows = np.flatnonzero(exclude[start:stop] >= 0)
+            sims[rows, exclude[start:stop][rows]] = -np.inf
+
+        # Unordered top-k per row, then sort just those k
+        part = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        part_scores = np.take_along_axis(sims, part, axis=1)
+        order = np.argsort(-part_scores, axis=1)
+        indices[start:stop] = np.take_along_axis(part, order, axis=1)
+        scores[start:stop] = np.take_along_axis(part_scores, order, axis=1)
+    return indices, scores
+
+
+class SimilarityIndex:
+    """Course and teacher-section profile index with incremental refresh."""
+
+    def __init__(self):
+        self.units = []
+        self.course_keys = []
+        self.section_keys = []
+        # Compact per-unit profiles, kept so rows can be re-vectorized if the unit set grows
+        self._course_profiles = {}
+        self._section_profiles = {}
+        self._course_rows = {}
+        self._section_rows = {}
+        self.course_matrix = np.empty((0, 0))
+        self.section_matrix = np.empty((0, 0))
+
+    def _course_vector(self, profile):
+        means = [profile.get(unit, (0.0, 0.0))[0] for unit in self.units]
+        difficulties = [profile.get(unit, (0.0, 0.0))[1] for unit in self.units]
+        return np.nan_to_num(np.array(means + difficulties, dtype=np.float64))
+
+    def _section_vector(self, profile):
+        return np.nan_to_num(np.array([profile.get(unit, 0.0) for unit in self.units], dtype=np.float64))
+
+    def _add_course(self, course, metrics):
+        """Store a course's profiles and feature rows, replacing any previous version."""
+        self._course_profiles[course] = {
+            unit: (unit_data['mean_time'], unit_data['difficulty_score'])
+            for unit, unit_data in metrics['unit_metrics'].items()
+        }
+        self._course_rows[course] = self._course_vector(self._course_profiles[course])
+
+        for key in [key for key in self._section_profiles if key[0] == course]:
+            del self._section_profiles[key]
+            del self._section_rows[key]
+        for teacher, teacher_data in metrics['teacher_metrics'].items():
+            profile = {unit_col.replace('_time', ''): avg_time
+                       for unit_col, avg_time in teacher_data['avg_time_per_unit'].items()}
+            self._section_profiles[(course, teacher)] = profile
+            self._section_rows[(course, teacher)] = self._section_vector(profile)
+
+    def build(self, complexity_metrics):
+        """Build the index from scratch."""
+        self.__init__()
+        self.units = sorted({unit for m in complexity_metrics.values() for unit in m['unit_metrics']},
+                            key=_unit_number)
+        for course, metrics in complexity_metrics.items():
+            self._add_course(course, metrics)
+        self._refresh()
+        return self
+
+    def update(self, complexity_metrics):
+        """
+        Add or replace the profiles of the given courses.
+
+        Only the changed courses' feature rows are recomputed; the matrices are
+        then renormalized in one vectorized pass. A course that introduces a
+        new unit re-vectorizes the stored profiles, since every row gains columns.
+
+        Args:
+            complexity_metrics (dict): Metrics of new or changed courses only
+        """
+        new_units = {unit for m in complexity_metrics.values() for unit in m['unit_metrics']} - set(self.units)
+        if new_units:
+            self.units = sorted(set(self.units) | new_units, key=_unit_number)
+            self._course_rows = {c: self._course_vector(p) for c, p in self._course_profiles.items()}
+            self._section_rows = {k: self._section_vector(p) for k, p in self._section_profiles.items()}
+
+        for course, metrics in complexity_metrics.items():
+            self._add_course(course, metrics)
+        self._refresh()
+
+    def remove(self, courses):
+        """Drop courses (and their sections) from the index."""
+        courses = set(courses)
+        for store in (self._course_profiles, self._course_rows):
+            for course in courses & set(store):
+                del store[course]
+        for store in (self._section_profiles, self._section_rows):
+            for key in [key for key in store if key[0] in courses]:
+                del store[key]
+        self._refresh()
+
+    def _refresh(self):
+        self.course_keys = list(self._course_rows.keys())
+        self.section_keys = list(self._section_rows.keys())
+        self._course_index = {key: i for i, key in enumerate(self.course_keys)}
+        self._section_index = {key: i for i, key in enumerate(self.section_keys)}
+        self.course_matrix = _normalize(np.vstack(list(self._course_rows.values()))) \
+            if self._course_rows else np.empty((0, 0))
+        self.section_matrix = _normalize(np.vstack(list(self._section_rows.values()))) \
+            if self._section_rows else np.empty((0, 0))
+
+    def similar_courses(self, course_id, k=5):
+        """
+        Find the courses whose unit profile is most similar to a course.
+
+        Returns:
+            list: (course, similarity) pairs, most similar first; empty if unknown
+        """
+        if course_id not in self._course_index:
+            return []
+        row = self._course_index[course_id]
+        indices, scores = top_k_similar(self.course_matrix, self.course_matrix[row:row + 1], k,
+                                        exclude=np.array([row]))
+        return [(self.course_keys[i], round(float(s), 3)) for i, s in zip(indices[0], scores[0])]
+
+    def similar_sections(self, course_id, teacher_name, k=5):
+        """
+        Find the teacher sections (in any course) most similar to a section.
+
+        Returns:
+            list: ((course, teacher), similarity) pairs, most similar first; empty if unknown
+        """
+        key = (course_id, teacher_name)
+        if key not in self._section_index:
+            return []
+        row = self._section_index[key]
+        indices, scores = top_k_similar(self.section_matrix, self.section_matrix[row:row + 1], k,
+                                        exclude=np.array([row]))
+        return [(self.section_keys[i], round(float(s), 3)) for i, s in zip(indices[0], scores[0])]
+
+    def all_similar_courses(self, k=5):
+        """
+        Top-k similar courses for every course, in blocked batches.
+
+        Returns:
+            dict: Course -> list of (course, similarity) pairs
+        """
+        exclude = np.arange(len(self.course_keys))
+        indices, scores = top_k_similar(self.course_matrix, self.course_matrix, k, exclude=exclude)
+        return {
+            course: [(self.course_keys[i], round(float(s), 3)) for i, s in zip(indices[row], scores[row])]
+            for row, course in enumerate(self.course_keys)
+        }
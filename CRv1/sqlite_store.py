@@ -0,0 +1,199 @@
+"""
+SQLite Store Module
+------------------
+Alternative storage backend that keeps the processed course data and the
+materialized complexity metrics in a local SQLite file, so callers can
+query a single course, teacher or student instead of holding the whole
+dataset in memory.
+"""
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from metrics_exporter import dumps_metrics, flatten_complexity_metrics
+
+
+# Scoped lookups used by the web app and the LLM connector
+ROW_INDEXES = {
+    'idx_students_course': ('course_number',),
+    'idx_students_course_teacher': ('course_number', 'teacher_name'),
+    'idx_students_student': ('student_id',),
+}
+
+
+def build_store(processed_data, complexity_metrics, db_path, source=None):
+    """
+    Write processed data and complexity metrics to a SQLite database.
+
+    Creates a 'students' row table with indexes on course, teacher and
+    student, the flat 'course_metrics', 'unit_metrics' and 'teacher_metrics'
+    aggregate tables, and a 'metrics_json' table holding each course's full
+    metrics document.
+
+    Args:
+        processed_data (pd.DataFrame): Output of preprocess_data
+        complexity_metrics (dict): Output of analyze_course_complexity
+        db_path (str or Path): SQLite file to (re)create
+        source (str, optional): Description of the data source, stored as metadata
+
+    Returns:
+        Path: Path of the written database
+    """
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    # Build into a temporary file so readers never see a half-written store
+    tmp_path = db_path.with_suffix(db_path.suffix + '.tmp')
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        processed_data.to_sql('students', conn, index=False)
+        for index_name, columns in ROW_INDEXES.items():
+            conn.execute(f"CREATE INDEX {index_name} ON students ({', '.join(columns)})")
+
+        tables = flatten_complexity_metrics(complexity_metrics)
+        for name, table in tables.items():
+            table.to_sql(f"{name[:-1]}_metrics", conn, index=False)
+        conn.execute("CREATE INDEX idx_unit_metrics_course ON unit_metrics (course_number)")
+        conn.execute("CREATE INDEX idx_teacher_metrics_course ON teacher_metrics (course_number)")
+
+        conn.execute("CREATE TABLE metrics_json (course_number TEXT PRIMARY KEY, metrics TEXT)")
+        conn.executemany(
+            "INSERT INTO metrics_json VALUES (?, ?)",
+            [(course, dumps_metrics(metrics).decode('utf-8')) for course, metrics in complexity_metrics.items()]
+        )
+
+        conn.execute("CREATE TABLE store_meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.executemany("INSERT INTO store_meta VALUES (?, ?)", [
+            ('source', str(source or '')),
+            ('built_at', str(time.time())),
+        ])
+        conn.commit()
+    finally:
+        conn.close()
+
+    tmp_path.replace(db_path)
+    return db_path
+
+
+def connect_store(db_path):
+    """
+    Open a read connection to a SQLite store.
+
+    Args:
+        db_path (str or Path): SQLite file created by build_store
+
+    Returns:
+        sqlite3.Connection: Open connection
+    """
+    return sqlite3.connect(f"file:{Path(db_path)}?mode=ro", uri=True)
+
+
+def is_store_fresh(db_path, source_paths):
+    """
+    Check whether a store exists and is newer than all of its source files.
+
+    Args:
+        db_path (str or Path): SQLite file
+        source_paths (list): Source CSV paths the store was built from
+
+    Returns:
+        bool: True if the store can be used as-is
+    """
+    db_path = Path(db_path)
+    if not db_path.exists():
+        return False
+    db_mtime = db_path.stat().st_mtime
+    return all(Path(p).stat().st_mtime <= db_mtime for p in source_paths)
+
+
+def list_courses(conn):
+    """Return all course numbers in the store."""
+    return [row[0] for row in conn.execute("SELECT course_number FROM course_metrics ORDER BY rowid")]
+
+
+def get_teachers_by_course(conn):
+    """
+    Return the teachers for each course.
+
+    Args:
+        conn (sqlite3.Connection): Store connection
+
+    Returns:
+        dict: Course number -> list of teacher names
+    """
+    teachers_by_course = {course: [] for course in list_courses(conn)}
+    for course, teacher in conn.execute("SELECT course_number, teacher_name FROM teacher_metrics ORDER BY rowid"):
+        teachers_by_course.setdefault(course, []).append(teacher)
+    return teachers_by_course
+
+
+def get_complexity_metrics(conn, course_id=None):
+    """
+    Load complexity metrics from the materialized metrics table.
+
+    Args:
+        conn (sqlite3.Connection): Store connection
+        course_id (str, optional): Only load this course
+
+    Returns:
+        dict: Complexity metrics in the analyze_course_complexity structure
+    """
+    if course_id:
+        rows = conn.execute("SELECT course_number, metrics FROM metrics_json WHERE course_number = ?", (course_id,))
+    else:
+        rows = conn.execute("SELECT course_number, metrics FROM metrics_json ORDER BY rowid")
+    return {course: json.loads(metrics) for course, metrics in rows}
+
+
+def query_rows(conn, course_id=None, teacher_name=None, student_id=None):
+    """
+    Query processed student rows, using the indexes for each filter.
+
+    Args:
+        conn (sqlite3.Connection): Store connection
+        course_id (str, optional): Course number filter
+        teacher_name (str, optional): Teacher filter (normalized lowercase name)
+        student_id (str, optional): Student filter
+
+    Returns:
+        pd.DataFrame: Matching rows
+    """
+    clauses = []
+    params = []
+    for column, value in (('course_number', course_id), ('teacher_name', teacher_name), ('student_id', student_id)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+
+    query = "SELECT * FROM students"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    return pd.read_sql_query(query, conn, params=params)
+
+
+def get_student_context(conn, student_id):
+    """
+    Load the rows needed to describe a student's history.
+
+    Returns the rows of every course the student has taken (all students in
+    those courses), which is what prepare_prompt_data needs to compute the
+    student's relative performance. Unknown students yield an empty frame.
+
+    Args:
+        conn (sqlite3.Connection): Store connection
+        student_id (str): Student ID
+
+    Returns:
+        pd.DataFrame: Rows for the student's courses
+    """
+    return pd.read_sql_query(
+        "SELECT * FROM students WHERE course_number IN "
+        "(SELECT DISTINCT course_number FROM students WHERE student_id = ?)",
+        conn, params=[student_id]
+    )
@@ -0,0 +1,240 @@
+"""
+Trend Analysis Module
+--------------------
+Per-term and rolling-window course, unit and teacher metrics for data
+with a term (or completion date) column, plus trend slopes across terms.
+
+Each term is reduced once to per-key sums (count, sum and sum of squares
+of times). Rolling windows keep running totals of those sums: moving to
+the next term adds that term's sums and subtracts the term that left the
+window, so the cost of a step depends on the number of keys, not on the
+window length.
+"""
+
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from analysis_engine import calculate_overall_complexity, difficulty_from_stats
+from data_processor import to_long_unit_times
+
+
+# Checked in this order; 'term' holds sortable labels such as '2024-1', 'completion_date' dates
+TIME_COLUMNS = ('term', 'completion_date')
+# Completion dates are bucketed into calendar quarters ('2024Q1')
+DATE_TERM_FREQUENCY = 'Q'
+DEFAULT_WINDOW_TERMS = 3
+
+
+def get_time_column(df):
+    """Return the first TIME_COLUMNS column present in df, or None."""
+    return next((column for column in TIME_COLUMNS if column in df.columns), None)
+
+
+def term_labels(df, time_column):
+    """
+    Term label of every row and the chronological list of terms.
+
+    Returns:
+        tuple: (pd.Series of labels, NaN where unknown; list of terms in order)
+    """
+    if time_column == 'completion_date':
+        dates = pd.to_datetime(df[time_column], errors='coerce')
+        labels = dates.dt.to_period(DATE_TERM_FREQUENCY).astype(str).where(dates.notna())
+    else:
+        labels = df[time_column].astype(str).where(df[time_column].notna())
+    return labels, sorted(labels.dropna().unique())
+
+
+class RollingWindow:
+    """
+    Running per-key sums over the last `size` terms.
+
+    Args:
+        size (int): Number of terms in the window
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.terms = deque()
+        self.totals = None
+
+    def push(self, term_sums):
+        """
+        Add a term's sums and drop the term that falls out of the window.
+
+        Args:
+            term_sums (pd.DataFrame): Per-key 'n', 'sum' and 'sum_sq' columns of one term
+
+        Returns:
+            pd.DataFrame: Window totals for keys with data in the window
+        """
+        self.terms.append(term_sums)
+        self.totals = term_sums if self.totals is None else self.totals.add(term_sums, fill_value=0)
+        if len(self.terms) > self.size:
+            self.totals = self.totals.sub(self.terms.popleft(), fill_value=0)
+            self.totals = self.totals[self.totals['n'] > 0]
+        return self.totals
+
+
+def _sums(values, keys):
+    """Per-key count, sum and sum of squares of values."""
+    frame = pd.DataFrame({'n': 1, 'sum': values, 'sum_sq': values * values})
+    return frame.groupby(keys, sort=False).sum()
+
+
+def _moments(totals):
+    """Mean and sample standard deviation (NaN below two values) from running sums."""
+    n = totals['n'].to_numpy(dtype=np.float64)
+    mean = totals['sum'].to_numpy() / n
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = np.maximum(totals['sum_sq'].to_numpy() - totals['sum'].to_numpy() * mean, 0) / (n - 1)
+    std = np.where(n > 1, np.sqrt(variance), np.nan)
+    return mean, std
+
+
+def _window_metrics(course_totals, unit_totals, teacher_totals):
+    """Course, unit and teacher metrics of one term or window, keyed by course."""
+    metrics = {}
+    course_mean, course_std = _moments(course_totals)
+    for course, n, mean, std in zip(course_totals.index, course_totals['n'], course_mean, course_std):
+        metrics[course] = {
+            'course_metrics': {'num_students': int(n), 'avg_total_completion_time': mean,
+                               'std_total_completion_time': std},
+            'unit_metrics': {},
+            'teacher_metrics': {}
+        }
+
+    unit_mean, unit_std = _moments(unit_totals)
+    for (course, unit), n, mean, std in zip(unit_totals.index, unit_totals['n'], unit_mean, unit_std):
+        metrics[course]['unit_metrics'][f"unit{unit}"] = {
+            'num_students': int(n),
+            'mean_time': mean,
+            'std_time': std,
+            'difficulty_score': difficulty_from_stats(mean, std) if n >= 2 else 50.0
+        }
+
+    teacher_mean, _ = _moments(teacher_totals)
+    for (course, teacher), n, mean in zip(teacher_totals.index, teacher_totals['n'], teacher_mean):
+        course_avg = metrics[course]['course_metrics']['avg_total_completion_time']
+        metrics[course]['teacher_metrics'][teacher] = {
+            'num_students': int(n),
+            'avg_total_time': mean,
+            'efficiency_score': mean / course_avg if course_avg > 0 else np.nan
+        }
+
+    for entry in metrics.values():
+        # Units in a term's data, ordered by unit number as in the all-time snapshot
+        entry['unit_metrics'] = dict(sorted(entry['unit_metrics'].items(), key=lambda item: int(item[0][4:])))
+        entry['course_metrics']['num_units'] = len(entry['unit_metrics'])
+        entry['course_metrics']['complexity_score'] = calculate_overall_complexity(
+            entry['course_metrics'], entry['unit_metrics'])['complexity_score']
+    return metrics
+
+
+def _slope(points):
+    """Least-squares slope of (term index, value) points, per term; None with fewer than two points."""
+    points = [(x, y) for x, y in points if y is not None and not np.isnan(y)]
+    if len(points) < 2:
+        return None
+    x, y = np.array(points, dtype=np.float64).T
+    return round(float(np.polyfit(x, y, 1)[0]), 3)
+
+
+def analyze_trends(df, window_terms=DEFAULT_WINDOW_TERMS, time_column=None):
+    """
+    Compute per-term and rolling-window metrics and trend slopes per course.
+
+    Args:
+        df (pd.DataFrame): Preprocessed course data with a term or completion_date column
+        window_terms (int): Terms per rolling window
+        time_column (str, optional): Column holding the term; defaults to get_time_column(df)
+
+    Returns:
+        dict: Course -> {'terms', 'window_terms', 'per_term', 'rolling', 'slopes'}, where
+            per_term and rolling map a term (the window's last term) to 'course_metrics',
+            'unit_metrics' and 'teacher_metrics', and slopes are changes per term of the
+            per-term values: 'avg_total_completion_time', 'complexity_score',
+            'unit_difficulty' {unit: slope} and 'teacher_efficiency' {teacher: slope}.
+            Empty if df has no time column.
+    """
+    time_column = time_column or get_time_column(df)
+    if time_column is None:
+        return {}
+
+    labels, terms = term_labels(df, time_column)
+    dated = labels.notna().to_numpy()
+    df = df[dated].reset_index(drop=True)
+    labels = labels[dated].reset_index(drop=True)
+
+    # One grouped pass per level; every level is keyed by term first
+    total_time = df['total_time'].to_numpy(dtype=np.float64)
+    course_sums = _sums(total_time, [labels.to_numpy(), df['course_number'].to_numpy()])
+    teacher_sums = _sums(total_time, [labels.to_numpy(), df['course_number'].to_numpy(),
+                                      df['teacher_name'].to_numpy()])
+    unit_times = to_long_unit_times(df)
+    unit_sums = _sums(unit_times['time'].to_numpy(), [labels.to_numpy()[unit_times['row'].to_numpy()],
+                                                      unit_times['course_number'].to_numpy(),
+                                                      unit_times['unit_number'].to_numpy()])
+
+    def term_slice(sums, term):
+        return sums.xs(term, level=0) if term in sums.index.get_level_values(0) else sums.iloc[:0].droplevel(0)
+
+    windows = [RollingWindow(window_terms) for _ in range(3)]
+    trends = {}
+    for term in terms:
+        term_sums = [term_slice(sums, term) for sums in (course_sums, unit_sums, teacher_sums)]
+        window_totals = [window.push(sums) for window, sums in zip(windows, term_sums)]
+        for kind, metrics in (('per_term', _window_metrics(*term_sums)),
+                              ('rolling', _window_metrics(*window_totals))):
+            for course, entry in metrics.items():
+                course_trends = trends.setdefault(course, {
+                    'terms': [], 'window_terms': window_terms, 'per_term': {}, 'rolling': {}
+                })
+                course_trends[kind][term] = entry
+                if kind == 'per_term':
+                    course_trends['terms'].append(term)
+
+    term_index = {term: i for i, term in enumerate(terms)}
+    for course_trends in trends.values():
+        per_term = course_trends['per_term']
+        points = [(term_index[term], entry) for term, entry in per_term.items()]
+        units = {unit for _, entry in points for unit in entry['unit_metrics']}
+        teachers = {teacher for _, entry in points for teacher in entry['teacher_metrics']}
+        course_trends['slopes'] = {
+            'avg_total_completion_time': _slope(
+                [(x, entry['course_metrics']['avg_total_completion_time']) for x, entry in points]),
+            'complexity_score': _slope([(x, entry['course_metrics']['complexity_score']) for x, entry in points]),
+            'unit_difficulty': {
+                unit: _slope([(x, entry['unit_metrics'][unit]['difficulty_score'])
+                              for x, entry in points if unit in entry['unit_metrics']])
+                for unit in sorted(units, key=lambda name: int(name[4:]))
+            },
+            'teacher_efficiency': {
+                teacher: _slope([(x, entry['teacher_metrics'][teacher]['efficiency_score'])
+                                 for x, entry in points if teacher in entry['teacher_metrics']])
+                for teacher in sorted(teachers)
+            }
+        }
+    return trends
+
+
+def add_trend_metrics(complexity_metrics, df, window_terms=DEFAULT_WINDOW_TERMS):
+    """
+    Add a 'trends' entry (see analyze_trends) to each course's metrics, in place.
+
+    Courses without dated rows get no entry; nothing is added when df has
+    no time column.
+
+    Returns:
+        dict: The updated complexity metrics
+    """
+    if get_time_column(df) is None:
+        print(f"Warning: No {' or '.join(TIME_COLUMNS)} column found, skipping trend analysis")
+        return complexity_metrics
+
+    df = df[df['course_number'].isin(list(complexity_metrics))]
+    for course, course_trends in analyze_trends(df, window_terms).items():
+        complexity_metrics[course]['trends'] = course_trends
+    return complexity_metrics
@@ -0,0 +1,213 @@
+"""
+Chart Rendering Module
+---------------------
+Renders one PNG per course (unit difficulty, unit time distribution and
+teacher comparison) into a report directory with an HTML index. Courses
+are drawn in parallel with a process pool on the headless Agg backend,
+and each image is named by a hash of that course's metrics, so reruns
+only redraw courses whose numbers changed. Runs over a subset of courses
+(--course, --top, --category) add to the report rather than replace it.
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from metrics_exporter import dumps_metrics
+
+
+DEFAULT_CHART_DIR = 'course_charts'
+MANIFEST_FILE = 'manifest.json'
+# Bump when the chart layout changes so cached images are redrawn
+CHART_VERSION = 1
+# Below this many stale courses, rendering in-process beats starting a pool
+MIN_PARALLEL_COURSES = 8
+
+_UNSAFE_CHARS = re.compile(r'[^A-Za-z0-9_.-]+')
+
+# One figure per process, cleared and redrawn for each course
+_figure = None
+
+
+def course_metrics_hash(course_id, metrics):
+    """Stable hash of one course's metrics (and the chart version)."""
+    payload = dumps_metrics({'course': course_id, 'version': CHART_VERSION, 'metrics': metrics})
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+def chart_filename(course_id, metrics_hash):
+    """Image file name for a course version."""
+    return f"{_UNSAFE_CHARS.sub('_', str(course_id))}-{metrics_hash}.png"
+
+
+def _course_figure():
+    """Return this process's reusable figure and axes (headless Agg backend)."""
+    global _figure
+    if _figure is None:
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        
+        fig = Figure(figsize=(15, 4), dpi=80)
+        FigureCanvasAgg(fig)
+        axes = fig.subplots(1, 3)
+        # Fixed margins instead of tight_layout, which costs a full extra layout pass per chart
+        fig.subplots_adjust(left=0.05, right=0.99, bottom=0.22, top=0.85, wspace=0.25)
+        _figure = (fig, axes)
+    fig, axes = _figure
+    for ax in axes:
+        ax.clear()
+    return fig, axes
+
+
+def render_course_chart(course_id, metrics, path):
+    """
+    Draw one course's charts to a PNG file.
+
+    Args:
+        course_id (str): Course number
+        metrics (dict): The course's entry of complexity_metrics
+        path (str or Path): PNG file to write
+
+    Returns:
+        str: The written path
+    """
+    fig, (ax_difficulty, ax_times, ax_teachers) = _course_figure()
+    units = list(metrics['unit_metrics'].keys())
+    unit_data = list(metrics['unit_metrics'].values())
+    teachers = list(metrics['teacher_metrics'].keys())
+
+    complexity = metrics['overall_complexity']
+    fig.suptitle(f"{course_id}: {complexity['category']} (score {complexity['complexity_score']})")
+
+    # Unit difficulty, with bootstrap intervals when computed
+    difficulties = [u['difficulty_score'] for u in unit_data]
+    errors = None
+    if all('difficulty_ci' in u for u in unit_data) and unit_data:
+        errors = [[max(0, d - u['difficulty_ci'][0]) for d, u in zip(difficulties, unit_data)],
+                  [max(0, u['difficulty_ci'][1] - d) for d, u in zip(difficulties, unit_data)]]
+    ax_difficulty.bar(units, difficulties, yerr=errors, color='tab:orange', capsize=3)
+    ax_difficulty.set_title('Unit difficulty')
+    ax_difficulty.set_ylabel('Difficulty (0-100)')
+    ax_difficulty.set_ylim(0, 100)
+
+    # Unit time distribution: min-max range, mean +/- one standard deviation
+    positions = range(len(units))
+    means = [u['mean_time'] for u in unit_data]
+    ax_times.vlines(positions, [u['min_time'] for u in unit_data], [u['max_time'] for u in unit_data],
+                    color='lightgray', linewidth=6, label='min - max')
+    ax_times.errorbar(positions, means, yerr=[u['std_time'] for u in unit_data],
+                      fmt='o', color='tab:blue', capsize=4, label='mean +/- std')
+    ax_times.set_xticks(list(positions), units)
+    ax_times.set_title('Unit time distribution')
+    ax_times.set_ylabel('Minutes')
+    ax_times.legend(fontsize='small')
+
+    # Teacher comparison: average total time, colored by efficiency
+    totals = [metrics['teacher_metrics'][t]['avg_total_time'] for t in teachers]
+    colors = ['tab:green' if metrics['teacher_metrics'][t]['efficiency_score'] < 1.0 else 'tab:red'
+              for t in teachers]
+    ax_teachers.bar(teachers, totals, color=colors)
+    ax_teachers.axhline(metrics['course_metrics']['avg_total_completion_time'], color='black',
+                        linestyle='--', linewidth=1, label='course average')
+    ax_teachers.set_title('Teacher comparison')
+    ax_teachers.set_ylabel('Avg total time (min)')
+    ax_teachers.legend(fontsize='small')
+
+    for ax in (ax_difficulty, ax_teachers):
+        ax.tick_params(axis='x', labelrotation=45)
+    # Fast zlib level: PNG compression otherwise dominates the render time
+    fig.savefig(path, pil_kwargs={'compress_level': 1})
+    return str(path)
+
+
+def _render_job(job):
+    return render_course_chart(*job)
+
+
+def _write_index(output_dir, entries):
+    """Write index.html linking every course image (lazy-loaded for large catalogs)."""
+    rows = '\n'.join(
+        f'<section><h2>{html.escape(str(course_id))}</h2>'
+        f'<img src="{html.escape(filename)}" alt="{html.escape(str(course_id))}" loading="lazy"></section>'
+        for course_id, filename in entries
+    )
+    (output_dir / 'index.html').write_text(
+        '<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>Course Complexity Charts</title>'
+        '<style>body{font-family:sans-serif}img{max-width:100%}</style></head>\n'
+        f'<body><h1>Course Complexity Charts ({len(entries)} courses)</h1>\n{rows}\n</body></html>\n'
+    )
+
+
+def generate_visualizations(complexity_metrics, output_dir=DEFAULT_CHART_DIR, max_workers=None, known_courses=None):
+    """
+    Render charts for every course into a report directory.
+
+    The courses are merged into the directory's existing manifest and index:
+    courses rendered before but not in complexity_metrics keep their charts,
+    unless known_courses is given and no longer contains them.
+
+    Args:
+        complexity_metrics (dict): Course complexity metrics
+        output_dir (str or Path): Report directory (PNG files plus index.html)
+        max_workers (int, optional): Render processes; defaults to the CPU count
+        known_courses (iterable, optional): Every course in the dataset; charts of other
+            courses are pruned. None keeps all previously rendered courses.
+
+    Returns:
+        dict: 'rendered', 'cached' and 'removed' counts and the 'index' path
+
+    Raises:
+        ImportError: If matplotlib is not installed
+    """
+    import matplotlib  # noqa: F401  (fail early, before hashing thousands of courses)
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    entries = []
+    jobs = []
+    for course_id, metrics in complexity_metrics.items():
+        filename = chart_filename(course_id, course_metrics_hash(course_id, metrics))
+        entries.append((course_id, filename))
+        if not (output_dir / filename).exists():
+            jobs.append((course_id, metrics, str(output_dir / filename)))
+
+    if len(jobs) >= MIN_PARALLEL_COURSES:
+        max_workers = max_workers or os.cpu_count() or 1
+        # Large chunks keep per-task pickling overhead small with thousands of courses
+        chunksize = max(1, len(jobs) // (max_workers * 4))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(_render_job, jobs, chunksize=chunksize))
+    else:
+        for job in jobs:
+            _render_job(job)
+
+    # Merge into the previous manifest: courses filtered out of this run keep their charts,
+    # courses no longer in the dataset are dropped, and changed courses point at their new image
+    manifest_path = output_dir / MANIFEST_FILE
+    previous = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    known = None if known_courses is None else {str(course_id) for course_id in known_courses}
+    manifest = {course_id: filename for course_id, filename in previous.items()
+                if (known is None or course_id in known) and (output_dir / filename).exists()}
+    manifest.update((str(course_id), filename) for course_id, filename in entries)
+
+    # Drop images of courses that changed or no longer exist
+    current = set(manifest.values())
+    removed = 0
+    for filename in set(previous.values()) - current:
+        if (output_dir / filename).exists():
+            (output_dir / filename).unlink()
+            removed += 1
+
+    manifest_path.write_text(json.dumps(manifest, indent=2))
+    _write_index(output_dir, list(manifest.items()))
+    return {
+        'rendered': len(jobs),
+        'cached': len(entries) - len(jobs),
+        'removed': removed,
+        'index': str(output_dir / 'index.html')
+    }
@@ -0,0 +1,35 @@
+"""
+Data Path Utilities
+------------------
+Resolves data source arguments into CSV file paths. Kept free of heavy
+dependencies so entry points can validate their inputs before loading
+pandas.
+"""
+
+import glob
+from pathlib import Path
+
+
+def resolve_data_paths(source):
+    """
+    Resolve a data source into a list of CSV file paths.
+    
+    Args:
+        source (str, Path or list): A CSV file, a directory of CSV files,
+            a glob pattern, or a list of any of these
+        
+    Returns:
+        list: Sorted list of Path objects (empty if nothing matched)
+    """
+    if isinstance(source, (list, tuple)):
+        paths = []
+        for item in source:
+            paths.extend(resolve_data_paths(item))
+        return paths
+    
+    path = Path(source)
+    if path.is_dir():
+        return sorted(path.glob('*.csv'))
+    if glob.has_magic(str(source)):
+        return sorted(Path(p) for p in glob.glob(str(source), recursive=True) if Path(p).is_file())
+    return [path] if path.exists() else []
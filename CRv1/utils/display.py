@@ -4,77 +4,241 @@ Display Utilities Module
 Functions for displaying analysis results to the user.
 """
 
+import contextlib
+import heapq
+import io
+import itertools
+import pydoc
+import sys
 import textwrap
 
 
-def display_results(complexity_metrics, insights, visualize=False):
+COMPLEXITY_CATEGORIES = ('Easy', 'Moderate', 'Challenging', 'Very Difficult')
+SORT_KEYS = ('complexity', 'course')
+# Buffer size for report output; the report is written in large blocks instead of a syscall per line
+REPORT_BUFFER_SIZE = 1 << 16
+
+_RULE = '=' * 60
+_DIVIDER = '-' * 60
+
+
+def select_courses(complexity_metrics, sort_by=None, top=None, categories=None):
+    """
+    Filter, sort and truncate the courses to report.
+    
+    Args:
+        complexity_metrics (dict): Course complexity metrics
+        sort_by (str, optional): 'complexity' (hardest first) or 'course'; None keeps the input order
+        top (int, optional): Only the first N courses after sorting; None or 0 means no limit
+        categories (iterable, optional): Only courses in these complexity categories
+        
+    Returns:
+        list: (course_id, metrics) pairs
+    """
+    top = top or None
+    courses = complexity_metrics.items()
+    if categories:
+        categories = {category.lower() for category in categories}
+        courses = [(c, m) for c, m in courses if m['overall_complexity']['category'].lower() in categories]
+    
+    if sort_by == 'complexity':
+        def key(item):
+            return item[1]['overall_complexity']['complexity_score']
+        # A bounded heap avoids sorting every course when only the top N are shown
+        return heapq.nlargest(top, courses, key=key) if top else sorted(courses, key=key, reverse=True)
+    if sort_by == 'course':
+        courses = sorted(courses, key=lambda item: str(item[0]))
+    return list(itertools.islice(courses, top))
+
+
+@contextlib.contextmanager
+def report_stream(output=None):
+    """
+    Open the stream a report is written to.
+    
+    Args:
+        output (str, optional): File path, 'pager' to page the report, or None for stdout
+        
+    Yields:
+        file: Buffered text stream
+    """
+    if output == 'pager':
+        buffer = io.StringIO()
+        yield buffer
+        pydoc.pager(buffer.getvalue())
+    elif output:
+        with open(output, 'w', buffering=REPORT_BUFFER_SIZE) as f:
+            yield f
+    else:
+        sys.stdout.flush()
+        try:
+            fileno = sys.stdout.fileno()
+        except (AttributeError, io.UnsupportedOperation):
+            # Not a real file (e.g. captured output); write to it directly
+            yield sys.stdout
+            return
+        with open(fileno, 'w', buffering=REPORT_BUFFER_SIZE, encoding=sys.stdout.encoding,
+                  errors='replace', closefd=False) as f:
+            yield f
+
+
+def write_course_report(out, course_id, metrics, course_insight=None):
+    """Write one course's metrics (and its LLM insights, if any) to a report stream."""
+    write = out.write
+    complexity = metrics['overall_complexity']
+    write(f"\n{_RULE}\nCourse: {course_id}\n{_RULE}\n")
+    write(f"Complexity Category: {complexity['category']} (Score: {complexity['complexity_score']})\n")
+    if 'complexity_ci' in complexity:
+        low, high = complexity['complexity_ci']
+        write(f"Complexity Score {complexity['ci_confidence']:.0%} CI: {low} - {high}\n")
+    write(f"Most Difficult Unit: {complexity['most_difficult_unit']}\n")
+    write(f"Easiest Unit: {complexity['easiest_unit']}\n")
+    
+    # Course metrics
+    course_data = metrics['course_metrics']
+    # Approximate mode reports standard errors next to the estimates
+    average_se = f" (± {course_data['avg_total_completion_time_se']:.1f})" \
+        if 'avg_total_completion_time_se' in course_data else ""
+    write(f"\nNumber of Students: {course_data['num_students']}\n")
+    if 'sampled_students' in course_data:
+        write(f"Approximate: estimated from {course_data['sampled_students']} sampled students\n")
+    write(f"Number of Units: {course_data['num_units']}\n"
+          f"Average Completion Time: {course_data['avg_total_completion_time']:.1f}{average_se} minutes\n"
+          f"Time Range: {course_data['min_total_completion_time']:.1f} - "
+          f"{course_data['max_total_completion_time']:.1f} minutes\n")
+    
+    # Unit details
+    write("\nUnit Details:\n")
+    # Leave room for bootstrap intervals when they were computed
+    diff_width = 20 if any('difficulty_ci' in u or 'difficulty_score_se' in u
+                           for u in metrics['unit_metrics'].values()) else 12
+    write(f"{'Unit':<10} {'Difficulty':<{diff_width}} {'Avg Time (min)':<15} {'Time Range':<20}\n{_DIVIDER}\n")
+    
+    for unit, unit_data in metrics['unit_metrics'].items():
+        difficulty_str = f"{unit_data['difficulty_score']:.1f}/100"
+        if 'difficulty_ci' in unit_data:
+            difficulty_str += f" [{unit_data['difficulty_ci'][0]:.0f}-{unit_data['difficulty_ci'][1]:.0f}]"
+        elif 'difficulty_score_se' in unit_data:
+            difficulty_str += f" ±{unit_data['difficulty_score_se']:.1f}"
+        time_range = f"{unit_data['min_time']:.1f} - {unit_data['max_time']:.1f}"
+        write(f"{unit:<10} {difficulty_str:<{diff_width}} {unit_data['mean_time']:<15.1f} {time_range:<20}\n")
+    
+    # Teacher comparison
+    if len(metrics['teacher_metrics']) > 1:
+        write(f"\nTeacher Comparison:\n"
+              f"{'Teacher':<15} {'Students':<10} {'Avg Time (min)':<15} {'Efficiency':<10}\n{_DIVIDER}\n")
+        
+        for teacher, teacher_data in metrics['teacher_metrics'].items():
+            efficiency = round(teacher_data['efficiency_score'], 2)
+            efficiency_indicator = "✓" if efficiency < 1.0 else "✗"
+            if 'efficiency_score_se' in teacher_data:
+                efficiency_indicator += f" (± {teacher_data['efficiency_score_se']:.2f})"
+            write(f"{teacher:<15} {teacher_data['num_students']:<10} {teacher_data['avg_total_time']:<15.1f} "
+                  f"{efficiency:<10.2f} {efficiency_indicator}\n")
+
+    # Per-term trends
+    if 'trends' in metrics:
+        trends = metrics['trends']
+        write(f"\nTrends ({len(trends['terms'])} terms, rolling window of {trends['window_terms']}):\n"
+              f"{'Term':<10} {'Students':<10} {'Avg Time':<10} {'Rolling Avg':<12} {'Complexity':<10}\n{_DIVIDER}\n")
+        for term in trends['terms']:
+            term_data = trends['per_term'][term]['course_metrics']
+            rolling_data = trends['rolling'][term]['course_metrics']
+            write(f"{term:<10} {term_data['num_students']:<10} {term_data['avg_total_completion_time']:<10.1f} "
+                  f"{rolling_data['avg_total_completion_time']:<12.1f} {term_data['complexity_score']:<10}\n")
+        slopes = trends['slopes']
+        if slopes['avg_total_completion_time'] is not None:
+            write(f"Change per term: {slopes['avg_total_completion_time']:+.1f} minutes, "
+                  f"complexity {slopes['complexity_score']:+.1f}\n")
+
+    # Per-course LLM insights (batched mode)
+    if course_insight and 'confidence_score' in course_insight:
+        write(f"\nGemini Confidence Score: {course_insight['confidence_score']} "
+              f"({course_insight.get('complexity', 'Unknown')})\n")
+        if course_insight.get('estimated_completion'):
+            write(f"Estimated Completion: {course_insight['estimated_completion']}\n")
+        if course_insight.get('recommendation'):
+            write(textwrap.fill(course_insight['recommendation'], width=80) + "\n")
+
+
+def display_results(complexity_metrics, insights, visualize=False, chart_dir='course_charts',
+                    sort_by=None, top=None, categories=None, output=None, known_courses=None):
     """
     Display analysis results in a readable format.
     
+    The report is written through one buffered stream rather than printed
+    line by line, so large catalogs are not dominated by terminal I/O.
+    
     Args:
         complexity_metrics (dict): Course complexity metrics
         insights (dict): Insights from Gemini LLM
         visualize (bool): Whether to generate visualizations
+        chart_dir (str): Report directory for the charts
+        sort_by (str, optional): 'complexity' (hardest first) or 'course'
+        top (int, optional): Only report the first N courses (None or 0: all)
+        categories (iterable, optional): Only report courses in these categories
+        output (str, optional): File path or 'pager'; defaults to stdout
+        known_courses (iterable, optional): Every course in the dataset, so charts of
+            removed courses are pruned (see generate_visualizations)
     """
-    # Display basic metrics for each course
-    for course_id, metrics in complexity_metrics.items():
-        print(f"\n{'='*60}")
-        print(f"Course: {course_id}")
-        print(f"{'='*60}")
-        
-        # Overall complexity
-        complexity = metrics['overall_complexity']
-        print(f"Complexity Category: {complexity['category']} (Score: {complexity['complexity_score']})")
-        print(f"Most Difficult Unit: {complexity['most_difficult_unit']}")
-        print(f"Easiest Unit: {complexity['easiest_unit']}")
-        
-        # Course metrics
-        course_data = metrics['course_metrics']
-        print(f"\nNumber of Students: {course_data['num_students']}")
-        print(f"Number of Units: {course_data['num_units']}")
-        print(f"Average Completion Time: {course_data['avg_total_completion_time']:.1f} minutes")
-        print(f"Time Range: {course_data['min_total_completion_time']:.1f} - {course_data['max_total_completion_time']:.1f} minutes")
-        
-        # Unit details
-        print("\nUnit Details:")
-        print(f"{'Unit':<10} {'Difficulty':<12} {'Avg Time (min)':<15} {'Time Range':<20}")
-        print("-" * 60)
-        
-        for unit, unit_data in metrics['unit_metrics'].items():
-            difficulty_str = f"{unit_data['difficulty_score']:.1f}/100"
-            avg_time = f"{unit_data['mean_time']:.1f}"
-            time_range = f"{unit_data['min_time']:.1f} - {unit_data['max_time']:.1f}"
-            print(f"{unit:<10} {difficulty_str:<12} {avg_time:<15} {time_range:<20}")
-        
-        # Teacher comparison
-        if len(metrics['teacher_metrics']) > 1:
-            print("\nTeacher Comparison:")
-            print(f"{'Teacher':<15} {'Students':<10} {'Avg Time (min)':<15} {'Efficiency':<10}")
-            print("-" * 60)
-            
-            for teacher, teacher_data in metrics['teacher_metrics'].items():
-                efficiency = f"{teacher_data['efficiency_score']:.2f}"
-                efficiency_indicator = "✓" if float(efficiency) < 1.0 else "✗"
-                avg_time = f"{teacher_data['avg_total_time']:.1f}"
-                print(f"{teacher:<15} {teacher_data['num_students']:<10} {avg_time:<15} {efficiency:<10} {efficiency_indicator}")
+    courses = select_courses(complexity_metrics, sort_by, top, categories)
     
-    # Display Gemini insights
-    if 'error' not in insights:
-        print(f"\n{'='*60}")
-        print("Gemini LLM Insights")
-        print(f"{'='*60}")
+    with report_stream(output) as out:
+        # Display basic metrics for each course
+        course_insights = insights.get('course_insights', {})
+        for course_id, metrics in courses:
+            write_course_report(out, course_id, metrics, course_insights.get(course_id))
+        if len(courses) < len(complexity_metrics):
+            out.write(f"\n(Showing {len(courses)} of {len(complexity_metrics)} courses)\n")
         
-        if 'raw_response' in insights:
-            wrapped_text = textwrap.fill(insights['raw_response'], width=80)
-            print(wrapped_text)
-    else:
-        print(f"\nError getting LLM insights: {insights['error']}")
+        # Display Gemini insights
+        if 'error' not in insights:
+            out.write(f"\n{_RULE}\nGemini LLM Insights\n{_RULE}\n")
+            
+            if 'raw_response' in insights:
+                out.write(textwrap.fill(insights['raw_response'], width=80) + "\n")
+        else:
+            out.write(f"\nError getting LLM insights: {insights['error']}\n")
     
     # Generate visualizations if requested
     if visualize:
         try:
-            # This would be implemented with matplotlib or another visualization library
-            print("\nGenerating visualizations (placeholder)...")
-            # generate_visualizations(complexity_metrics)
+            from utils.charts import generate_visualizations
+            
+            print(f"\nGenerating visualizations in {chart_dir}...")
+            result = generate_visualizations(dict(courses), chart_dir, known_courses=known_courses)
+            print(f"Rendered {result['rendered']} course charts ({result['cached']} unchanged, "
+                  f"{result['removed']} removed); open {result['index']}")
         except ImportError:
             print("\nVisualization requires matplotlib. Install with 'pip install matplotlib'")
+
+
+def display_similar(similarity_index, k, course_id=None):
+    """
+    Display nearest neighbors from a similarity index.
+    
+    Args:
+        similarity_index (SimilarityIndex): Built index
+        k (int): Number of neighbors to show
+        course_id (str, optional): Show this course and its teacher sections only
+    """
+    print(f"\n{'='*60}")
+    print(f"Similar Courses (top {k})")
+    print(f"{'='*60}")
+    
+    if course_id:
+        neighbors = {course_id: similarity_index.similar_courses(course_id, k)}
+    else:
+        neighbors = similarity_index.all_similar_courses(k)
+    
+    for course, similar in neighbors.items():
+        similar_str = ", ".join(f"{other} ({score:.2f})" for other, score in similar)
+        print(f"{course:<12} {similar_str}")
+    
+    if course_id:
+        print("\nSimilar Teacher Sections:")
+        for teacher in [t for c, t in similarity_index.section_keys if c == course_id]:
+            similar = similarity_index.similar_sections(course_id, teacher, k)
+            similar_str = ", ".join(f"{c}/{t} ({score:.2f})" for (c, t), score in similar)
+            print(f"{teacher:<12} {similar_str}")
+
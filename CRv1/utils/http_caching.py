@@ -0,0 +1,64 @@
+"""
+HTTP Caching Utilities
+---------------------
+Conditional (ETag / Last-Modified) responses and response compression
+shared by the web app and the shard router.
+"""
+
+import gzip
+
+from flask import make_response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Responses smaller than this are sent uncompressed
+COMPRESS_MIN_SIZE = 1024
+
+
+def conditional_response(payload, etag, last_modified=None):
+    """
+    Wrap a payload in a response that clients revalidate by ETag.
+
+    Sets a weak ETag (so it survives compression), Last-Modified and
+    Cache-Control: no-cache, and answers 304 Not Modified when the
+    client's copy is current.
+
+    Args:
+        payload: Response, or anything make_response accepts
+        etag (str): Entity tag
+        last_modified (datetime, optional): Last modification time
+
+    Returns:
+        flask.Response: The (possibly 304) response
+    """
+    response = payload if hasattr(payload, 'set_etag') else make_response(payload)
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def compress_response(response):
+    """Brotli/gzip-compress responses above COMPRESS_MIN_SIZE when the client accepts it (after_request hook)."""
+    if (response.status_code != 200 or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.content_length is None or response.content_length < COMPRESS_MIN_SIZE):
+        return response
+
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        encoding, body = 'br', brotli.compress(response.get_data())
+    elif accepted['gzip']:
+        encoding, body = 'gzip', gzip.compress(response.get_data(), compresslevel=6)
+    else:
+        return response
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
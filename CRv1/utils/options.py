@@ -0,0 +1,21 @@
+"""
+Option Values
+------------
+Choices shared by the command line and the modules that implement them,
+plus checks for the optional dependencies those choices need. Kept free
+of heavy dependencies so entry points can validate their arguments before
+loading pandas.
+"""
+
+import importlib.util
+
+
+EXPORT_FORMATS = ('json', 'csv', 'parquet')
+DATAFRAME_ENGINES = ('pandas', 'polars')
+# Libraries pandas can write Parquet with
+PARQUET_ENGINES = ('pyarrow', 'fastparquet')
+
+
+def parquet_available():
+    """Return True if a Parquet engine for pandas is installed."""
+    return any(importlib.util.find_spec(engine) is not None for engine in PARQUET_ENGINES)